@@ -0,0 +1,248 @@
+"""
+Optional columnar storage of the table elements of a Loop Project File
+
+By default each table element (faultObservations, drillholeObservations, ...)
+is stored as one netCDF variable of a compound type, so reading any field
+decompresses every field of every record. An element can instead be stored
+with one variable per field, named "<variableName>_<field>", in the same
+group and along the same index dimension with the same MaxValid attribute.
+Byte string fields are stored as char variables along a "strlen<N>"
+dimension.
+
+The layout of an element is recorded in the group attributes
+"<variableName>_Layout" ("compound" or "columnar") and
+"<variableName>_LayoutVersion" and GetTableVariable returns an object that
+reads and writes records the same way for either layout.
+
+While an element is columnar its compound variable, which no longer holds
+its records, is renamed "<variableName>_Schema" (and only keeps the field
+names and types), so readers unaware of the layout fail to find the
+element rather than read stale records.
+"""
+import numpy
+
+import LoopProjectFile.LoopProjectFileUtils as LoopProjectFileUtils
+
+compoundLayout = "compound"
+columnarLayout = "columnar"
+columnarLayoutVersion = 1
+layouts = (compoundLayout, columnarLayout)
+
+
+def LayoutAttribute(variableName):
+    return variableName + "_Layout"
+
+
+def ColumnName(variableName, field):
+    return variableName + "_" + field
+
+
+def SchemaName(variableName):
+    return variableName + "_Schema"
+
+
+def _CompoundVariable(group, variableName):
+    # The compound variable under its own name or, for columnar tables, as
+    # the table's schema
+    if variableName in group.variables:
+        return group.variables[variableName]
+    return group.variables[SchemaName(variableName)]
+
+
+def GetLayout(group, variableName):
+    """
+    **GetLayout** - The storage layout of the table variableName in group
+
+    Returns
+    -------
+    string
+        "compound" or "columnar"
+
+    """
+    if LayoutAttribute(variableName) in group.ncattrs():
+        return str(group.getncattr(LayoutAttribute(variableName)))
+    return compoundLayout
+
+
+def GetTableVariable(group, variableName):
+    """
+    **GetTableVariable** - The variable holding the records of the table
+    variableName in group, a ColumnarVariable for columnar tables
+
+    Returns
+    -------
+    netCDF4.Variable or ColumnarVariable or None
+        None if the table is not in the group
+
+    """
+    if GetLayout(group, variableName) == columnarLayout:
+        return ColumnarVariable(group, variableName)
+    return group.variables.get(variableName)
+
+
+class ColumnarVariable:
+    """
+    **ColumnarVariable** - The records of a table stored with one variable per
+    field, read and written as a structured array like a compound variable
+
+    Parameters
+    ----------
+    group: netCDF4.Group
+        The group holding the table
+    variableName: string
+        The name of the table (of its compound variable)
+    names: list of strings or None
+        Only read these fields (see narrow), None for all of them
+
+    """
+
+    def __init__(self, group, variableName, names=None):
+        self.group = group
+        self.name = variableName
+        compound = _CompoundVariable(group, variableName)
+        self.dimensions = compound.dimensions
+        fields = []
+        for field in compound.dtype.names:
+            if names is not None and field not in names:
+                continue
+            column = group.variables[ColumnName(variableName, field)]
+            if column.ndim == 2:
+                fields.append((field, "S" + str(column.shape[1])))
+            else:
+                fields.append((field, column.dtype))
+        self.dtype = numpy.dtype(fields)
+
+    def narrow(self, names):
+        """
+        **narrow** - The same table reading only the fields names, so the
+        variables of the other fields are never read
+        """
+        return ColumnarVariable(self.group, self.name, names)
+
+    def chunking(self):
+        rows = [
+            self.group.variables[ColumnName(self.name, field)].chunking()
+            for field in self.dtype.names
+        ]
+        rows = [chunking[0] for chunking in rows if isinstance(chunking, list)]
+        return [max(rows)] if rows else "contiguous"
+
+    @property
+    def shape(self):
+        return (self.group.dimensions[self.dimensions[0]].size,)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        records = None
+        for field in self.dtype.names:
+            column = numpy.ma.getdata(self.group.variables[ColumnName(self.name, field)][key])
+            if self.dtype[field].kind == "S":
+                # Char (n, strlen) arrays are viewed as fixed length strings
+                column = numpy.ascontiguousarray(column).view(self.dtype[field])
+                column = column.reshape(column.shape[:-1])
+            if records is None:
+                records = numpy.empty(numpy.shape(column), dtype=self.dtype)
+            records[field] = column
+        if records is not None and records.ndim == 0:
+            return records[()]
+        return records
+
+    def __setitem__(self, key, value):
+        value = AsRecords(value, self.dtype)
+        if isinstance(key, (int, numpy.integer)):
+            value = value.reshape(())
+        for field in self.dtype.names:
+            column = value[field]
+            if self.dtype[field].kind == "S":
+                column = numpy.ascontiguousarray(column).view("S1")
+                column = column.reshape(numpy.shape(value) + (self.dtype[field].itemsize,))
+            self.group.variables[ColumnName(self.name, field)][key] = column
+
+
+def AsRecords(value, dtype):
+    """
+    **AsRecords** - value (a structured array or record of the element, or a
+    tuple of its fields) as a structured array of dtype, matching fields by
+    position as the compound variables do
+    """
+    if isinstance(value, numpy.void):
+        value = value.item()
+    if isinstance(value, tuple):
+        return numpy.array([value], dtype=dtype)
+    value = numpy.asarray(value)
+    if value.dtype.names is None:
+        return numpy.asarray(value, dtype=dtype)
+    return value.astype(dtype, copy=False)
+
+
+def _CreateColumns(group, variableName):
+    compound = _CompoundVariable(group, variableName)
+    dimension = compound.dimensions[0]
+    for field in compound.dtype.names:
+        name = ColumnName(variableName, field)
+        if name in group.variables:
+            continue
+        # Strings are stored in the compound type as ("S1", (strlen,))
+        fieldType = compound.dtype[field]
+        if fieldType.subdtype is not None:
+            fieldType = fieldType.subdtype[0]
+        if fieldType.kind == "S":
+            length = compound.dtype[field].itemsize
+            strlen = "strlen" + str(length)
+            if strlen not in group.dimensions:
+                group.createDimension(strlen, length)
+            group.createVariable(name, "S1", (dimension, strlen), zlib=True, complevel=9)
+        else:
+            group.createVariable(name, fieldType, (dimension,), zlib=True, complevel=9)
+
+
+def SetLayout(group, variableName, layout, maxValidName):
+    """
+    **SetLayout** - Stores the table variableName in group with layout,
+    copying its valid records into the new layout when it changes
+
+    Parameters
+    ----------
+    group: netCDF4.Group
+        The writable group holding the table
+    variableName: string
+        The name of the table (of its compound variable)
+    layout: string
+        "compound" or "columnar"
+    maxValidName: string
+        The group attribute holding the number of valid records
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    if layout not in layouts:
+        errStr = "(ERROR) Unknown layout '" + str(layout) + "', expected one of " + str(layouts)
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    current = GetLayout(group, variableName)
+    if current == layout:
+        return {"errorFlag": False}
+    source = GetTableVariable(group, variableName)
+    maxValid = 0
+    if maxValidName in group.ncattrs():
+        maxValid = max(0, min(len(group.dimensions[source.dimensions[0]]), group.getncattr(maxValidName)))
+    if layout == columnarLayout:
+        _CreateColumns(group, variableName)
+        target = ColumnarVariable(group, variableName)
+    else:
+        group.renameVariable(SchemaName(variableName), variableName)
+        target = group.variables[variableName]
+    for start, records in LoopProjectFileUtils.IterBlocks(source, 0, maxValid):
+        target[start:start + len(records)] = records
+    if layout == columnarLayout:
+        # The compound records are stale from now on
+        group.renameVariable(variableName, SchemaName(variableName))
+    group.setncattr(LayoutAttribute(variableName), layout)
+    group.setncattr(variableName + "_LayoutVersion", columnarLayoutVersion)
+    return {"errorFlag": False}
@@ -1,5 +1,6 @@
 # import netCDF4
 import LoopProjectFile.LoopProjectFileUtils as LoopProjectFileUtils
+import LoopProjectFile.ColumnarLayout as ColumnarLayout
 import LoopProjectFile
 
 
@@ -184,6 +185,7 @@ def GetObservations(
     indexRange=(0, 0),
     keyword="",
     verbose=False,
+    asArray=False,
 ):
     response = {"errorFlag": False}
     resp = GetObservationsGroup(root)
@@ -193,13 +195,12 @@ def GetObservations(
         if verbose:
             print("Getting variable " + variableName)
         oGroup = resp["value"]
-        data = []
         maxValidIndex = min(
             oGroup.dimensions[indexName].size, oGroup.getncattr(indexName + "_MaxValid")
         )
         # Select all option
         if (
-            indexList == []
+            len(indexList) == 0
             and len(indexRange) == 2
             and indexRange[0] == 0
             and indexRange[1] == 0
@@ -209,36 +210,38 @@ def GetObservations(
                 print("Getting all")
             # Create list of observations as:
             # ((easting, northing, altitude), dipdir, dip, formation, layer)
-            for i in range(0, maxValidIndex):
-                data.append((oGroup.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(oGroup, variableName), 0, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on keyword and list of indices option
-        elif keyword != "" and indexList != []:
+        elif keyword != "" and len(indexList) > 0:
             if verbose:
                 print("Getting keyword and index list")
-            for i in indexList:
-                if (
-                    int(i) >= 0
-                    and int(i) < maxValidIndex
-                    and oGroup.variables.get(variableName)[i] == keyword
-                ):
-                    data.append((oGroup.variables.get(variableName)[i]))
-            response["value"] = data
+            records = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(oGroup, variableName), indexList, maxValidIndex, asArray=True
+            )
+            data = records[LoopProjectFileUtils.KeywordMask(records, keyword)]
+            response["value"] = data if asArray else list(data)
         # Select based on keyword option
         elif keyword != "":
             if verbose:
                 print("Getting keyword")
-            for i in range(0, maxValidIndex):
-                if oGroup.variables.get(variableName)[i] == keyword:
-                    data.append((oGroup.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadMatching(
+                ColumnarLayout.GetTableVariable(oGroup, variableName),
+                0,
+                maxValidIndex,
+                lambda records: LoopProjectFileUtils.KeywordMask(records, keyword),
+                asArray=asArray,
+            )
             response["value"] = data
         # Select based on list of indices option
-        elif indexList != []:
+        elif len(indexList) > 0:
             if verbose:
                 print("Getting index list")
-            for i in indexList:
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((oGroup.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(oGroup, variableName), indexList, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on indices range option
         elif (
@@ -248,9 +251,12 @@ def GetObservations(
         ):
             if verbose:
                 print("Getting index range")
-            for i in range(indexRange[0], indexRange[1]):
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((oGroup.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(oGroup, variableName),
+                indexRange[0],
+                min(indexRange[1], maxValidIndex),
+                asArray=asArray,
+            )
             response["value"] = data
         else:
             errStr = "Non-implemented filter option"
@@ -261,7 +267,7 @@ def GetObservations(
 
 
 def GetFaultObservations(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetObservations(
         root,
@@ -271,11 +277,12 @@ def GetFaultObservations(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
 def GetFoldObservations(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetObservations(
         root,
@@ -285,11 +292,12 @@ def GetFoldObservations(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
 def GetFoliationObservations(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetObservations(
         root,
@@ -299,11 +307,12 @@ def GetFoliationObservations(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
 def GetDiscontinuityObservations(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetObservations(
         root,
@@ -313,11 +322,12 @@ def GetDiscontinuityObservations(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
 def GetStratigraphicObservations(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetObservations(
         root,
@@ -327,6 +337,7 @@ def GetStratigraphicObservations(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
@@ -369,13 +380,11 @@ def SetObservations(root, data, indexName, variableName, append=False, verbose=F
         oGroup = resp["value"]
 
     if oGroup:
-        observationLocation = oGroup.variables[variableName]
+        observationLocation = ColumnarLayout.GetTableVariable(oGroup, variableName)
         index = 0
         if append:
-            index = oGroup.dimensions[indexName].size
-        for i in data:
-            observationLocation[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(oGroup, indexName)
+        index = LoopProjectFileUtils.WriteRecords(observationLocation, index, data, grow=append)
         oGroup.setncattr(indexName + "_MaxValid", index)
     else:
         errStr = "(ERROR) Failed to Create observations group for observations setting"
@@ -431,7 +440,7 @@ def SetStratigraphicObservations(root, data, append=False, verbose=False):
 
 
 # Extract contacts
-def GetContacts(root, indexList=[], indexRange=(0, 0), keyword="", verbose=False):
+def GetContacts(root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False):
     response = {"errorFlag": False}
     # Note contacts use a different group node "Contacts" hence we cannot use GetObservations function
     resp = GetContactsGroup(root)
@@ -439,13 +448,12 @@ def GetContacts(root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
         response = resp
     else:
         group = resp["value"]
-        data = []
         maxValidIndex = min(
             group.dimensions["index"].size, group.getncattr("index_MaxValid")
         )
         # Select all option
         if (
-            indexList == []
+            len(indexList) == 0
             and len(indexRange) == 2
             and indexRange[0] == 0
             and indexRange[1] == 0
@@ -453,30 +461,32 @@ def GetContacts(root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
         ):
             # Create list of observations as:
             # ((easting, northing, altitude), dipdir, dip, formation, layer)
-            for i in range(0, maxValidIndex):
-                data.append((group.variables.get("contacts")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(group, "contacts"), 0, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on keyword and list of indices option
-        elif keyword != "" and indexList != []:
-            for i in indexList:
-                if (
-                    int(i) >= 0
-                    and int(i) < maxValidIndex
-                    and group.variables.get("layer")[i] == keyword
-                ):
-                    data.append((group.variables.get("contacts")[i]))
-            response["value"] = data
+        elif keyword != "" and len(indexList) > 0:
+            records = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(group, "contacts"), indexList, maxValidIndex, asArray=True
+            )
+            data = records[LoopProjectFileUtils.KeywordMask(records, keyword)]
+            response["value"] = data if asArray else list(data)
         # Select based on keyword option
         elif keyword != "":
-            for i in range(0, maxValidIndex):
-                if group.variables.get("layer")[i] == keyword:
-                    data.append((group.variables.get("contacts")[i]))
+            data = LoopProjectFileUtils.ReadMatching(
+                ColumnarLayout.GetTableVariable(group, "contacts"),
+                0,
+                maxValidIndex,
+                lambda records: LoopProjectFileUtils.KeywordMask(records, keyword),
+                asArray=asArray,
+            )
             response["value"] = data
         # Select based on list of indices option
-        elif indexList != []:
-            for i in indexList:
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((group.variables.get("contacts")[i]))
+        elif len(indexList) > 0:
+            data = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(group, "contacts"), indexList, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on indices range option
         elif (
@@ -484,9 +494,12 @@ def GetContacts(root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
             and indexRange[0] >= 0
             and indexRange[1] >= indexRange[0]
         ):
-            for i in range(indexRange[0], indexRange[1]):
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((group.variables.get("contacts")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(group, "contacts"),
+                indexRange[0],
+                min(indexRange[1], maxValidIndex),
+                asArray=asArray,
+            )
             response["value"] = data
         else:
             errStr = "Non-implemented filter option"
@@ -544,13 +557,11 @@ def SetContacts(root, data, append=False, verbose=False):
         group = resp["value"]
 
     if group:
-        contactsLocation = group.variables["contacts"]
+        contactsLocation = ColumnarLayout.GetTableVariable(group, "contacts")
         index = 0
         if append:
-            index = group.dimensions["index"].size
-        for i in data:
-            contactsLocation[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(group, "index")
+        index = LoopProjectFileUtils.WriteRecords(contactsLocation, index, data, grow=append)
         group.setncattr("index_MaxValid", index)
     else:
         errStr = "(ERROR) Failed to Create contacts group for contact setting"
@@ -569,6 +580,7 @@ def GetDrillholeData(
     indexRange=(0, 0),
     keyword="",
     verbose=False,
+    asArray=False,
 ):
     response = {"errorFlag": False}
     # Note contacts use a different group node "Contacts" hence we cannot use GetObservations function
@@ -577,13 +589,12 @@ def GetDrillholeData(
         response = resp
     else:
         group = resp["value"]
-        data = []
         maxValidIndex = min(
             group.dimensions[indexName].size, group.getncattr(indexName + "_MaxValid")
         )
         # Select all option
         if (
-            indexList == []
+            len(indexList) == 0
             and len(indexRange) == 2
             and indexRange[0] == 0
             and indexRange[1] == 0
@@ -591,30 +602,32 @@ def GetDrillholeData(
         ):
             # Create list of observations as:
             # ((easting, northing, altitude), dipdir, dip, formation, layer)
-            for i in range(0, maxValidIndex):
-                data.append((group.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(group, variableName), 0, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on keyword and list of indices option
-        elif keyword != "" and indexList != []:
-            for i in indexList:
-                if (
-                    int(i) >= 0
-                    and int(i) < maxValidIndex
-                    and group.variables.get("layer")[i] == keyword
-                ):
-                    data.append((group.variables.get(variableName)[i]))
-            response["value"] = data
+        elif keyword != "" and len(indexList) > 0:
+            records = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(group, variableName), indexList, maxValidIndex, asArray=True
+            )
+            data = records[LoopProjectFileUtils.KeywordMask(records, keyword)]
+            response["value"] = data if asArray else list(data)
         # Select based on keyword option
         elif keyword != "":
-            for i in range(0, maxValidIndex):
-                if group.variables.get("layer")[i] == keyword:
-                    data.append((group.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadMatching(
+                ColumnarLayout.GetTableVariable(group, variableName),
+                0,
+                maxValidIndex,
+                lambda records: LoopProjectFileUtils.KeywordMask(records, keyword),
+                asArray=asArray,
+            )
             response["value"] = data
         # Select based on list of indices option
-        elif indexList != []:
-            for i in indexList:
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((group.variables.get(variableName)[i]))
+        elif len(indexList) > 0:
+            data = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(group, variableName), indexList, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on indices range option
         elif (
@@ -622,9 +635,12 @@ def GetDrillholeData(
             and indexRange[0] >= 0
             and indexRange[1] >= indexRange[0]
         ):
-            for i in range(indexRange[0], indexRange[1]):
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((group.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(group, variableName),
+                indexRange[0],
+                min(indexRange[1], maxValidIndex),
+                asArray=asArray,
+            )
             response["value"] = data
         else:
             errStr = "Non-implemented filter option"
@@ -635,7 +651,7 @@ def GetDrillholeData(
 
 
 def GetDrillholeObservations(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetDrillholeData(
         root,
@@ -645,11 +661,12 @@ def GetDrillholeObservations(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
 def GetDrillholeSurveys(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetDrillholeData(
         root,
@@ -659,11 +676,12 @@ def GetDrillholeSurveys(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
 def GetDrillholeProperties(
-    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False
+    root, indexList=[], indexRange=(0, 0), keyword="", verbose=False, asArray=False
 ):
     return GetDrillholeData(
         root,
@@ -673,6 +691,7 @@ def GetDrillholeProperties(
         indexRange,
         keyword,
         verbose,
+        asArray=asArray,
     )
 
 
@@ -716,13 +735,11 @@ def SetDrillholeData(root, data, indexName, variableName, append=False, verbose=
         group = resp["value"]
 
     if group:
-        drillholeObservationsLocation = group.variables[variableName]
+        drillholeObservationsLocation = ColumnarLayout.GetTableVariable(group, variableName)
         index = 0
         if append:
-            index = group.dimensions[indexName].size
-        for i in data:
-            drillholeObservationsLocation[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(group, indexName)
+        index = LoopProjectFileUtils.WriteRecords(drillholeObservationsLocation, index, data, grow=append)
         group.setncattr(indexName + "_MaxValid", index)
     else:
         errStr = "(ERROR) Failed to Create drillhole group for drillhole setting"
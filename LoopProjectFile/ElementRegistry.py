@@ -0,0 +1,343 @@
+import numpy
+
+import LoopProjectFile.LoopProjectFileUtils as LoopProjectFileUtils
+import LoopProjectFile.ColumnarLayout as ColumnarLayout
+
+
+class ElementDefinition:
+    """
+    **ElementDefinition** - Describes an element of a Loop Project File: the
+    functions used to get and set it and, for elements stored as a table of
+    compound typed records, where and how the table is stored
+
+    Parameters
+    ----------
+    name: string
+        The name of the element as used by Get/Set
+    getter: function(root, **kwargs) or None
+        The function returning {"errorFlag", "errorString"/"value"} for Get
+    setter: function(root, **kwargs) or None
+        The function returning {"errorFlag", "errorString"} for Set
+    groupPath: tuple of strings
+        The names of the nested groups holding the table, from the root
+    variableName: string or None
+        The name of the netCDF variable holding the table
+    indexName: string or None
+        The name of the (unlimited) dimension indexing the table
+    compoundType: numpy.dtype or None
+        The numpy compound type of the records in the table
+    appendable: bool
+        Whether the setter accepts append=True (set as "<name>Append")
+    maxValidName: string or None
+        The group attribute holding the number of valid records
+        (defaults to indexName + "_MaxValid")
+
+    """
+
+    def __init__(
+        self,
+        name,
+        getter=None,
+        setter=None,
+        groupPath=(),
+        variableName=None,
+        indexName=None,
+        compoundType=None,
+        appendable=False,
+        maxValidName=None,
+    ):
+        self.name = name
+        self.getter = getter
+        self.setter = setter
+        self.groupPath = tuple(groupPath)
+        self.variableName = variableName
+        self.indexName = indexName
+        self.compoundType = compoundType
+        self.appendable = appendable
+        if maxValidName is None and indexName is not None:
+            maxValidName = indexName + "_MaxValid"
+        self.maxValidName = maxValidName
+
+    @property
+    def isTable(self):
+        return self.variableName is not None
+
+    def __repr__(self):
+        return f"ElementDefinition({self.name!r})"
+
+
+class ResolvedElement:
+    """
+    **ResolvedElement** - The netCDF group and variable of a table element in
+    an open Loop Project File, looked up once and reused for bulk access
+    """
+
+    def __init__(self, definition, group, variable):
+        self.definition = definition
+        self.group = group
+        self.variable = variable
+
+    def maxValid(self):
+        """
+        **maxValid** - The number of valid records in the table
+        """
+        return max(
+            0,
+            min(
+                self.group.dimensions[self.definition.indexName].size,
+                self.group.getncattr(self.definition.maxValidName),
+            ),
+        )
+
+    def read(self, start=0, stop=None):
+        """
+        **read** - Reads the valid records in [start, stop) with one slice
+
+        Returns
+        -------
+        numpy.ndarray
+            A structured array of the element's compound type
+
+        """
+        maxValid = self.maxValid()
+        stop = maxValid if stop is None else min(stop, maxValid)
+        start = min(max(0, start), stop)
+        return numpy.ma.getdata(self.variable[start:stop])
+
+    def _prepare(self, where, keyword, columns):
+        # Checks the query, builds its mask function and narrows a columnar
+        # table to the fields read
+        if where is not None:
+            LoopProjectFileUtils.CheckWhere(self.variable.dtype, where)
+        if columns is not None:
+            LoopProjectFileUtils.CheckColumns(self.variable.dtype, columns)
+
+        match = None
+        if where is not None or keyword != "":
+
+            def match(records):
+                mask = numpy.ones(len(records), dtype=bool)
+                if where is not None:
+                    mask &= LoopProjectFileUtils.WhereMask(records, where)
+                if keyword != "":
+                    mask &= LoopProjectFileUtils.KeywordMask(records, keyword)
+                return mask
+
+        variable = self.variable
+        if isinstance(variable, ColumnarLayout.ColumnarVariable) and columns is not None:
+            # Only read the variables of the fields returned or matched on
+            names = set(columns) | set(where or {})
+            if keyword != "":
+                names |= {name for name in variable.dtype.names if variable.dtype[name].kind == "S"}
+            variable = variable.narrow(names)
+        return variable, match
+
+    def _range(self, indexRange):
+        maxValid = self.maxValid()
+        if len(indexRange) == 2 and (indexRange[0] != 0 or indexRange[1] != 0):
+            return indexRange[0], min(indexRange[1], maxValid)
+        return 0, maxValid
+
+    def select(self, where=None, indexList=(), indexRange=(0, 0), keyword="", columns=None):
+        """
+        **select** - Reads the valid records matching every condition of where
+        (see LoopProjectFileUtils.WhereMask), scanning the table one chunk
+        aligned block at a time so only matching rows and the requested
+        columns are kept in memory
+
+        Parameters
+        ----------
+        where: dict {field: condition} or None
+            The conditions the records must match, None for all records
+        indexList: list of int
+            Only consider the records at these indices (in this order)
+        indexRange: (int, int)
+            Only consider the records in [start, stop), (0, 0) for all
+        keyword: string
+            Only keep records with a byte string field equal to keyword
+        columns: list of strings or None
+            The fields to return, None for all of them
+
+        Returns
+        -------
+        numpy.ndarray
+            A structured array of the matching records
+
+        Raises
+        ------
+        ValueError
+            if where or columns name an unknown field or operator
+
+        """
+        variable, match = self._prepare(where, keyword, columns)
+
+        if len(indexList) > 0:
+            records = LoopProjectFileUtils.ReadIndexedRecords(
+                variable, indexList, self.maxValid(), asArray=True
+            )
+            if match is not None:
+                records = records[match(records)]
+            if columns is not None:
+                records = LoopProjectFileUtils.ProjectRecords(records, columns)
+            return records
+        start, stop = self._range(indexRange)
+        return LoopProjectFileUtils.ReadMatching(
+            variable, start, stop, match, asArray=True, columns=columns
+        )
+
+    def iter(self, rows=None, where=None, indexRange=(0, 0), keyword="", columns=None):
+        """
+        **iter** - Iterates over the valid records (matching where) in blocks
+        of about rows records aligned to the HDF5 chunks of the table, so only
+        one block is in memory at a time
+
+        Parameters
+        ----------
+        rows: int or None
+            The number of records read per block (rounded to whole chunks),
+            defaults to LoopProjectFileUtils.blockRows
+        where, indexRange, keyword, columns:
+            The same selection options as select
+
+        Yields
+        ------
+        numpy.ndarray
+            A structured array of the (matching) records of each block
+
+        Raises
+        ------
+        ValueError
+            if where or columns name an unknown field or operator
+
+        """
+        variable, match = self._prepare(where, keyword, columns)
+        start, stop = self._range(indexRange)
+        for _, records in LoopProjectFileUtils.IterMatching(
+            variable, start, stop, match, columns, rows
+        ):
+            yield records
+
+    def write(self, data, append=False):
+        """
+        **write** - Writes records with one slice after the valid records (on
+        append, reusing dead capacity and growing the table geometrically) or
+        from the start of the table and updates the valid count once
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"}
+            errorString exist and contains error message only when errorFlag is
+            True
+
+        """
+        start = self.maxValid() if append else 0
+        stop = LoopProjectFileUtils.WriteRecords(self.variable, start, data, grow=append)
+        self.group.setncattr(self.definition.maxValidName, stop)
+        return {"errorFlag": False}
+
+
+_elements = {}
+
+
+def RegisterElement(name, getter=None, setter=None, replace=False, **kwargs):
+    """
+    **RegisterElement** - Adds an element to those available through
+    Get/Set, Session and ProjectFile
+
+    Examples
+    --------
+    >>> LoopProjectFile.RegisterElement(
+    >>>     "myLog", getter=GetMyLog, setter=SetMyLog, groupPath=("MyGroup",),
+    >>>     variableName="myLog", indexName="index", compoundType=myLogType)
+
+    Parameters
+    ----------
+    name: string
+        The name of the element as used by Get/Set
+    getter, setter: function(root, **kwargs) or None
+        The functions called by Get/Set with the open root group
+    replace: bool
+        Whether to replace an element already registered under name
+    kwargs: dict
+        The table description (see ElementDefinition)
+
+    Returns
+    -------
+    ElementDefinition
+
+    """
+    if name in _elements and not replace:
+        raise ValueError(f"Element '{name}' is already registered")
+    definition = ElementDefinition(name, getter, setter, **kwargs)
+    _elements[name] = definition
+    return definition
+
+
+def GetElementDefinition(name):
+    """
+    **GetElementDefinition** - The registered definition of element name
+
+    Returns
+    -------
+    ElementDefinition or None
+        None if no element is registered under name
+
+    """
+    return _elements.get(name)
+
+
+def GetSetterDefinition(name):
+    """
+    **GetSetterDefinition** - The registered definition for a Set element
+    name, resolving the "<name>Append" variants of appendable elements
+
+    Returns
+    -------
+    (ElementDefinition, bool) or (None, False)
+        The definition and whether the set appends
+
+    """
+    definition = _elements.get(name)
+    if definition is not None:
+        return definition, False
+    if name.endswith("Append"):
+        definition = _elements.get(name[: -len("Append")])
+        if definition is not None and definition.appendable:
+            return definition, True
+    return None, False
+
+
+def ElementNames():
+    """
+    **ElementNames** - The names of all registered elements
+    """
+    return list(_elements.keys())
+
+
+def ResolveElement(root, definition):
+    """
+    **ResolveElement** - Looks up the group and variable of a table element
+    in an open Loop Project File
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"/"value"}
+        value is a ResolvedElement
+
+    """
+    if not definition.isTable:
+        return {
+            "errorFlag": True,
+            "errorString": f"Element {definition.name} is not stored as a table",
+        }
+    node = root
+    for groupName in definition.groupPath:
+        if groupName not in node.groups:
+            errStr = "No " + groupName + " present in " + node.name + " for access request"
+            return {"errorFlag": True, "errorString": errStr}
+        node = node.groups[groupName]
+    variable = ColumnarLayout.GetTableVariable(node, definition.variableName)
+    if variable is None:
+        errStr = "No " + definition.variableName + " present in " + node.name
+        return {"errorFlag": True, "errorString": errStr}
+    return {"errorFlag": False, "value": ResolvedElement(definition, node, variable)}
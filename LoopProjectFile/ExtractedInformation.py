@@ -1,6 +1,7 @@
 # import netCDF4
 import LoopProjectFile
 import LoopProjectFile.LoopProjectFileUtils as LoopProjectFileUtils
+import LoopProjectFile.ColumnarLayout as ColumnarLayout
 
 
 
@@ -148,13 +149,11 @@ def SetEventLog(root, data, indexName, variableName, append=False, verbose=False
         elGroup = resp["value"]
 
     if elGroup:
-        eventLocation = elGroup.variables[variableName]
+        eventLocation = ColumnarLayout.GetTableVariable(elGroup, variableName)
         index = 0
         if append:
-            index = elGroup.dimensions[indexName].size
-        for i in data:
-            eventLocation[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(elGroup, indexName)
+        index = LoopProjectFileUtils.WriteRecords(eventLocation, index, data, grow=append)
         elGroup.setncattr(indexName + "_MaxValid", index)
     else:
         errStr = "(ERROR) Failed to create event log group"
@@ -185,7 +184,7 @@ def SetDiscontinuityLog(root, data, append=False, verbose=False):
 
 
 def GetEventLog(
-    root, indexName, variableName, indexList=[], indexRange=(0, 0), verbose=False
+    root, indexName, variableName, indexList=[], indexRange=(0, 0), verbose=False, asArray=False
 ):
     response = {"errorFlag": False}
     resp = GetEventLogGroup(root)
@@ -193,27 +192,27 @@ def GetEventLog(
         response = resp
     else:
         elGroup = resp["value"]
-        data = []
         maxValidIndex = min(
             elGroup.dimensions[indexName].size,
             elGroup.getncattr(indexName + "_MaxValid"),
         )
         # Select all option
         if (
-            indexList == []
+            len(indexList) == 0
             and len(indexRange) == 2
             and indexRange[0] == 0
             and indexRange[1] == 0
         ):
             # Select all
-            for i in range(0, maxValidIndex):
-                data.append((elGroup.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(elGroup, variableName), 0, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on list of indices option
-        elif indexList != []:
-            for i in indexList:
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((elGroup.variables.get(variableName)[i]))
+        elif len(indexList) > 0:
+            data = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(elGroup, variableName), indexList, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on indices range option
         elif (
@@ -221,9 +220,12 @@ def GetEventLog(
             and indexRange[0] >= 0
             and indexRange[1] >= indexRange[0]
         ):
-            for i in range(indexRange[0], indexRange[1]):
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((elGroup.variables.get(variableName)[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(elGroup, variableName),
+                indexRange[0],
+                min(indexRange[1], maxValidIndex),
+                asArray=asArray,
+            )
             response["value"] = data
         else:
             errStr = "Non-implemented filter option"
@@ -233,25 +235,25 @@ def GetEventLog(
     return response
 
 
-def GetFaultLog(root, indexList=[], indexRange=(0, 0), verbose=False):
+def GetFaultLog(root, indexList=[], indexRange=(0, 0), verbose=False, asArray=False):
     return GetEventLog(
-        root, "faultEventIndex", "faultEvents", indexList, indexRange, verbose
+        root, "faultEventIndex", "faultEvents", indexList, indexRange, verbose, asArray=asArray
     )
 
 
-def GetFoldLog(root, indexList=[], indexRange=(0, 0), verbose=False):
+def GetFoldLog(root, indexList=[], indexRange=(0, 0), verbose=False, asArray=False):
     return GetEventLog(
-        root, "foldEventIndex", "foldEvents", indexList, indexRange, verbose
+        root, "foldEventIndex", "foldEvents", indexList, indexRange, verbose, asArray=asArray
     )
 
 
-def GetFoliationLog(root, indexList=[], indexRange=(0, 0), verbose=False):
+def GetFoliationLog(root, indexList=[], indexRange=(0, 0), verbose=False, asArray=False):
     return GetEventLog(
-        root, "foliationEventIndex", "foliationEvents", indexList, indexRange, verbose
+        root, "foliationEventIndex", "foliationEvents", indexList, indexRange, verbose, asArray=asArray
     )
 
 
-def GetDiscontinuityLog(root, indexList=[], indexRange=(0, 0), verbose=False):
+def GetDiscontinuityLog(root, indexList=[], indexRange=(0, 0), verbose=False, asArray=False):
     return GetEventLog(
         root,
         "discontinuityEventIndex",
@@ -259,6 +261,7 @@ def GetDiscontinuityLog(root, indexList=[], indexRange=(0, 0), verbose=False):
         indexList,
         indexRange,
         verbose,
+        asArray=asArray,
     )
 
 
@@ -322,14 +325,12 @@ def SetStratigraphicLog(
         siGroup = resp["value"]
 
     if siGroup:
-        stratigraphicLayersLocation = siGroup.variables["stratigraphicLayers"]
+        stratigraphicLayersLocation = ColumnarLayout.GetTableVariable(siGroup, "stratigraphicLayers")
 
         index = 0
         if append:
-            index = siGroup.dimensions["index"].size
-        for i in data:
-            stratigraphicLayersLocation[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(siGroup, "index")
+        index = LoopProjectFileUtils.WriteRecords(stratigraphicLayersLocation, index, data, grow=append)
         siGroup.setncattr("index_MaxValid", index)
 
 
@@ -342,32 +343,35 @@ def SetStratigraphicLog(
     return response
 
 
-def GetStratigraphicLog(root, indexList=[], indexRange=(0, 0), verbose=False):
+def GetStratigraphicLog(root, indexList=[], indexRange=(0, 0), verbose=False, asArray=False):
     response = {"errorFlag": False}
     resp = GetStratigraphicInformationGroup(root)
     if resp["errorFlag"]:
         response = resp
     else:
         siGroup = resp["value"]
-        data = []
         maxValidIndex = min(siGroup.dimensions["index"].size, siGroup.getncattr("index_MaxValid"))
         # Select all option
-        if indexList == [] and len(indexRange) == 2 and indexRange[0] == 0 and indexRange[1] == 0:
+        if len(indexList) == 0 and len(indexRange) == 2 and indexRange[0] == 0 and indexRange[1] == 0:
             # Select all
-            for i in range(0, maxValidIndex):
-                data.append((siGroup.variables.get("stratigraphicLayers")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(siGroup, "stratigraphicLayers"), 0, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on list of indices option
-        elif indexList != []:
-            for i in indexList:
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((siGroup.variables.get("stratigraphicLayers")[i]))
+        elif len(indexList) > 0:
+            data = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(siGroup, "stratigraphicLayers"), indexList, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on indices range option
         elif len(indexRange) == 2 and indexRange[0] >= 0 and indexRange[1] >= indexRange[0]:
-            for i in range(indexRange[0], indexRange[1]):
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((siGroup.variables.get("stratigraphicLayers")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(siGroup, "stratigraphicLayers"),
+                indexRange[0],
+                min(indexRange[1], maxValidIndex),
+                asArray=asArray,
+            )
             response["value"] = data
         else:
             errStr = "Non-implemented filter option"
@@ -405,17 +409,15 @@ def SetStratigraphicThicknesses(root, data, headers=None,ncols=None,append=False
         stGroup = resp["value"]
 
     if stGroup:
-        stratigraphicThicknesses = stGroup.variables["stratigraphicThicknesses"]
+        stratigraphicThicknesses = ColumnarLayout.GetTableVariable(stGroup, "stratigraphicThicknesses")
         if headers:
             stGroup.setncattr("headers", headers)
         if ncols:
             stGroup.setncattr("ncols", ncols)
         index = 0
         if append:
-            index = stGroup.dimensions["index"].size
-        for i in data:
-            stratigraphicThicknesses[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(stGroup, "index")
+        index = LoopProjectFileUtils.WriteRecords(stratigraphicThicknesses, index, data, grow=append)
         stGroup.setncattr("index_MaxValid", index)
     else:
         errStr = "(ERROR) Failed to create stratigraphic log group for strata setting"
@@ -426,33 +428,36 @@ def SetStratigraphicThicknesses(root, data, headers=None,ncols=None,append=False
     return response
 
 
-def GetStratigraphicThicknesses(root, indexList=[], indexRange=(0, 0), verbose=False):
+def GetStratigraphicThicknesses(root, indexList=[], indexRange=(0, 0), verbose=False, asArray=False):
     response = {"errorFlag": False}
     resp = GetStratigraphicThicknessGroup(root)
     if resp["errorFlag"]:
         response = resp
     else:
         siGroup = resp["value"]
-        data = []
         maxValidIndex = min(siGroup.dimensions["index"].size, siGroup.getncattr("index_MaxValid"))
         # Select all option
         response['attributes'] = {a:siGroup.getncattr(a) for a in siGroup.ncattrs()}
-        if indexList == [] and len(indexRange) == 2 and indexRange[0] == 0 and indexRange[1] == 0:
+        if len(indexList) == 0 and len(indexRange) == 2 and indexRange[0] == 0 and indexRange[1] == 0:
             # Select all
-            for i in range(0, maxValidIndex):
-                data.append((siGroup.variables.get("stratigraphicThicknesses")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(siGroup, "stratigraphicThicknesses"), 0, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on list of indices option
-        elif indexList != []:
-            for i in indexList:
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((siGroup.variables.get("stratigraphicThicknesses")[i]))
+        elif len(indexList) > 0:
+            data = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(siGroup, "stratigraphicThicknesses"), indexList, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on indices range option
         elif len(indexRange) == 2 and indexRange[0] >= 0 and indexRange[1] >= indexRange[0]:
-            for i in range(indexRange[0], indexRange[1]):
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((siGroup.variables.get("stratigraphicThicknesses")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(siGroup, "stratigraphicThicknesses"),
+                indexRange[0],
+                min(indexRange[1], maxValidIndex),
+                asArray=asArray,
+            )
             response["value"] = data
         else:
             errStr = "Non-implemented filter option"
@@ -513,13 +518,11 @@ def SetDrillholeLog(root, data, append=False, verbose=False):
         diGroup = resp["value"]
 
     if diGroup:
-        drillholeDescriptionsLocation = diGroup.variables["drillholeDescriptions"]
+        drillholeDescriptionsLocation = ColumnarLayout.GetTableVariable(diGroup, "drillholeDescriptions")
         index = 0
         if append:
-            index = diGroup.dimensions["index"].size
-        for i in data:
-            drillholeDescriptionsLocation[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(diGroup, "index")
+        index = LoopProjectFileUtils.WriteRecords(drillholeDescriptionsLocation, index, data, grow=append)
         diGroup.setncattr("index_MaxValid", index)
     else:
         errStr = "(ERROR) Failed to create drillhole description log group for setting drillhole data"
@@ -529,33 +532,33 @@ def SetDrillholeLog(root, data, append=False, verbose=False):
     return response
 
 
-def GetDrillholeLog(root, indexList=[], indexRange=(0, 0), verbose=False):
+def GetDrillholeLog(root, indexList=[], indexRange=(0, 0), verbose=False, asArray=False):
     response = {"errorFlag": False}
     resp = GetDrillholeDescriptionGroup(root)
     if resp["errorFlag"]:
         response = resp
     else:
         diGroup = resp["value"]
-        data = []
         maxValidIndex = min(
             diGroup.dimensions["index"].size, diGroup.getncattr("index_MaxValid")
         )
         # Select all option
         if (
-            indexList == []
+            len(indexList) == 0
             and len(indexRange) == 2
             and indexRange[0] == 0
             and indexRange[1] == 0
         ):
             # Select all
-            for i in range(0, maxValidIndex):
-                data.append((diGroup.variables.get("drillholeDescriptions")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(diGroup, "drillholeDescriptions"), 0, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on list of indices option
-        elif indexList != []:
-            for i in indexList:
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((diGroup.variables.get("drillholeDescriptions")[i]))
+        elif len(indexList) > 0:
+            data = LoopProjectFileUtils.ReadIndexedRecords(
+                ColumnarLayout.GetTableVariable(diGroup, "drillholeDescriptions"), indexList, maxValidIndex, asArray=asArray
+            )
             response["value"] = data
         # Select based on indices range option
         elif (
@@ -563,9 +566,12 @@ def GetDrillholeLog(root, indexList=[], indexRange=(0, 0), verbose=False):
             and indexRange[0] >= 0
             and indexRange[1] >= indexRange[0]
         ):
-            for i in range(indexRange[0], indexRange[1]):
-                if int(i) >= 0 and int(i) < maxValidIndex:
-                    data.append((diGroup.variables.get("drillholeDescriptions")[i]))
+            data = LoopProjectFileUtils.ReadRecords(
+                ColumnarLayout.GetTableVariable(diGroup, "drillholeDescriptions"),
+                indexRange[0],
+                min(indexRange[1], maxValidIndex),
+                asArray=asArray,
+            )
             response["value"] = data
         else:
             errStr = "Non-implemented filter option"
@@ -603,13 +609,11 @@ def SetEventRelationships(root, data, append=False, verbose=False):
         erGroup = resp["value"]
 
     if erGroup:
-        eventRelationshipsLocation = erGroup.variables["eventRelationships"]
+        eventRelationshipsLocation = ColumnarLayout.GetTableVariable(erGroup, "eventRelationships")
         index = 0
         if append:
-            index = erGroup.dimensions["index"].size
-        for i in data:
-            eventRelationshipsLocation[index] = i
-            index += 1
+            index = LoopProjectFileUtils.ValidCount(erGroup, "index")
+        index = LoopProjectFileUtils.WriteRecords(eventRelationshipsLocation, index, data, grow=append)
         erGroup.setncattr("index_MaxValid", index)
     else:
         errStr = "(ERROR) Failed to create event relationships group for event links"
@@ -619,7 +623,7 @@ def SetEventRelationships(root, data, append=False, verbose=False):
     return response
 
 
-def GetEventRelationships(root, verbose=False):
+def GetEventRelationships(root, verbose=False, asArray=False):
     response = {"errorFlag": False}
     resp = GetEventRelationshipsGroup(root)
     if resp["errorFlag"]:
@@ -629,8 +633,8 @@ def GetEventRelationships(root, verbose=False):
         maxValidIndex = min(
             erGroup.dimensions["index"].size, erGroup.getncattr("index_MaxValid")
         )
-        data = []
-        for i in range(0, maxValidIndex):
-            data.append((erGroup.variables.get("eventRelationships")[i]))
+        data = LoopProjectFileUtils.ReadRecords(
+            ColumnarLayout.GetTableVariable(erGroup, "eventRelationships"), 0, maxValidIndex, asArray=asArray
+        )
         response["value"] = data
     return response
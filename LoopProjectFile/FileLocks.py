@@ -0,0 +1,186 @@
+"""
+Process wide locks around the netCDF access to Loop Project Files
+
+Each file on disk has a ReadWriteLock so that a writer never runs while
+another thread reads or writes the same file, including across the several
+library calls of an iteration or a Session. The locks keep accesses
+consistent; they do not make reads run in parallel. netCDF-C is not
+thread-safe (whatever the HDF5 build) and netCDF4 does not report a
+thread-safe build, so every netCDF call made under a file lock also takes
+one process wide library lock, and reads of different elements or files
+still run one at a time. Only the work done outside the locks, such as
+converting the records read into dataframes, overlaps across threads.
+"""
+import contextlib
+import os
+import threading
+import weakref
+
+
+class ReadWriteLock:
+    """
+    **ReadWriteLock** - A reentrant lock shared by any number of reading
+    threads or held exclusively by one writing thread (the library lock
+    still runs the netCDF calls of the readers one at a time)
+
+    Waiting writers block new readers so writes are not starved. A thread
+    holding the write lock may also read; a thread holding only a read lock
+    cannot upgrade it to a write lock.
+
+    Like the library lock, it is owned by the thread that acquired it and
+    must be released by that same thread, so it must never be held across a
+    suspension point (a generator yield or an await) that may resume on
+    another thread. Releasing it from a thread that does not hold it raises
+    a RuntimeError.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}
+        self._writer = None
+        self._writerCount = 0
+        self._waitingWriters = 0
+
+    def acquireRead(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me and me not in self._readers:
+                while self._writer is not None or self._waitingWriters:
+                    self._cond.wait()
+            self._readers[me] = self._readers.get(me, 0) + 1
+
+    def releaseRead(self):
+        me = threading.get_ident()
+        with self._cond:
+            if me not in self._readers:
+                raise RuntimeError(
+                    "Cannot release a read lock not held by this thread"
+                    " (file locks must not be held across a yield or await)"
+                )
+            count = self._readers[me] - 1
+            if count:
+                self._readers[me] = count
+            else:
+                del self._readers[me]
+                self._cond.notify_all()
+
+    def acquireWrite(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writerCount += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+            self._waitingWriters += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waitingWriters -= 1
+            self._writer = me
+            self._writerCount = 1
+
+    def releaseWrite(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError(
+                    "Cannot release a write lock not held by this thread"
+                    " (file locks must not be held across a yield or await)"
+                )
+            self._writerCount -= 1
+            if not self._writerCount:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def reading(self):
+        self.acquireRead()
+        try:
+            yield self
+        finally:
+            self.releaseRead()
+
+    @contextlib.contextmanager
+    def writing(self):
+        self.acquireWrite()
+        try:
+            yield self
+        finally:
+            self.releaseWrite()
+
+
+_fileLocks = weakref.WeakValueDictionary()
+_fileLocksLock = threading.Lock()
+
+# netCDF-C is not thread-safe, so every netCDF call made under a file lock is
+# serialized process wide. Only set this for a netCDF-C known to be built
+# thread-safe, no such build is detectable from netCDF4
+threadSafeLibrary = False
+_libraryLock = threading.RLock()
+
+
+def LibraryLock():
+    """
+    **LibraryLock** - A context serializing netCDF library calls across
+    threads unless threadSafeLibrary is True
+
+    The lock is owned by the thread that acquired it, so like the file locks
+    it must not be held across a yield or await.
+    """
+    if threadSafeLibrary:
+        return contextlib.nullcontext()
+    return _libraryLock
+
+
+@contextlib.contextmanager
+def _FileAndLibrary(fileLock):
+    # The file lock is always taken before the library lock
+    with fileLock, LibraryLock():
+        yield
+
+
+def GetFileLock(filename):
+    """
+    **GetFileLock** - The process wide ReadWriteLock of a file on disk,
+    shared by every Get/Set, Session, Batch and ProjectFile access to it
+
+    Parameters
+    ----------
+    filename: string
+        The name of the file
+
+    Returns
+    -------
+    ReadWriteLock
+
+    """
+    key = os.path.abspath(filename)
+    with _fileLocksLock:
+        lock = _fileLocks.get(key)
+        if lock is None:
+            lock = ReadWriteLock()
+            _fileLocks[key] = lock
+        return lock
+
+
+def ReadingFile(filename):
+    """
+    **ReadingFile** - A context holding the read lock of filename and the
+    library lock (buffers and other in memory contents are private to the
+    caller so only take the library lock)
+    """
+    if not isinstance(filename, str):
+        return LibraryLock()
+    return _FileAndLibrary(GetFileLock(filename).reading())
+
+
+def WritingFile(filename):
+    """
+    **WritingFile** - A context holding the write lock of filename and the
+    library lock (buffers and other in memory contents are private to the
+    caller so only take the library lock)
+    """
+    if not isinstance(filename, str):
+        return LibraryLock()
+    return _FileAndLibrary(GetFileLock(filename).writing())
@@ -0,0 +1,253 @@
+import collections
+import contextlib
+import os
+import sys
+import threading
+import weakref
+
+import LoopProjectFile
+from LoopProjectFile.FileLocks import LibraryLock
+
+
+class PooledHandle:
+    def __init__(self, root, readOnly, stamp):
+        self.root = root
+        self.readOnly = readOnly
+        self.stamp = stamp
+        self.pins = 0
+        # netCDF handles are not safe to use from several threads at once
+        self.lock = threading.RLock()
+
+
+def FileStamp(filename):
+    """
+    **FileStamp** - The modification time and size of a file used to detect
+    changes made through other handles
+
+    Returns
+    -------
+    (int, int) or None
+        None if the file does not exist
+
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class HandlePool:
+    """
+    **HandlePool** - A bounded pool of open Loop Project Files keyed by path
+    which keeps recently used files open between Get/Set calls
+
+    Handles are reopened when the file's modification time or size changes,
+    pinned while borrowed and the least recently used unpinned handle is
+    closed when more than maxHandles files are open. A handle is used by one
+    thread at a time; other threads borrowing it wait for it.
+
+    HDF5 refuses to open a file for writing while another handle has it
+    open, so Set, Upsert and Sessions opened for writing first close the
+    unpinned handles of the file in every pool (see ReleaseFile). Other
+    processes cannot write to a file while a pool holds it open.
+
+    Examples
+    --------
+    >>> pool = LoopProjectFile.GetHandlePool()
+    >>> resp = LoopProjectFile.Get("test.loop3d", "faultLog", pool=pool)
+    >>> with pool.borrow("test.loop3d") as fileResp:
+    >>>     if not fileResp["errorFlag"]:
+    >>>         resp = LoopProjectFile.GetElement(fileResp["root"], "faultLog")
+
+    Parameters
+    ----------
+    maxHandles: int
+        The maximum number of unpinned files to keep open
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    """
+
+    def __init__(self, maxHandles=8, verbose=False):
+        if maxHandles < 1:
+            raise ValueError("maxHandles must be at least 1")
+        self.maxHandles = maxHandles
+        self.verbose = verbose
+        self._handles = collections.OrderedDict()
+        self._lock = threading.RLock()
+        _pools.add(self)
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __contains__(self, filename):
+        return os.path.abspath(filename) in self._handles
+
+    def _pop(self, key):
+        # Only the pool's bookkeeping changes under self._lock, the popped
+        # handles are closed by _closeEntries once it is released
+        return [(key, self._handles.pop(key))]
+
+    def _popEvictable(self, maxHandles):
+        popped = []
+        for key in [k for k, e in self._handles.items() if e.pins == 0]:
+            if len(self._handles) <= maxHandles:
+                break
+            popped += self._pop(key)
+        return popped
+
+    def _closeEntries(self, popped):
+        # The library lock is always taken before the pool's lock (Get holds
+        # it while borrowing) so this is called either without self._lock
+        # held or with the library lock already held
+        for key, entry in popped:
+            if self.verbose:
+                print(f"Closing pooled file: {key}", file=sys.stderr)
+            with LibraryLock():
+                entry.root.close()
+
+    @contextlib.contextmanager
+    def borrow(self, filename, readOnly=True):
+        """
+        **borrow** - Pins an open handle of filename for the length of a with
+        block, opening (or reopening on change) the file as needed
+
+        Parameters
+        ----------
+        filename: string
+            The name of the file to open
+        readOnly: bool
+            Whether the handle is only read from (True) or written to (False)
+
+        Yields
+        ------
+        dict {"errorFlag", "errorString"/"root"}
+            The response of OpenProjectFile for the pooled handle
+
+        """
+        key = os.path.abspath(filename)
+        popped = []
+        # Opening the file is a library call, so the library lock is taken
+        # first as in Get
+        with LibraryLock():
+            with self._lock:
+                stamp = FileStamp(key)
+                entry = self._handles.get(key)
+                if entry is not None and entry.pins == 0:
+                    if entry.stamp != stamp or (entry.readOnly and not readOnly):
+                        popped += self._pop(key)
+                        entry = None
+                if entry is not None and entry.readOnly and not readOnly:
+                    errStr = f"(ERROR) File {filename} is borrowed read only"
+                    print(errStr, file=sys.stderr)
+                    fileResp = {"errorFlag": True, "errorString": errStr}
+                    entry = None
+                elif entry is None:
+                    popped += self._popEvictable(self.maxHandles - 1)
+                    # The stale handle is closed before the file is reopened,
+                    # the library lock is already held so no lock is awaited
+                    self._closeEntries(popped)
+                    fileResp = LoopProjectFile.OpenProjectFile(
+                        filename, readOnly=readOnly, verbose=self.verbose
+                    )
+                    if not fileResp["errorFlag"]:
+                        entry = PooledHandle(fileResp["root"], readOnly, stamp)
+                        self._handles[key] = entry
+                else:
+                    fileResp = {"errorFlag": False, "root": entry.root}
+                if entry is not None:
+                    entry.pins += 1
+                    self._handles.move_to_end(key)
+        if entry is not None:
+            entry.lock.acquire()
+        try:
+            yield fileResp
+        finally:
+            if entry is not None:
+                stamp = entry.stamp
+                if not readOnly:
+                    # Flush so the new stamp matches what is on disk
+                    with LibraryLock():
+                        entry.root.sync()
+                    stamp = FileStamp(key)
+                with self._lock:
+                    entry.stamp = stamp
+                    entry.lock.release()
+                    entry.pins -= 1
+                    popped = self._popEvictable(self.maxHandles)
+                self._closeEntries(popped)
+
+    def release(self, filename):
+        """
+        **release** - Closes the pooled handle of filename if it is not pinned
+
+        Returns
+        -------
+        bool
+            True if no handle for filename remains open
+
+        """
+        key = os.path.abspath(filename)
+        popped = []
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is not None and entry.pins == 0:
+                popped = self._pop(key)
+                entry = None
+        self._closeEntries(popped)
+        return entry is None
+
+    def closeAll(self):
+        """
+        **closeAll** - Closes every unpinned handle in the pool
+        """
+        with self._lock:
+            popped = self._popEvictable(0)
+        self._closeEntries(popped)
+
+
+# Every live pool, so that writers can close the pooled handles of a file
+_pools = weakref.WeakSet()
+
+_handlePool = HandlePool()
+
+
+def ReleaseFile(filename, keep=None):
+    """
+    **ReleaseFile** - Closes the unpinned handles of filename in every pool
+    (but keep) so that the file can be opened for writing
+
+    Parameters
+    ----------
+    filename: string
+        The name of the file
+    keep: HandlePool or None
+        A pool whose handle is left open, such as the pool a write borrows
+        its handle from
+
+    Returns
+    -------
+    bool
+        True if no other pool still has the file open (a pinned handle is
+        being used by another thread)
+
+    """
+    released = True
+    for pool in list(_pools):
+        if pool is not keep:
+            released = pool.release(filename) and released
+    return released
+
+
+def GetHandlePool():
+    """
+    **GetHandlePool** - The process wide HandlePool shared by callers that do
+    not manage their own pool
+
+    Returns
+    -------
+    HandlePool
+
+    """
+    return _handlePool
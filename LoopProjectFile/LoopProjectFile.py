@@ -35,6 +35,8 @@ import pandas
 import sys
 import os
 import enum
+import shutil
+import tempfile
 
 import netCDF4
 import LoopProjectFile.Version as Version
@@ -44,6 +46,11 @@ import LoopProjectFile.DataCollection as DataCollection
 import LoopProjectFile.ExtractedInformation as ExtractedInformation
 import LoopProjectFile.GeophysicalModels as GeophysicalModels
 import LoopProjectFile.ProbabilityModels as ProbabilityModels
+import LoopProjectFile.ElementRegistry as ElementRegistry
+import LoopProjectFile.FileLocks as FileLocks
+import LoopProjectFile.LoopProjectFileUtils as LoopProjectFileUtils
+import LoopProjectFile.ColumnarLayout as ColumnarLayout
+from LoopProjectFile.HandlePool import ReleaseFile
 
 
 class EventType(enum.IntEnum):
@@ -87,21 +94,114 @@ def CreateBasic(filename):
         print(errStr)
         response = {"errorFlag": True, "errorString": errStr}
     else:
-        rootGroup = netCDF4.Dataset(filename, "w", format="NETCDF4")
-        response = Version.SetVersion(rootGroup, version=Version.LoopVersion())
-        if not response["errorFlag"]:
-            response = DataCollection.SetDefaultSources(rootGroup)
-        if not response["errorFlag"]:
-            response = DataCollection.SetDefaultRawSourceData(rootGroup)
-        if not response["errorFlag"]:
-            response = DataCollection.SetDefaultConfiguration(rootGroup)
-        if not response["errorFlag"]:
-            response = StructuralModels.SetDefaultConfiguration(rootGroup)
-        rootGroup.close()
+        with FileLocks.WritingFile(filename):
+            rootGroup = netCDF4.Dataset(filename, "w", format="NETCDF4")
+            response = SetBasicStructure(rootGroup)
+            rootGroup.close()
     return response
 
 
+# Add the version and default settings of a basic loop project file
+def SetBasicStructure(rootGroup):
+    """
+    **SetBasicStructure** - Saves the version and default data collection and
+    structural model settings of a basic Loop Project File into a newly
+    created netCDF root node
+
+    Parameters
+    ----------
+    rootGroup: netCDF4.Dataset
+        The root group node of a new Loop Project File
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    response = Version.SetVersion(rootGroup, version=Version.LoopVersion())
+    if not response["errorFlag"]:
+        response = DataCollection.SetDefaultSources(rootGroup)
+    if not response["errorFlag"]:
+        response = DataCollection.SetDefaultRawSourceData(rootGroup)
+    if not response["errorFlag"]:
+        response = DataCollection.SetDefaultConfiguration(rootGroup)
+    if not response["errorFlag"]:
+        response = StructuralModels.SetDefaultConfiguration(rootGroup)
+    return response
+
+
+# Create a basic loop project file held in memory
+def CreateInMemory(verbose=False):
+    """
+    **CreateInMemory** - Creates a basic Loop Project File held in memory
+    rather than on disk which can be written to disk once with persist
+
+    Examples
+    --------
+    >>> project = LoopProjectFile.CreateInMemory()
+    >>> LoopProjectFile.Set(project, "extents", **extents)
+    >>> LoopProjectFile.Set(project, "faultLog", data=faultLog)
+    >>> resp = project.persist("test.loop3d")
+
+    Parameters
+    ----------
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    Returns
+    -------
+    MemorySession
+        An open session on the in memory project which Get/Set accept in
+        place of a filename
+
+    """
+    return MemorySession(verbose=verbose)
+
+
 # Open project file with error checking for file existing and of netCDF format
+def IsFileBuffer(filename):
+    """
+    **IsFileBuffer** - Whether filename is the contents of a Loop Project File
+    (bytes or a file-like object) rather than the name of a file on disk
+    """
+    return isinstance(filename, (bytes, bytearray, memoryview)) or hasattr(
+        filename, "read"
+    )
+
+
+def ReadFileBuffer(filename):
+    """
+    **ReadFileBuffer** - Reads the contents of a bytes buffer or file-like
+    object, rewinding file-like objects so they can be read again (saved)
+
+    Returns
+    -------
+    bytes
+        The contents of the Loop Project File
+
+    """
+    if hasattr(filename, "read"):
+        position = filename.tell() if hasattr(filename, "tell") else None
+        data = filename.read()
+        if position is not None:
+            filename.seek(position)
+        return bytes(data)
+    return bytes(filename)
+
+
+def FileDisplayName(filename):
+    """
+    **FileDisplayName** - The name used in messages about filename, which for
+    buffers is the name of the uploaded or opened file when it has one
+    """
+    if IsFileBuffer(filename):
+        name = getattr(filename, "filename", None) or getattr(filename, "name", None)
+        return str(name) if name else "<in memory Loop Project File>"
+    return str(filename)
+
+
 def OpenProjectFile(filename, readOnly=True, verbose=False):
     """
     **OpenProjectFile** - Open a Loop Project File and checks it exists and is a
@@ -109,8 +209,9 @@ def OpenProjectFile(filename, readOnly=True, verbose=False):
 
     Parameters
     ----------
-    filename: string
-        The name of the file to open
+    filename: string, bytes or file-like object
+        The name of the file to open or its contents which are opened in
+        memory (read only)
     readOnly: bool
         Whether to open the file without data entry or not (True - read only,
         False - writable)
@@ -122,6 +223,9 @@ def OpenProjectFile(filename, readOnly=True, verbose=False):
         True
 
     """
+    if IsFileBuffer(filename):
+        return OpenProjectBuffer(filename, readOnly=readOnly, verbose=verbose)
+
     if verbose:
         print(f"Accessing file named: {filename}", file=sys.stderr)
 
@@ -150,9 +254,49 @@ def OpenProjectFile(filename, readOnly=True, verbose=False):
         return {"errorFlag": True, "errorString": str(e)}
 
 
+def OpenProjectBuffer(buffer, readOnly=True, verbose=False):
+    """
+    **OpenProjectBuffer** - Open the contents of a Loop Project File held in
+    memory (such as an upload) without writing it to disk
+
+    Parameters
+    ----------
+    buffer: bytes or file-like object
+        The contents of the Loop Project File
+    readOnly: bool
+        Must be True as netCDF can only open memory buffers read only
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    name = FileDisplayName(buffer)
+    if verbose:
+        print(f"Accessing in memory file: {name}", file=sys.stderr)
+    if not readOnly:
+        errStr = f"In memory file {name} can only be opened read only"
+        print(errStr, file=sys.stderr)
+        return {"errorFlag": True, "errorString": errStr}
+    try:
+        data = ReadFileBuffer(buffer)
+    except Exception as e:
+        return {"errorFlag": True, "errorString": str(e)}
+    try:
+        rootgrp = netCDF4.Dataset(name, "r", memory=data)
+        if verbose:
+            print(f"NetCDF data model type: {rootgrp.data_model}", file=sys.stderr)
+        return {"errorFlag": False, "root": rootgrp}
+    except Exception as e:
+        print(f"Error occurred while opening file {name}: {e}", file=sys.stderr)
+        return {"errorFlag": True, "errorString": str(e)}
+
+
 # Accessor Function handling opening and closing of file and calling
 # appropriate setter function
-def Set(filename, element, **kwargs):
+def Set(filename, element, pool=None, **kwargs):
     """
     **Set** - The core set function for interacting with a Loop Project File
     Can set with element and kwargs:
@@ -200,13 +344,22 @@ def Set(filename, element, **kwargs):
     >>> resp = LoopProjectFile.Set("test.loop3d", "observations", data=data, append=False, verbose=True)
     >>> if resp["errorFlag"]: print resp["errorString"])
 
+    For storing a table element with one variable per field, so reading a
+    few fields of it does not decompress the others:
+    >>> LoopProjectFile.Set("test.loop3d", "faultObservations", data=data, layout="columnar")
+    >>> LoopProjectFile.Set("test.loop3d", "faultObservations", layout="compound")
+
 
     Parameters
     ----------
-    filename: string
-        The name of the file to save data to
+    filename: string or Session
+        The name of the file to save data to or an open Session (such as an
+        in memory project) to save it through
     element: string
         The name of the element to save
+    pool: HandlePool or None
+        A pool to borrow an open handle of the file from instead of opening
+        and closing the file for this call
     kwargs: dict
         A dictionary contains the elements to save
 
@@ -222,124 +375,39 @@ def Set(filename, element, **kwargs):
     else:
         verbose = False
 
-    fileResp = OpenProjectFile(filename, readOnly=False, verbose=verbose)
-    if fileResp["errorFlag"]:
-        response = fileResp
-    else:
-        root = fileResp["root"]
-        try:
-            if element == "version":
-                response = Version.SetVersion(root, **kwargs)
-            elif element == "extents":
-                response = Extents.SetExtents(root, **kwargs)
-            elif element == "strModel":
-                response = StructuralModels.SetStructuralModel(root, **kwargs)
-            elif element == "faultObservations":
-                response = DataCollection.SetFaultObservations(root, **kwargs)
-            elif element == "faultObservationsAppend":
-                response = DataCollection.SetFaultObservations(root, append=True, **kwargs)
-            elif element == "foldObservations":
-                response = DataCollection.SetFoldObservations(root, **kwargs)
-            elif element == "foldObservationsAppend":
-                response = DataCollection.SetFoldObservations(root, append=True, **kwargs)
-            elif element == "foliationObservations":
-                response = DataCollection.SetFoliationObservations(root, **kwargs)
-            elif element == "foliationObservationsAppend":
-                response = DataCollection.SetFoliationObservations(
-                    root, append=True, **kwargs
-                )
-            elif element == "discontinuityObservations":
-                response = DataCollection.SetDiscontinuityObservations(root, **kwargs)
-            elif element == "discontinuityObservationsAppend":
-                response = DataCollection.SetDiscontinuityObservations(
-                    root, append=True, **kwargs
-                )
-            elif element == "stratigraphicObservations":
-                response = DataCollection.SetStratigraphicObservations(root, **kwargs)
-            elif element == "stratigraphicObservationsAppend":
-                response = DataCollection.SetStratigraphicObservations(
-                    root, append=True, **kwargs
-                )
-            elif element == "contacts":
-                response = DataCollection.SetContacts(root, **kwargs)
-            elif element == "contactsAppend":
-                response = DataCollection.SetContacts(root, append=True, **kwargs)
-            elif element == "drillholeObservations":
-                response = DataCollection.SetDrillholeObservations(root, **kwargs)
-            elif element == "drillholeObservationsAppend":
-                response = DataCollection.SetDrillholeObservations(
-                    root, append=True, **kwargs
-                )
-            elif element == "drillholeSurveys":
-                response = DataCollection.SetDrillholeSurveys(root, **kwargs)
-            elif element == "drillholeSurveysAppend":
-                response = DataCollection.SetDrillholeSurveys(root, append=True, **kwargs)
-            elif element == "drillholeProperties":
-                response = DataCollection.SetDrillholeProperties(root, **kwargs)
-            elif element == "drillholePropertiesAppend":
-                response = DataCollection.SetDrillholeProperties(
-                    root, append=True, **kwargs
-                )
-            elif element == "stratigraphicLog":
-                response = ExtractedInformation.SetStratigraphicLog(root, **kwargs)
-            elif element == "stratigraphicLogAppend":
-                response = ExtractedInformation.SetStratigraphicLog(
-                    root, append=True, **kwargs
-                )
-            elif element == "stratigraphicThicknesses":
-                response = ExtractedInformation.SetStratigraphicThicknesses(root, **kwargs)
-            elif element == "stratigraphicThicknessCalculatorLabels":
-                response = ExtractedInformation.SetStratigraphicThicknessCalculatorLabels(root, **kwargs)
-                
-                
-            elif element == "faultLog":
-                response = ExtractedInformation.SetFaultLog(root, **kwargs)
-            elif element == "faultLogAppend":
-                response = ExtractedInformation.SetFaultLog(root, append=True, **kwargs)
-            elif element == "foldLog":
-                response = ExtractedInformation.SetFoldLog(root, **kwargs)
-            elif element == "foldLogAppend":
-                response = ExtractedInformation.SetFoldLog(root, append=True, **kwargs)
-            elif element == "foliationLog":
-                response = ExtractedInformation.SetFoliationLog(root, **kwargs)
-            elif element == "foliationLogAppend":
-                response = ExtractedInformation.SetFoliationLog(root, append=True, **kwargs)
-            elif element == "discontinuityLog":
-                response = ExtractedInformation.SetDiscontinuityLog(root, **kwargs)
-            elif element == "discontinuityLogAppend":
-                response = ExtractedInformation.SetDiscontinuityLog(
-                    root, append=True, **kwargs
-                )
-            elif element == "drillholeLog":
-                response = ExtractedInformation.SetDrillholeLog(root, **kwargs)
-            elif element == "drillholeLogAppend":
-                response = ExtractedInformation.SetDrillholeLog(root, append=True, **kwargs)
-            elif element == "dataCollectionConfig":
-                response = DataCollection.SetConfiguration(root, **kwargs)
-            elif element == "dataCollectionSources":
-                response = DataCollection.SetSources(root, **kwargs)
-            elif element == "dataCollectionRawSourceData":
-                response = DataCollection.SetRawSourceData(root, **kwargs)
-            elif element == "eventRelationships":
-                response = ExtractedInformation.SetEventRelationships(root, **kwargs)
-            elif element == "structuralModelsConfig":
-                response = StructuralModels.SetConfiguration(root, **kwargs)
-            else:
-                errStr = "(ERROR) Unknown element for Set function '" + element + "'"
-                print(errStr)
-                response = {"errorFlag": True, "errorString": errStr}
-        finally:
-            if (verbose):
-                print(f"Closing file: {filename}",file=sys.stderr)
-            root.close()
-            if (verbose):
-                print(f"{filename} closed successfully",file=sys.stderr)
-    return response
+    if isinstance(filename, Session):
+        return filename.Set(element, **kwargs)
+
+    # Writers get exclusive access to the file within this process
+    with FileLocks.WritingFile(filename):
+        # HDF5 will not open the file for writing while a pool has it open
+        if isinstance(filename, str):
+            ReleaseFile(filename, keep=pool)
+        if pool is not None:
+            with pool.borrow(filename, readOnly=False) as fileResp:
+                if fileResp["errorFlag"]:
+                    return fileResp
+                return SetElement(fileResp["root"], element, **kwargs)
+
+        fileResp = OpenProjectFile(filename, readOnly=False, verbose=verbose)
+        if fileResp["errorFlag"]:
+            response = fileResp
+        else:
+            root = fileResp["root"]
+            try:
+                response = SetElement(root, element, **kwargs)
+            finally:
+                if (verbose):
+                    print(f"Closing file: {FileDisplayName(filename)}",file=sys.stderr)
+                root.close()
+                if (verbose):
+                    print(f"{filename} closed successfully",file=sys.stderr)
+        return response
 
 
 # Accessor Function handling opening and closing of file and calling
 # appropriate getter function
-def Get(filename, element, **kwargs):
+def Get(filename, element, pool=None, **kwargs):
     """
     **Get** - The core getter function for interacting with a Loop Project File
     Can get data elements which returns a "value" of type:
@@ -364,6 +432,26 @@ def Get(filename, element, **kwargs):
     >>> if resp["errorFlag"]: print(resp["errorString"])
     >>> else: data = resp["value"]
 
+    For extracting a table element as one structured array rather than a
+    list of records:
+    >>> resp = LoopProjectFile.Get("test.loop3d", "faultObservations", asArray=True)
+    >>> if resp["errorFlag"]: print(resp["errorString"])
+    >>> else: eastings = resp["value"]["easting"]
+
+    For extracting only the records of a table element matching a query,
+    evaluated block by block in the file so non matching records are never
+    kept (a value for equality, a list for membership or an (operator,
+    value) tuple with operator one of ==, !=, <, <=, >, >=, in, not in):
+    >>> resp = LoopProjectFile.Get("test.loop3d", "faultObservations",
+    >>>                            where={"eventId": [3, 7], "posOnly": 1, "dip": (">", 60)})
+    >>> if resp["errorFlag"]: print(resp["errorString"])
+    >>> else: data = resp["value"]
+
+    For extracting only some fields of a table element (the other fields
+    are dropped block by block as they are read and never decoded):
+    >>> resp = LoopProjectFile.Get("test.loop3d", "foldObservations",
+    >>>                            columns=["easting", "northing", "altitude", "eventId"])
+
     For extracting the extents:
     >>> resp = LoopProjectFile.Get("test.loop3d", "extents")
     >>> if resp["errorFlag"]: print(resp["errorString"])
@@ -377,10 +465,14 @@ def Get(filename, element, **kwargs):
 
     Parameters
     ----------
-    filename: string
-        The name of the file to load data from
+    filename: string, bytes, file-like object or Session
+        The name of the file to load data from, its contents or an open
+        Session (such as an in memory project) to load it through
     element: string
         The name of the element to extract
+    pool: HandlePool or None
+        A pool to borrow an open handle of the file from instead of opening
+        and closing the file for this call
     kwargs: dict
         A dictionary contains the optional get values such as index of
         a structural model to extract
@@ -397,75 +489,1138 @@ def Get(filename, element, **kwargs):
     else:
         verbose = False
 
-    fileResp = OpenProjectFile(filename, readOnly=True, verbose=verbose)
-    if fileResp["errorFlag"]:
-        response = fileResp
-    else:
+    if isinstance(filename, Session):
+        return filename.Get(element, **kwargs)
+
+    # Readers share the file lock with each other but not with writers
+    with FileLocks.ReadingFile(filename):
+        if pool is not None and not IsFileBuffer(filename):
+            with pool.borrow(filename, readOnly=True) as fileResp:
+                if fileResp["errorFlag"]:
+                    return fileResp
+                return GetElement(fileResp["root"], element, **kwargs)
+
+        fileResp = OpenProjectFile(filename, readOnly=True, verbose=verbose)
+        if fileResp["errorFlag"]:
+            response = fileResp
+        else:
+            root = fileResp["root"]
+            try:
+                response = GetElement(root, element, **kwargs)
+            finally:
+                if (verbose):
+                    print(f"Closing file: {FileDisplayName(filename)}",file=sys.stderr)
+                root.close()
+                if (verbose):
+                    print(f"{filename} closed successfully",file=sys.stderr)
+        return response
+
+
+# Accessor Function extracting a table element as a structured array
+def GetArray(filename, element, pool=None, **kwargs):
+    """
+    **GetArray** - Same as Get with table elements returned as one numpy
+    structured array of the element's compound type (such as
+    faultObservationType) rather than a list of records
+
+    Examples
+    --------
+    >>> resp = LoopProjectFile.GetArray("test.loop3d", "faultObservations")
+    >>> if resp["errorFlag"]: print(resp["errorString"])
+    >>> else: df = LoopProjectFile.ArrayToDataframe(resp["value"])
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"/"value"}
+        errorString exist and contains error message only when errorFlag is
+        True otherwise the extracted array is in the "value" keyword
+
+    """
+    kwargs.setdefault("asArray", True)
+    return Get(filename, element, pool=pool, **kwargs)
+
+
+# Accessor Function streaming a table element in bounded blocks
+def IterElement(filename, element, chunkRows=None, asDataframe=False, verbose=False, **kwargs):
+    """
+    **IterElement** - Iterates over the records of a table element in blocks
+    of about chunkRows records aligned to the HDF5 chunks of the element, so
+    memory use does not grow with the size of the element
+
+    The file stays open (so Set calls on it fail) until the iteration ends or
+    the iterator is closed, but its read lock is only held while a block is
+    read, so the iterator may be paused or resumed on any thread.
+
+    Examples
+    --------
+    >>> for block in LoopProjectFile.IterElement("test.loop3d", "drillholeObservations",
+    >>>                                          chunkRows=100000):
+    >>>     total += block["to"].sum() - block["from"].sum()
+
+    Parameters
+    ----------
+    filename: string, bytes, file-like object or Session
+        The name of the file to load data from, its contents or an open
+        Session to load it through
+    element: string
+        The name of a table element
+    chunkRows: int or None
+        The number of records read per block (rounded to whole HDF5 chunks),
+        defaults to LoopProjectFileUtils.blockRows
+    asDataframe: bool
+        Whether to yield dataframes rather than structured arrays
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+    kwargs: dict
+        The where, columns, keyword and indexRange options of Get
+
+    Yields
+    ------
+    numpy.ndarray or pandas.DataFrame
+        The (matching) records of each block, blocks without any are skipped
+
+    Raises
+    ------
+    ValueError
+        if element is not a table element or the options name an unknown
+        field or operator
+    Exception
+        on iteration if the file or element cannot be read
+
+    """
+    definition = ElementRegistry.GetElementDefinition(element)
+    if definition is None or not definition.isTable:
+        raise ValueError(f"Element '{element}' is not stored as a table")
+    if kwargs.get("where") is not None:
+        LoopProjectFileUtils.CheckWhere(definition.compoundType, kwargs["where"])
+    if kwargs.get("columns") is not None:
+        LoopProjectFileUtils.CheckColumns(definition.compoundType, kwargs["columns"])
+    return _IterElement(filename, definition, chunkRows, asDataframe, verbose, kwargs)
+
+
+def _IterElement(filename, definition, chunkRows, asDataframe, verbose, kwargs):
+    outType = definition.compoundType
+    if kwargs.get("columns") is not None:
+        outType = LoopProjectFileUtils.ProjectedType(outType, kwargs["columns"])
+
+    session = filename if isinstance(filename, Session) else None
+    lockName = session.filename if session is not None else filename
+    with FileLocks.ReadingFile(lockName):
+        if session is not None:
+            if not session.isOpen:
+                raise Exception("(ERROR) Session for " + FileDisplayName(lockName) + " is not open")
+            root = session.root
+        else:
+            fileResp = OpenProjectFile(filename, readOnly=True, verbose=verbose)
+            if fileResp["errorFlag"]:
+                raise Exception(fileResp["errorString"])
+            root = fileResp["root"]
+    try:
+        with FileLocks.ReadingFile(lockName):
+            resp = ElementRegistry.ResolveElement(root, definition)
+        if resp["errorFlag"]:
+            raise Exception(resp["errorString"])
+        blocks = resp["value"].iter(chunkRows, **kwargs)
+        while True:
+            # The locks are taken around each block read and never held
+            # across a yield, which may resume on another thread or never
+            with FileLocks.ReadingFile(lockName):
+                records = next(blocks, None)
+            if records is None:
+                return
+            # The file's compound type is aligned, repack to the element's
+            records = records.astype(outType, copy=False)
+            if asDataframe:
+                yield LoopProjectFileUtils.ResponseToDataframe(
+                    {"errorFlag": False, "value": records}, outType
+                )
+            else:
+                yield records
+    finally:
+        if session is None:
+            if (verbose):
+                print(f"Closing file: {FileDisplayName(filename)}",file=sys.stderr)
+            with FileLocks.LibraryLock():
+                root.close()
+
+
+# Accessor Function extracting several elements with a single file open
+def GetMany(filename, elements, verbose=False, pool=None, **kwargs):
+    """
+    **GetMany** - Gets several elements from a Loop Project File opening the
+    file only once
+
+    Examples
+    --------
+    >>> resps = LoopProjectFile.GetMany("test.loop3d", ["extents", "faultLog", "strModel"],
+    >>>                                 strModel={"index": 0})
+    >>> if resps["faultLog"]["errorFlag"]: print(resps["faultLog"]["errorString"])
+    >>> else: faultLog = resps["faultLog"]["value"]
+
+    Parameters
+    ----------
+    filename: string, bytes, file-like object or Session
+        The name of the file to load data from, its contents or an open
+        Session
+    elements: list of strings
+        The names of the elements to extract
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+    pool: HandlePool or None
+        A pool to borrow an open handle of the file from instead of opening
+        and closing the file for this call
+    kwargs: dict
+        Optional get values for each element keyed by element name, for
+        example strModel={"index": 0}
+
+    Returns
+    -------
+    dict {element: {"errorFlag", "errorString"/"value"}}
+        The response of each element as returned by Get
+
+    """
+    if isinstance(filename, Session):
+        return {element: filename.Get(element, **kwargs.get(element, {})) for element in elements}
+
+    with FileLocks.ReadingFile(filename):
+        if pool is not None and not IsFileBuffer(filename):
+            with pool.borrow(filename, readOnly=True) as fileResp:
+                if fileResp["errorFlag"]:
+                    return {element: fileResp for element in elements}
+                return {
+                    element: GetElement(fileResp["root"], element, **kwargs.get(element, {}))
+                    for element in elements
+                }
+
+        fileResp = OpenProjectFile(filename, readOnly=True, verbose=verbose)
+        if fileResp["errorFlag"]:
+            return {element: fileResp for element in elements}
         root = fileResp["root"]
+        responses = {}
         try:
-            if element == "version":
-                response = Version.GetVersion(root)
-            elif element == "extents":
-                response = Extents.GetExtents(root)
-            elif element == "strModel":
-                response = StructuralModels.GetStructuralModel(root, **kwargs)
-            elif element == "faultObservations":
-                response = DataCollection.GetFaultObservations(root, **kwargs)
-            elif element == "foldObservations":
-                response = DataCollection.GetFoldObservations(root, **kwargs)
-            elif element == "foliationObservations":
-                response = DataCollection.GetFoliationObservations(root, **kwargs)
-            elif element == "discontinuityObservations":
-                response = DataCollection.GetDiscontinuityObservations(root, **kwargs)
-            elif element == "stratigraphicObservations":
-                response = DataCollection.GetStratigraphicObservations(root, **kwargs)
-            elif element == "contacts":
-                response = DataCollection.GetContacts(root, **kwargs)
-            elif element == "drillholeObservations":
-                response = DataCollection.GetDrillholeObservations(root, **kwargs)
-            elif element == "drillholeSurveys":
-                response = DataCollection.GetDrillholeSurveys(root, **kwargs)
-            elif element == "drillholeProperties":
-                response = DataCollection.GetDrillholeProperties(root, **kwargs)
-            elif element == "stratigraphicLog":
-                response = ExtractedInformation.GetStratigraphicLog(root, **kwargs)
-            elif element == "stratigraphicThicknesses":
-                response = ExtractedInformation.GetStratigraphicThicknesses(root, **kwargs)
-            elif element == "stratigraphicThicknessCalculatorLabels":
-                response = ExtractedInformation.GetStratigraphicThicknessCalculatorLabels(root, **kwargs)
-            elif element == "faultLog":
-                response = ExtractedInformation.GetFaultLog(root, **kwargs)
-            elif element == "foldLog":
-                response = ExtractedInformation.GetFoldLog(root, **kwargs)
-            elif element == "foliationLog":
-                response = ExtractedInformation.GetFoliationLog(root, **kwargs)
-            elif element == "discontinuityLog":
-                response = ExtractedInformation.GetDiscontinuityLog(root, **kwargs)
-            elif element == "drillholeLog":
-                response = ExtractedInformation.GetDrillholeLog(root, **kwargs)
-            elif element == "dataCollectionConfig":
-                response = DataCollection.GetConfiguration(root, **kwargs)
-            elif element == "dataCollectionSources":
-                response = DataCollection.GetSources(root, **kwargs)
-            elif element == "dataCollectionRawSourceData":
-                response = DataCollection.GetRawSourceData(root, **kwargs)
-            elif element == "eventRelationships":
-                response = ExtractedInformation.GetEventRelationships(root, **kwargs)
-            elif element == "structuralModelsConfig":
-                response = StructuralModels.GetConfiguration(root, **kwargs)
-            else:
-                errStr = "(ERROR) Unknown element for Get function '" + element + "'"
-                print(errStr)
-                response = {"errorFlag": True, "errorString": errStr}
+            for element in elements:
+                responses[element] = GetElement(root, element, **kwargs.get(element, {}))
         finally:
             if (verbose):
-                print(f"Closing file: {filename}",file=sys.stderr)
+                print(f"Closing file: {FileDisplayName(filename)}",file=sys.stderr)
             root.close()
-            if (verbose):
-                print(f"{filename} closed successfully",file=sys.stderr)
+        return responses
+
+
+# Call the registered setter function on an already open project file
+def SetElement(root, element, resolved=None, **kwargs):
+    """
+    **SetElement** - Dispatches a set request for element to the setter
+    function registered for it on an already open Loop Project File (see Set
+    for the elements and kwargs available)
+
+    Parameters
+    ----------
+    root: netCDF4.Dataset
+        The root group node of a writable Loop Project File
+    element: string
+        The name of the element to save, "<element>Append" appends to
+        appendable elements
+    resolved: ElementRegistry.ResolvedElement or None
+        The element already looked up in root (see Session.Resolve), records
+        of a table element are then written through it
+    kwargs: dict
+        A dictionary contains the elements to save
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    definition, append = ElementRegistry.GetSetterDefinition(element)
+    if definition is None or definition.setter is None:
+        errStr = "(ERROR) Unknown element for Set function '" + element + "'"
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    layout = kwargs.pop("layout", None)
+    if layout is not None:
+        response = SetElementLayout(root, definition, layout)
+        if response["errorFlag"] or "data" not in kwargs:
+            return response
+    if resolved is not None and "data" in kwargs and set(kwargs) <= {"data", "verbose"}:
+        return resolved.write(kwargs["data"], append)
+    if append:
+        return definition.setter(root, append=True, **kwargs)
+    return definition.setter(root, **kwargs)
+
+
+def SetElementLayout(root, definition, layout):
+    """
+    **SetElementLayout** - Sets the storage layout of a table element on an
+    already open Loop Project File (see ColumnarLayout), creating the
+    element's group when it does not exist yet
+
+    Parameters
+    ----------
+    root: netCDF4.Dataset
+        The root group node of a writable Loop Project File
+    definition: ElementRegistry.ElementDefinition
+        The registered definition of the element
+    layout: string
+        "compound" (one compound typed variable, the default) or "columnar"
+        (one variable per field)
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    if not definition.isTable:
+        errStr = "(ERROR) Element '" + definition.name + "' does not support layout"
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    resp = _ResolveOrCreateElement(root, definition)
+    if resp["errorFlag"]:
+        return resp
+    return ColumnarLayout.SetLayout(
+        resp["value"].group, definition.variableName, layout, definition.maxValidName
+    )
+
+
+def _ResolveOrCreateElement(root, definition):
+    resp = ElementRegistry.ResolveElement(root, definition)
+    if resp["errorFlag"]:
+        # Setting no records creates the element's group and variable
+        resp = definition.setter(root, data=numpy.empty(0, definition.compoundType))
+        if resp["errorFlag"]:
+            return resp
+        resp = ElementRegistry.ResolveElement(root, definition)
+    return resp
+
+
+# Call the registered getter function on an already open project file
+def GetElement(root, element, resolved=None, **kwargs):
+    """
+    **GetElement** - Dispatches a get request for element to the getter
+    function registered for it on an already open Loop Project File (see Get
+    for the elements and kwargs available)
+
+    Parameters
+    ----------
+    root: netCDF4.Dataset
+        The root group node of a Loop Project File
+    element: string
+        The name of the element to extract
+    resolved: ElementRegistry.ResolvedElement or None
+        The element already looked up in root (see Session.Resolve), table
+        elements are then read through it
+    kwargs: dict
+        A dictionary contains the optional get values such as index of
+        a structural model to extract, asArray=True returns table elements
+        as one structured array of the element's compound type, where
+        returns only the records matching a query and columns only the
+        listed fields (see Get)
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"/"value"}
+        errorString exist and contains error message only when errorFlag is
+        True otherwise the extracted value is in the "value" keyword
+
+    """
+    definition = ElementRegistry.GetElementDefinition(element)
+    if definition is None or definition.getter is None:
+        errStr = "(ERROR) Unknown element for Get function '" + element + "'"
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    # Only table elements can be returned as a structured array
+    asArray = kwargs.pop("asArray", False) and definition.isTable
+    where = kwargs.pop("where", None)
+    columns = kwargs.pop("columns", None)
+    if resolved is not None or where is not None or columns is not None:
+        response = SelectElement(
+            root, definition, where, columns=columns, resolved=resolved, **kwargs
+        )
+        if not response["errorFlag"] and not asArray:
+            response["value"] = list(response["value"])
+            return response
+    elif not asArray:
+        return definition.getter(root, **kwargs)
+    else:
+        response = definition.getter(root, asArray=True, **kwargs)
+    if not response["errorFlag"] and definition.compoundType is not None:
+        # netCDF returns the records with the file's (aligned) layout
+        compoundType = definition.compoundType
+        if columns is not None:
+            compoundType = LoopProjectFileUtils.ProjectedType(compoundType, columns)
+        response["value"] = response["value"].astype(compoundType, copy=False)
     return response
 
 
+# Evaluate a where query or column projection on a table element of an
+# open project file
+def SelectElement(
+    root,
+    definition,
+    where=None,
+    indexList=[],
+    indexRange=(0, 0),
+    keyword="",
+    columns=None,
+    resolved=None,
+    **kwargs,
+):
+    """
+    **SelectElement** - Reads the records of a table element matching a
+    where query and/or only the requested columns (see Get) on an already
+    open Loop Project File
+
+    Parameters
+    ----------
+    root: netCDF4.Dataset
+        The root group node of a Loop Project File
+    definition: ElementRegistry.ElementDefinition
+        The registered definition of the element
+    where: dict {field: condition} or None
+        The conditions the records must match
+    indexList, indexRange, keyword:
+        The same selection options as the element's getter
+    columns: list of strings or None
+        The fields to return, None for all of them
+    resolved: ElementRegistry.ResolvedElement or None
+        The element already looked up in root, None to look it up
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"/"value"}
+        value is a structured array of the matching records
+
+    """
+    if not definition.isTable:
+        errStr = (
+            "(ERROR) Element '" + definition.name + "' does not support where or columns"
+        )
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    if resolved is None:
+        resp = ElementRegistry.ResolveElement(root, definition)
+        if resp["errorFlag"]:
+            return resp
+        resolved = resp["value"]
+    try:
+        value = resolved.select(where, indexList, indexRange, keyword, columns)
+    except ValueError as e:
+        errStr = "(ERROR) " + str(e)
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    return {"errorFlag": False, "value": value}
+
+
+class Session:
+    """
+    **Session** - Keeps a single Loop Project File open across many Get/Set
+    calls rather than opening and closing the file for every call
+
+    Examples
+    --------
+    >>> with LoopProjectFile.Session("test.loop3d", "a") as session:
+    >>>     resp = session.Set("faultLog", data=faultLog)
+    >>>     resp = session.Get("faultObservations")
+
+    Parameters
+    ----------
+    filename: string, bytes or file-like object
+        The name of the file to open or its contents (read only)
+    mode: string
+        "r" to open the file read only or "a" to allow Set calls
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    """
+
+    def __init__(self, filename, mode="r", verbose=False):
+        if mode not in ("r", "a"):
+            raise ValueError(f"Invalid session mode '{mode}', expected 'r' or 'a'")
+        self.filename = filename
+        self.mode = mode
+        self.verbose = verbose
+        self.root = None
+        self._resolved = {}
+
+    def open(self):
+        if self.root is None:
+            if self.mode == "a" and isinstance(self.filename, str):
+                ReleaseFile(self.filename)
+            with FileLocks.LibraryLock():
+                fileResp = OpenProjectFile(
+                    self.filename, readOnly=self.mode == "r", verbose=self.verbose
+                )
+            if fileResp["errorFlag"]:
+                raise Exception(fileResp["errorString"])
+            self.root = fileResp["root"]
+        return self
+
+    def close(self):
+        if self.root is not None:
+            if self.verbose:
+                print(f"Closing file: {FileDisplayName(self.filename)}", file=sys.stderr)
+            with FileLocks.LibraryLock():
+                self.root.close()
+            self.root = None
+            self._resolved = {}
+
+    @property
+    def isOpen(self):
+        return self.root is not None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def Get(self, element, **kwargs):
+        """
+        **Get** - Same as LoopProjectFile.Get but using the open file
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"/"value"}
+            errorString exist and contains error message only when errorFlag is
+            True otherwise the extracted value is in the "value" keyword
+
+        """
+        if self.root is None:
+            errStr = "(ERROR) Session for " + FileDisplayName(self.filename) + " is not open"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        with FileLocks.ReadingFile(self.filename):
+            definition = ElementRegistry.GetElementDefinition(element)
+            return GetElement(
+                self.root, element, resolved=self._ResolvedTable(definition), **kwargs
+            )
+
+    def Set(self, element, **kwargs):
+        """
+        **Set** - Same as LoopProjectFile.Set but using the open file
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"}
+            errorString exist and contains error message only when errorFlag is
+            True
+
+        """
+        if self.root is None:
+            errStr = "(ERROR) Session for " + FileDisplayName(self.filename) + " is not open"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        if self.mode == "r":
+            errStr = "(ERROR) Session for " + FileDisplayName(self.filename) + " is read only"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        with FileLocks.WritingFile(self.filename):
+            definition, _ = ElementRegistry.GetSetterDefinition(element)
+            if "layout" in kwargs:
+                # A layout change renames or replaces the table's variables
+                if definition is not None:
+                    self._resolved.pop(definition.name, None)
+                return SetElement(self.root, element, **kwargs)
+            return SetElement(
+                self.root, element, resolved=self._ResolvedTable(definition), **kwargs
+            )
+
+    def _ResolvedTable(self, definition):
+        # The cached lookup of a table element present in the file, None
+        # otherwise so that the element's own getter or setter handles it
+        if definition is None or not definition.isTable:
+            return None
+        resp = self.Resolve(definition.name)
+        return None if resp["errorFlag"] else resp["value"]
+
+    def Resolve(self, element):
+        """
+        **Resolve** - Looks up the netCDF group and variable of a table element
+        once and reuses them for the session's Get and Set calls, until the
+        session is closed or the element's layout is changed through it
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"/"value"}
+            value is an ElementRegistry.ResolvedElement
+
+        """
+        if element in self._resolved:
+            return {"errorFlag": False, "value": self._resolved[element]}
+        if self.root is None:
+            errStr = "(ERROR) Session for " + FileDisplayName(self.filename) + " is not open"
+            return {"errorFlag": True, "errorString": errStr}
+        definition = ElementRegistry.GetElementDefinition(element)
+        if definition is None:
+            errStr = "(ERROR) Unknown element '" + element + "'"
+            return {"errorFlag": True, "errorString": errStr}
+        resp = ElementRegistry.ResolveElement(self.root, definition)
+        if not resp["errorFlag"]:
+            # Groups are never removed, only a layout change (which Set
+            # drops from the cache) replaces the variable found here
+            self._resolved[element] = resp["value"]
+        return resp
+
+
+class MemorySession(Session):
+    """
+    **MemorySession** - A Session on a basic Loop Project File held in memory
+    rather than on disk, written to disk once with persist
+
+    Nothing touches the disk until persist, which copies the project into a
+    new file after which the session is closed and the written file is
+    opened as any other Loop Project File. Closing without persisting
+    discards the project.
+
+    Examples
+    --------
+    >>> project = LoopProjectFile.MemorySession()
+    >>> resp = project.Set("faultLog", data=faultLog)
+    >>> resp = project.persist("test.loop3d")
+
+    Parameters
+    ----------
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    """
+
+    def __init__(self, verbose=False):
+        # Only names the project for its lock and messages, no file is created
+        super().__init__(f"<in memory project {id(self):x}>", "a", verbose)
+        self.persisted = False
+        with FileLocks.WritingFile(self.filename):
+            # memory is the initial size of the buffer, which grows as needed
+            self.root = netCDF4.Dataset(
+                self.filename, "w", memory=65536, format="NETCDF4"
+            )
+            response = SetBasicStructure(self.root)
+        if response["errorFlag"]:
+            self.close()
+            raise Exception(response["errorString"])
+
+    def open(self):
+        if self.root is None:
+            raise Exception(
+                "In memory project is closed"
+                + (" (persisted to " + str(self.filename) + ")" if self.persisted else "")
+            )
+        return self
+
+    def close(self):
+        # Closing without persisting discards the in memory project
+        super().close()
+
+    def persist(self, path):
+        """
+        **persist** - Writes the in memory project to path and closes it
+
+        Parameters
+        ----------
+        path: string
+            The name of the file to write
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"}
+            errorString exist and contains error message only when errorFlag is
+            True
+
+        """
+        if self.root is None:
+            errStr = "(ERROR) In memory project is closed"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        if os.path.isfile(path):
+            errStr = "File " + path + " already exists"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        # netCDF-C only writes to files whose root group tracks creation
+        # order, which the image returned by closing an in memory file does
+        # not, so the project is copied into a file created on disk
+        target = None
+        try:
+            with FileLocks.WritingFile(self.filename):
+                target = netCDF4.Dataset(path, "x", format="NETCDF4")
+                try:
+                    LoopProjectFileUtils.CopyGroup(self.root, target)
+                finally:
+                    target.close()
+        except (OSError, RuntimeError) as e:
+            if target is not None:
+                # Remove the partly written copy
+                os.remove(path)
+            errStr = "(ERROR) Failed to write " + str(path) + ": " + str(e)
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        super().close()
+        if self.verbose:
+            print(f"Persisted in memory project to: {path}", file=sys.stderr)
+        self.persisted = True
+        self.filename = path
+        return {"errorFlag": False}
+
+
+class Batch:
+    """
+    **Batch** - Buffers Set calls and applies them all in one write session
+    to a temporary copy of a Loop Project File which then replaces the
+    original file, so the file on disk is either fully updated or untouched
+
+    Examples
+    --------
+    >>> with LoopProjectFile.Batch("test.loop3d") as batch:
+    >>>     batch.Set("faultLog", data=faultLog)
+    >>>     batch.Set("faultObservations", data=faultObservations)
+
+    Parameters
+    ----------
+    filename: string
+        The name of the file to update
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    """
+
+    def __init__(self, filename, verbose=False):
+        self.filename = filename
+        self.verbose = verbose
+        self.writes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.discard()
+            return
+        response = self.commit()
+        if response["errorFlag"]:
+            raise Exception(response["errorString"])
+
+    def Set(self, element, **kwargs):
+        """
+        **Set** - Buffers a LoopProjectFile.Set call until commit
+
+        Returns
+        -------
+        dict {"errorFlag"}
+            errors are only reported on commit
+
+        """
+        self.writes.append((element, kwargs))
+        return {"errorFlag": False}
+
+    def discard(self):
+        self.writes = []
+
+    def commit(self):
+        """
+        **commit** - Applies the buffered writes to a temporary copy of the
+        file and replaces the file with it if every write succeeded
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"}
+            errorString exist and contains error message only when errorFlag is
+            True
+
+        """
+        writes, self.writes = self.writes, []
+        response = {"errorFlag": False}
+        if not writes:
+            return response
+        if not os.path.isfile(self.filename):
+            errStr = f"File {self.filename} does not exist"
+            print(errStr, file=sys.stderr)
+            return {"errorFlag": True, "errorString": errStr}
+
+        # Temporary copy in the same directory so os.replace is atomic
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, tmpFilename = tempfile.mkstemp(suffix=".loop3d", dir=directory)
+        os.close(fd)
+        try:
+            # No other writes may land between the copy and the replace
+            with FileLocks.WritingFile(self.filename):
+                shutil.copy2(self.filename, tmpFilename)
+                with Session(tmpFilename, "a", verbose=self.verbose) as session:
+                    for element, kwargs in writes:
+                        response = session.Set(element, **kwargs)
+                        if response["errorFlag"]:
+                            break
+                if not response["errorFlag"]:
+                    os.replace(tmpFilename, self.filename)
+        except Exception as e:
+            print(f"Error occurred while writing batch to {self.filename}: {e}", file=sys.stderr)
+            response = {"errorFlag": True, "errorString": str(e)}
+        finally:
+            if os.path.isfile(tmpFilename):
+                os.remove(tmpFilename)
+        return response
+
+
+class ElementWriter:
+    """
+    **ElementWriter** - Streams successive chunks of records into a table
+    element, each converted and written with one slice as it arrives, so
+    memory use is bounded by the chunk size rather than the element size
+
+    The element's MaxValid attribute is only updated on commit (and close),
+    so readers see the records written so far only once committed. When the
+    context exits on an exception nothing more is committed: appended records
+    are dropped and, when not appending, the records already written have
+    overwritten the element's first records but the element keeps its
+    previous length.
+
+    Examples
+    --------
+    >>> with LoopProjectFile.ElementWriter("test.loop3d", "drillholeObservations") as writer:
+    >>>     for chunk in pandas.read_csv("observations.csv", chunksize=100000):
+    >>>         resp = writer.write(chunk)
+
+    Parameters
+    ----------
+    filename: string or Session
+        The name of the file to write or an open Session in "a" mode
+    element: string
+        The name of a table element
+    append: bool
+        Whether to append to the records already in the element rather than
+        to replace them
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    Raises
+    ------
+    ValueError
+        if element is not a table element or cannot be appended to
+
+    """
+
+    def __init__(self, filename, element, append=False, verbose=False):
+        definition = ElementRegistry.GetElementDefinition(element)
+        if definition is None or not definition.isTable:
+            raise ValueError(f"Element '{element}' is not stored as a table")
+        if append and not definition.appendable:
+            raise ValueError(f"Element '{element}' cannot be appended to")
+        self.filename = filename
+        self.definition = definition
+        self.append = append
+        self.verbose = verbose
+        self.count = 0
+        self._session = None
+        self._resolved = None
+        self._index = 0
+
+    def open(self):
+        if self._session is not None:
+            return self
+        session = self.filename
+        if not isinstance(session, Session):
+            session = Session(self.filename, "a", verbose=self.verbose).open()
+        elif not session.isOpen or session.mode == "r":
+            raise Exception(
+                "(ERROR) Session for " + FileDisplayName(session.filename) + " is not open for writing"
+            )
+        with FileLocks.WritingFile(session.filename):
+            resp = _ResolveOrCreateElement(session.root, self.definition)
+        if resp["errorFlag"]:
+            if session is not self.filename:
+                session.close()
+            raise Exception(resp["errorString"])
+        self._session = session
+        self._resolved = resp["value"]
+        self._index = self._resolved.maxValid() if self.append else 0
+        self.count = 0
+        return self
+
+    @property
+    def isOpen(self):
+        return self._session is not None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.discard()
+            return
+        response = self.close()
+        if response["errorFlag"]:
+            raise Exception(response["errorString"])
+
+    def write(self, data):
+        """
+        **write** - Converts a chunk of records to the element's compound type
+        and writes it after the records written so far
+
+        Parameters
+        ----------
+        data: numpy.ndarray, pandas.DataFrame or list
+            The records, a structured array (fields matched by position), a
+            dataframe with one column per field or a list of records
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"}
+            errorString exist and contains error message only when errorFlag is
+            True, in which case nothing of the chunk was written
+
+        """
+        if self._session is None:
+            errStr = "(ERROR) ElementWriter for " + FileDisplayName(self.filename) + " is not open"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        try:
+            records = LoopProjectFileUtils.AsRecordArray(
+                data, LoopProjectFileUtils.RecordType(self._resolved.variable)
+            )
+        except (ValueError, TypeError) as e:
+            errStr = "(ERROR) " + str(e)
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        with FileLocks.WritingFile(self._session.filename):
+            self._index = LoopProjectFileUtils.WriteRecords(
+                self._resolved.variable, self._index, records, grow=True
+            )
+        self.count += len(records)
+        return {"errorFlag": False}
+
+    def commit(self):
+        """
+        **commit** - Makes the records written so far visible to readers by
+        updating the element's MaxValid attribute, leaving the writer open
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"}
+            errorString exist and contains error message only when errorFlag is
+            True
+
+        """
+        if self._session is None:
+            errStr = "(ERROR) ElementWriter for " + FileDisplayName(self.filename) + " is not open"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        with FileLocks.WritingFile(self._session.filename):
+            self._resolved.group.setncattr(self.definition.maxValidName, self._index)
+            self._session.root.sync()
+        return {"errorFlag": False}
+
+    def close(self):
+        """
+        **close** - Commits the records written and closes the file (unless
+        it was given as a Session)
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"}
+            errorString exist and contains error message only when errorFlag is
+            True
+
+        """
+        if self._session is None:
+            return {"errorFlag": False}
+        try:
+            return self.commit()
+        finally:
+            self.discard()
+
+    def discard(self):
+        """
+        **discard** - Closes the writer without committing the records written
+        since the last commit
+        """
+        session, self._session, self._resolved = self._session, None, None
+        if session is not None and session is not self.filename:
+            session.close()
+
+
+# Accessor Function setting several elements atomically
+def SetMany(filename, elements, verbose=False):
+    """
+    **SetMany** - Sets several elements of a Loop Project File in a single
+    write session, replacing the file only once all of them succeeded
+
+    Examples
+    --------
+    >>> resp = LoopProjectFile.SetMany("test.loop3d", {"faultLog": {"data": faultLog},
+    >>>                                                "contacts": {"data": contacts}})
+    >>> if resp["errorFlag"]: print(resp["errorString"])
+
+    Parameters
+    ----------
+    filename: string
+        The name of the file to save data to
+    elements: dict {element: kwargs} or list of (element, kwargs)
+        The elements to save with the kwargs for each as passed to Set
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    batch = Batch(filename, verbose=verbose)
+    if isinstance(elements, dict):
+        elements = elements.items()
+    for element, kwargs in elements:
+        batch.Set(element, **kwargs)
+    return batch.commit()
+
+
+# Accessor Function updating and inserting records by key
+def Upsert(filename, element, records, key="eventId", pool=None, verbose=False):
+    """
+    **Upsert** - Overwrites the records of a table element whose key matches
+    one of records in place and appends the others, without rewriting the
+    rest of the element
+
+    Only the key fields of the element are read (to index its rows by key)
+    and only the chunks holding matching rows are rewritten. Each matching
+    record is replaced whole, fields are not merged with the stored record.
+
+    Examples
+    --------
+    >>> fault = numpy.array([(3, b"Fault_3", 0, 0, 1000.0, ...)], LoopProjectFile.faultEventType)
+    >>> resp = LoopProjectFile.Upsert("test.loop3d", "faultLog", fault)
+    >>> resp = LoopProjectFile.Upsert("test.loop3d", "stratigraphicLog", layers, key="layerId")
+    >>> resp = LoopProjectFile.Upsert("test.loop3d", "eventRelationships", relationships,
+    >>>                               key=["eventId1", "eventId2"])
+
+    Parameters
+    ----------
+    filename: string or Session
+        The name of the file to update or an open Session in "a" mode
+    element: string
+        The name of a table element
+    records: numpy.ndarray, pandas.DataFrame or list
+        The records to update or insert (see Set)
+    key: string or list of strings
+        The field(s) identifying a record, such as "eventId", "layerId" or
+        "collarId"
+    pool: HandlePool or None
+        A pool to borrow an open handle of the file from instead of opening
+        and closing the file for this call
+    verbose: bool
+        A flag to indicate a higher level of console logging (more if True)
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"/"value"}
+        errorString exist and contains error message only when errorFlag is
+        True otherwise value is a dict {"updated", "inserted"} of the number
+        of records overwritten and appended. Nothing is written on error.
+
+    """
+    if isinstance(filename, Session):
+        if not filename.isOpen or filename.mode == "r":
+            errStr = "(ERROR) Session for " + FileDisplayName(filename.filename) + " is not open for writing"
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        with FileLocks.WritingFile(filename.filename):
+            return UpsertElement(filename.root, element, records, key)
+
+    with FileLocks.WritingFile(filename):
+        if isinstance(filename, str):
+            ReleaseFile(filename, keep=pool)
+        if pool is not None:
+            with pool.borrow(filename, readOnly=False) as fileResp:
+                if fileResp["errorFlag"]:
+                    return fileResp
+                return UpsertElement(fileResp["root"], element, records, key)
+
+        fileResp = OpenProjectFile(filename, readOnly=False, verbose=verbose)
+        if fileResp["errorFlag"]:
+            return fileResp
+        root = fileResp["root"]
+        try:
+            return UpsertElement(root, element, records, key)
+        finally:
+            if (verbose):
+                print(f"Closing file: {FileDisplayName(filename)}",file=sys.stderr)
+            root.close()
+
+
+def UpsertElement(root, element, records, key="eventId"):
+    """
+    **UpsertElement** - Same as Upsert on an already open Loop Project File
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"/"value"}
+        errorString exist and contains error message only when errorFlag is
+        True otherwise value is a dict {"updated", "inserted"}
+
+    """
+    definition = ElementRegistry.GetElementDefinition(element)
+    if definition is None or not definition.isTable:
+        errStr = "(ERROR) Element '" + element + "' is not stored as a table"
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    keys = [key] if isinstance(key, str) else list(key)
+    try:
+        LoopProjectFileUtils.CheckColumns(definition.compoundType, keys)
+        records = LoopProjectFileUtils.AsRecordArray(records, definition.compoundType)
+    except (ValueError, TypeError) as e:
+        errStr = "(ERROR) " + str(e)
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    newKeys = _KeyIndex(records, keys)
+    if newKeys.has_duplicates:
+        errStr = "(ERROR) Records to upsert hold the same " + str(key) + " more than once"
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+
+    resp = _ResolveOrCreateElement(root, definition)
+    if resp["errorFlag"]:
+        return resp
+    resolved = resp["value"]
+    # Only the key fields are read to find the rows of the records
+    keyType = LoopProjectFileUtils.ProjectedType(definition.compoundType, keys)
+    existing = [block.astype(keyType, copy=False) for block in resolved.iter(columns=keys)]
+    existing = numpy.concatenate(existing) if existing else numpy.empty(0, keyType)
+    existingKeys = _KeyIndex(existing, keys)
+    rowNumbers = numpy.arange(len(existingKeys))
+    if existingKeys.has_duplicates:
+        unique = ~existingKeys.duplicated(keep=False)
+        if newKeys.isin(existingKeys[~unique]).any():
+            errStr = (
+                "(ERROR) Records to upsert match more than one record of "
+                + element + " by " + str(key)
+            )
+            print(errStr)
+            return {"errorFlag": True, "errorString": errStr}
+        existingKeys = existingKeys[unique]
+        rowNumbers = rowNumbers[unique]
+    positions = existingKeys.get_indexer(newKeys)
+    matched = positions >= 0
+
+    LoopProjectFileUtils.WriteIndexedRecords(
+        resolved.variable, rowNumbers[positions[matched]], records[matched]
+    )
+    start = resolved.maxValid()
+    stop = LoopProjectFileUtils.WriteRecords(resolved.variable, start, records[~matched], grow=True)
+    resolved.group.setncattr(definition.maxValidName, stop)
+    return {
+        "errorFlag": False,
+        "value": {"updated": int(matched.sum()), "inserted": stop - start},
+    }
+
+
+def _KeyIndex(records, keys):
+    if len(keys) == 1:
+        return pandas.Index(records[keys[0]])
+    return pandas.MultiIndex.from_arrays([records[name] for name in keys], names=keys)
+
+
 # Check which element are valid
 def CheckValidElements(filename, verbose=False):
     """
@@ -517,8 +1672,9 @@ def CheckValidElements(filename, verbose=False):
             print(f"{filename} is not a valid loop project file")
         return None
     else:
+        responses = GetMany(filename, list(elements.keys()), verbose=verbose)
         for element in elements:
-            elements[element] = Get(filename, element)["errorFlag"]
+            elements[element] = responses[element]["errorFlag"]
         return elements
 
 
@@ -532,8 +1688,9 @@ def CheckFileValid(filename, verbose=False):
 
     Parameters
     ----------
-    filename: string
-        The name of the file to load data from
+    filename: string, bytes, file-like object or Session
+        The name of the file to load data from, its contents or an open
+        Session (such as an in memory project) to check
     verbose: bool
         A flag to indicate a higher level of console logging (more if True)
 
@@ -543,40 +1700,56 @@ def CheckFileValid(filename, verbose=False):
         A flag indicating whether the Loop Project File is valid
 
     """
-    valid = True
-    # Open project file
-    fileResp = OpenProjectFile(filename, readOnly=True, verbose=verbose)
-    if fileResp["errorFlag"]:
-        valid = False
-    else:
+    if isinstance(filename, Session):
+        with FileLocks.ReadingFile(filename.filename):
+            return filename.isOpen and CheckRootValid(filename.root, verbose)
+    with FileLocks.ReadingFile(filename):
+        # Open project file
+        fileResp = OpenProjectFile(filename, readOnly=True, verbose=verbose)
+        if fileResp["errorFlag"]:
+            return False
         rootgrp = fileResp["root"]
+        try:
+            return CheckRootValid(rootgrp, verbose)
+        finally:
+            rootgrp.close()
 
-        xyzGridSize = [0, 0, 0]
-        # Check for errors in project file
-        valid = Version.CheckVersionValid(rootgrp, verbose) and valid
-        valid = Extents.CheckExtentsValid(rootgrp, xyzGridSize, verbose) and valid
-        valid = DataCollection.CheckDataCollectionValid(rootgrp, verbose) and valid
-        valid = (
-            ExtractedInformation.CheckExtractedInformationValid(rootgrp, verbose)
-            and valid
-        )
-        valid = (
-            StructuralModels.CheckStructuralModelsValid(rootgrp, xyzGridSize, verbose)
-            and valid
-        )
-        valid = (
-            GeophysicalModels.CheckGeophysicalModelsValid(rootgrp, verbose) and valid
-        )
-        valid = ProbabilityModels.CheckProbabilityModelValid(rootgrp, verbose) and valid
 
-        # Close and report
-        rootgrp.close()
+def CheckRootValid(rootgrp, verbose=False):
+    """
+    **CheckRootValid** - Same as CheckFileValid on the root node of an open
+    Loop Project File
 
-        if verbose is True:
-            if valid:
-                print("\nThis is a valid Loop Project File")
-            else:
-                print("\nThis Loop Project File is NOT valid")
+    Returns
+    -------
+    bool
+        A flag indicating whether the Loop Project File is valid
+
+    """
+    valid = True
+    xyzGridSize = [0, 0, 0]
+    # Check for errors in project file
+    valid = Version.CheckVersionValid(rootgrp, verbose) and valid
+    valid = Extents.CheckExtentsValid(rootgrp, xyzGridSize, verbose) and valid
+    valid = DataCollection.CheckDataCollectionValid(rootgrp, verbose) and valid
+    valid = (
+        ExtractedInformation.CheckExtractedInformationValid(rootgrp, verbose)
+        and valid
+    )
+    valid = (
+        StructuralModels.CheckStructuralModelsValid(rootgrp, xyzGridSize, verbose)
+        and valid
+    )
+    valid = (
+        GeophysicalModels.CheckGeophysicalModelsValid(rootgrp, verbose) and valid
+    )
+    valid = ProbabilityModels.CheckProbabilityModelValid(rootgrp, verbose) and valid
+
+    if verbose is True:
+        if valid:
+            print("\nThis is a valid Loop Project File")
+        else:
+            print("\nThis Loop Project File is NOT valid")
     return valid
 
 
@@ -835,10 +2008,58 @@ drillholeSurveyType = numpy.dtype(
 
 
 def ConvertDataFrame(df, dtype):
-    if isinstance(df, pandas.DataFrame):
-        return numpy.array(df.to_records(index=False).tolist(), dtype=dtype)
-    else:
+    """
+    **ConvertDataFrame** - Converts a dataframe into a structured array of
+    the compound type dtype, filling the fields column by column from the
+    dataframe's columns in order
+
+    Raises
+    ------
+    TypeError
+        if df is not a dataframe
+    ValueError
+        if the columns do not match the fields of dtype or a value does not
+        fit its field (such as a string longer than 120 bytes for a S120
+        field or a fractional value for an integer field)
+
+    """
+    if not isinstance(df, pandas.DataFrame):
         raise TypeError("Input is not a DataFrame")
+    if len(df.columns) != len(dtype.names):
+        raise ValueError(
+            f"Dataframe has {len(df.columns)} columns, expected {len(dtype.names)}: {dtype.names}"
+        )
+    data = numpy.empty(len(df), dtype=dtype)
+    for position, name in enumerate(dtype.names):
+        values = df.iloc[:, position].to_numpy()
+        if dtype[name].kind == "S":
+            data[name] = LoopProjectFileUtils.EncodeStrings(values, dtype[name], name)
+            continue
+        if values.dtype.kind == "O":
+            values = numpy.asarray(values.tolist())
+        if dtype[name].kind in "iu" and values.dtype.kind in "fiub":
+            _CheckIntegerValues(values, dtype[name], name)
+        data[name] = values
+    return data
+
+
+def _CheckIntegerValues(values, fieldType, name):
+    # Casting would silently drop fractions or wrap out of range values
+    if values.dtype.kind == "f":
+        bad = ~numpy.isfinite(values)
+        bad[~bad] = values[~bad] != numpy.trunc(values[~bad])
+        if bad.any():
+            row = int(numpy.argmax(bad))
+            raise ValueError(
+                f"Value of {name} in row {row} ({values[row]}) is not an integer"
+            )
+    if len(values) and values.dtype.kind != "b":
+        info = numpy.iinfo(fieldType)
+        low, high = values.min(), values.max()
+        if low < info.min or high > info.max:
+            raise ValueError(
+                f"Values of {name} ({low} to {high}) are out of the range of {fieldType}"
+            )
 
 
 def CheckFileIsLoopProjectFile(filename, verbose=False):
@@ -856,8 +2077,197 @@ def CheckFileIsLoopProjectFile(filename, verbose=False):
     return valid
 
 
-def ConvertToDataFrame(data, loopCompoundType):
-    columns = list(loopCompoundType.names)
-    df = pandas.DataFrame.from_records(data, columns=columns)
-    df = df.applymap(lambda x: x.decode() if isinstance(x, bytes) else x)
-    return df
+def ConvertToDataFrame(data, loopCompoundType, categorical=False):
+    # Byte string fields are decoded column by column
+    return LoopProjectFileUtils.ResponseToDataframe(
+        {"errorFlag": False, "value": data}, loopCompoundType, categorical
+    )
+
+
+# Register the elements available through Get/Set
+def _observations(name, indexName):
+    return {
+        "groupPath": ("DataCollection", "Observations"),
+        "variableName": name,
+        "indexName": indexName,
+        "appendable": True,
+    }
+
+
+def _drillholes(name, indexName):
+    return {
+        "groupPath": ("DataCollection", "Drillholes"),
+        "variableName": name,
+        "indexName": indexName,
+        "appendable": True,
+    }
+
+
+def _eventLog(name, indexName):
+    return {
+        "groupPath": ("ExtractedInformation", "EventLog"),
+        "variableName": name,
+        "indexName": indexName,
+        "appendable": True,
+    }
+
+
+ElementRegistry.RegisterElement(
+    "version",
+    lambda root, **kwargs: Version.GetVersion(root),
+    Version.SetVersion,
+)
+ElementRegistry.RegisterElement(
+    "extents",
+    lambda root, **kwargs: Extents.GetExtents(root),
+    Extents.SetExtents,
+)
+ElementRegistry.RegisterElement(
+    "strModel", StructuralModels.GetStructuralModel, StructuralModels.SetStructuralModel
+)
+ElementRegistry.RegisterElement(
+    "faultObservations",
+    DataCollection.GetFaultObservations,
+    DataCollection.SetFaultObservations,
+    compoundType=faultObservationType,
+    **_observations("faultObservations", "faultObservationIndex"),
+)
+ElementRegistry.RegisterElement(
+    "foldObservations",
+    DataCollection.GetFoldObservations,
+    DataCollection.SetFoldObservations,
+    compoundType=foldObservationType,
+    **_observations("foldObservations", "foldObservationIndex"),
+)
+ElementRegistry.RegisterElement(
+    "foliationObservations",
+    DataCollection.GetFoliationObservations,
+    DataCollection.SetFoliationObservations,
+    compoundType=foliationObservationType,
+    **_observations("foliationObservations", "foliationObservationIndex"),
+)
+ElementRegistry.RegisterElement(
+    "discontinuityObservations",
+    DataCollection.GetDiscontinuityObservations,
+    DataCollection.SetDiscontinuityObservations,
+    compoundType=discontinuityObservationType,
+    **_observations("discontinuityObservations", "discontinuityObservationIndex"),
+)
+ElementRegistry.RegisterElement(
+    "stratigraphicObservations",
+    DataCollection.GetStratigraphicObservations,
+    DataCollection.SetStratigraphicObservations,
+    compoundType=stratigraphicObservationType,
+    **_observations("stratigraphicObservations", "stratigraphicObservationIndex"),
+)
+ElementRegistry.RegisterElement(
+    "contacts",
+    DataCollection.GetContacts,
+    DataCollection.SetContacts,
+    groupPath=("DataCollection", "Contacts"),
+    variableName="contacts",
+    indexName="index",
+    compoundType=contactObservationType,
+    appendable=True,
+)
+ElementRegistry.RegisterElement(
+    "drillholeObservations",
+    DataCollection.GetDrillholeObservations,
+    DataCollection.SetDrillholeObservations,
+    compoundType=drillholeObservationType,
+    **_drillholes("drillholeObservations", "drillholeObservationIndex"),
+)
+ElementRegistry.RegisterElement(
+    "drillholeSurveys",
+    DataCollection.GetDrillholeSurveys,
+    DataCollection.SetDrillholeSurveys,
+    compoundType=drillholeSurveyType,
+    **_drillholes("drillholeSurveys", "drillholeSurveyIndex"),
+)
+ElementRegistry.RegisterElement(
+    "drillholeProperties",
+    DataCollection.GetDrillholeProperties,
+    DataCollection.SetDrillholeProperties,
+    compoundType=drillholePropertyType,
+    **_drillholes("drillholeProperties", "drillholePropertyIndex"),
+)
+ElementRegistry.RegisterElement(
+    "stratigraphicLog",
+    ExtractedInformation.GetStratigraphicLog,
+    ExtractedInformation.SetStratigraphicLog,
+    groupPath=("ExtractedInformation", "StratigraphicInformation"),
+    variableName="stratigraphicLayers",
+    indexName="index",
+    compoundType=stratigraphicLayerType,
+    appendable=True,
+)
+ElementRegistry.RegisterElement(
+    "stratigraphicThicknesses",
+    ExtractedInformation.GetStratigraphicThicknesses,
+    ExtractedInformation.SetStratigraphicThicknesses,
+    groupPath=("ExtractedInformation", "StratigraphicThickness"),
+    variableName="stratigraphicThicknesses",
+    indexName="index",
+    compoundType=stratigraphicThicknessType,
+)
+ElementRegistry.RegisterElement(
+    "faultLog",
+    ExtractedInformation.GetFaultLog,
+    ExtractedInformation.SetFaultLog,
+    compoundType=faultEventType,
+    **_eventLog("faultEvents", "faultEventIndex"),
+)
+ElementRegistry.RegisterElement(
+    "foldLog",
+    ExtractedInformation.GetFoldLog,
+    ExtractedInformation.SetFoldLog,
+    compoundType=foldEventType,
+    **_eventLog("foldEvents", "foldEventIndex"),
+)
+ElementRegistry.RegisterElement(
+    "foliationLog",
+    ExtractedInformation.GetFoliationLog,
+    ExtractedInformation.SetFoliationLog,
+    compoundType=foliationEventType,
+    **_eventLog("foliationEvents", "foliationEventIndex"),
+)
+ElementRegistry.RegisterElement(
+    "discontinuityLog",
+    ExtractedInformation.GetDiscontinuityLog,
+    ExtractedInformation.SetDiscontinuityLog,
+    compoundType=discontinuityEventType,
+    **_eventLog("discontinuityEvents", "discontinuityEventIndex"),
+)
+ElementRegistry.RegisterElement(
+    "drillholeLog",
+    ExtractedInformation.GetDrillholeLog,
+    ExtractedInformation.SetDrillholeLog,
+    groupPath=("ExtractedInformation", "DrillholeInformation"),
+    variableName="drillholeDescriptions",
+    indexName="index",
+    compoundType=drillholeDescriptionType,
+    appendable=True,
+)
+ElementRegistry.RegisterElement(
+    "eventRelationships",
+    ExtractedInformation.GetEventRelationships,
+    ExtractedInformation.SetEventRelationships,
+    groupPath=("ExtractedInformation", "EventRelationships"),
+    variableName="eventRelationships",
+    indexName="index",
+    compoundType=eventRelationshipType,
+)
+ElementRegistry.RegisterElement(
+    "dataCollectionConfig", DataCollection.GetConfiguration, DataCollection.SetConfiguration
+)
+ElementRegistry.RegisterElement(
+    "dataCollectionSources", DataCollection.GetSources, DataCollection.SetSources
+)
+ElementRegistry.RegisterElement(
+    "dataCollectionRawSourceData",
+    DataCollection.GetRawSourceData,
+    DataCollection.SetRawSourceData,
+)
+ElementRegistry.RegisterElement(
+    "structuralModelsConfig", StructuralModels.GetConfiguration, StructuralModels.SetConfiguration
+)
@@ -1,4 +1,4 @@
-# import netCDF4
+import netCDF4
 import pandas
 import os
 import sys
@@ -31,6 +31,707 @@ def GetGroup(node, groupName, verbose=False):
         return {"errorFlag": True, "errorString": errStr}
 
 
+def ReadRecords(variable, start, stop, asArray=False):
+    """
+    **ReadRecords** - Reads the records [start, stop) of a compound typed
+    netCDF variable with a single hyperslab read rather than one read per
+    record
+
+    Parameters
+    ----------
+    variable: netCDF4.Variable
+        The variable holding the records
+    start, stop: int
+        The range of records to read (clipped to be non-negative)
+    asArray: bool
+        Whether to return the structured array read rather than a list
+
+    Returns
+    -------
+    list of numpy.void or numpy.ndarray
+        The records, each a view into one contiguous structured array
+
+    """
+    start = max(0, int(start))
+    stop = max(start, int(stop))
+    if stop == start:
+        records = numpy.empty(0, dtype=variable.dtype)
+    else:
+        records = numpy.ma.getdata(variable[start:stop])
+    return records if asArray else list(records)
+
+
+def ReadIndexedRecords(variable, indexList, maxValidIndex, asArray=False):
+    """
+    **ReadIndexedRecords** - Reads the records at the indices of indexList
+    with one hyperslab read per contiguous run of requested indices
+
+    The indices are sorted and deduplicated and runs separated by less than
+    one HDF5 chunk are merged (the whole chunk is decompressed either way),
+    then the records are returned in the caller's order including repeats.
+    Indices outside [0, maxValidIndex) are skipped.
+
+    Parameters
+    ----------
+    variable: netCDF4.Variable
+        The variable holding the records
+    indexList: list of int
+        The indices of the records to read
+    maxValidIndex: int
+        The number of valid records in the variable
+    asArray: bool
+        Whether to return a structured array rather than a list
+
+    Returns
+    -------
+    list of numpy.void or numpy.ndarray
+        The records, each a view into one contiguous structured array
+
+    """
+    indices = numpy.asarray(indexList).astype(numpy.int64).ravel()
+    indices = indices[(indices >= 0) & (indices < maxValidIndex)]
+    if len(indices) == 0:
+        return numpy.empty(0, dtype=variable.dtype) if asArray else []
+    unique, inverse = numpy.unique(indices, return_inverse=True)
+    chunking = variable.chunking()
+    maxGap = chunking[0] if isinstance(chunking, list) else 1
+    breaks = numpy.flatnonzero(numpy.diff(unique) > maxGap) + 1
+    runStarts = numpy.concatenate(([0], breaks))
+    runStops = numpy.concatenate((breaks, [len(unique)]))
+    records = None
+    for runStart, runStop in zip(runStarts, runStops):
+        start = unique[runStart]
+        block = numpy.ma.getdata(variable[start:unique[runStop - 1] + 1])
+        if records is None:
+            records = numpy.empty(len(unique), dtype=block.dtype)
+        records[runStart:runStop] = block[unique[runStart:runStop] - start]
+    records = records[inverse.ravel()]
+    return records if asArray else list(records)
+
+
+def RecordType(variable):
+    """
+    **RecordType** - The packed numpy compound type of the records of a table
+    variable, with the ("S1", (n,)) char arrays netCDF uses for strings as
+    S<n> fields (the element's compound type, such as faultEventType)
+    """
+    fields = []
+    for name in variable.dtype.names:
+        fieldType = variable.dtype[name]
+        if fieldType.subdtype is not None and fieldType.subdtype[0].kind == "S":
+            fieldType = numpy.dtype("S" + str(fieldType.itemsize))
+        fields.append((name, fieldType))
+    return numpy.dtype(fields)
+
+
+def AsRecordArray(data, dtype):
+    """
+    **AsRecordArray** - The records to set (a structured array, a dataframe
+    or a list of records or tuples) as one structured array of dtype
+
+    Raises
+    ------
+    ValueError
+        if a dataframe value does not fit its field (see
+        LoopProjectFile.ConvertDataFrame)
+
+    """
+    if isinstance(data, pandas.DataFrame):
+        return LoopProjectFile.ConvertDataFrame(data, dtype)
+    if isinstance(data, numpy.ndarray) and data.dtype.names is not None:
+        # Fields are matched by position as in the compound variables
+        return data.astype(dtype, copy=False)
+    data = list(data)
+    if data and isinstance(data[0], numpy.void):
+        return numpy.array(data).astype(dtype, copy=False)
+    return numpy.array([tuple(record) for record in data], dtype=dtype)
+
+
+# Factor the capacity of a table grows by when appended records overflow it,
+# 1.0 to grow the index dimension to just fit the records (so readers that
+# ignore the MaxValid attributes see no padding)
+appendGrowth = 2.0
+
+
+def ValidCount(group, indexName):
+    """
+    **ValidCount** - The number of valid records of the table indexed by
+    indexName in group (its "<indexName>_MaxValid" attribute clamped to the
+    dimension), where appended records are written. Records past it are dead
+    capacity left by shorter sets and by growth, reused by appends.
+    """
+    size = group.dimensions[indexName].size
+    if indexName + "_MaxValid" not in group.ncattrs():
+        return size
+    return max(0, min(size, int(group.getncattr(indexName + "_MaxValid"))))
+
+
+def WriteRecords(variable, start, data, grow=False):
+    """
+    **WriteRecords** - Writes records into a table variable from index start
+    with one slice assignment, so the unlimited index dimension grows and
+    each chunk is compressed once rather than once per record
+
+    Parameters
+    ----------
+    variable: netCDF4.Variable or ColumnarLayout.ColumnarVariable
+        The variable holding the records
+    start: int
+        The index of the first record to write
+    data: numpy.ndarray, pandas.DataFrame or list
+        The records (see AsRecordArray)
+    grow: bool
+        Whether to grow the dimension geometrically (by appendGrowth) rather
+        than to just fit the records when they overflow it, so a stream of
+        appends extends it a logarithmic number of times
+
+    Notes
+    -----
+    netCDF only extends an unlimited dimension by writing to it, so growing
+    writes an all zero padding record at the end of the new capacity. The
+    records past the table's MaxValid attribute (padding and records left by
+    shorter sets) are never returned by Get, GetArray, IterElement or
+    ProjectFile, which read up to MaxValid. Tools that read the whole
+    dimension, such as ncdump, show them as zero filled records, and older
+    versions of this library append after the whole dimension, turning them
+    into valid records. Set appendGrowth to 1.0 for files shared with those.
+
+    Returns
+    -------
+    int
+        The index after the last record written
+
+    """
+    records = AsRecordArray(data, RecordType(variable))
+    stop = start + len(records)
+    size = len(variable)
+    if grow and stop > size > 0:
+        capacity = max(stop, int(size * appendGrowth))
+        if capacity > stop:
+            # Writing the last record of the new capacity extends the
+            # dimension, the chunks in between are only allocated when used
+            variable[capacity - 1] = numpy.zeros((), dtype=records.dtype)
+    if len(records):
+        variable[start:stop] = records
+    return stop
+
+
+def WriteIndexedRecords(variable, indices, data):
+    """
+    **WriteIndexedRecords** - Overwrites the records at indices in place
+    with one hyperslab write per run of indices
+
+    As in ReadIndexedRecords runs separated by less than one HDF5 chunk are
+    merged, the records between the indices of a merged run are read and
+    written back unchanged so each chunk is compressed once.
+
+    Parameters
+    ----------
+    variable: netCDF4.Variable or ColumnarLayout.ColumnarVariable
+        The variable holding the records
+    indices: list of int
+        The distinct indices of the records to overwrite, all within the
+        variable
+    data: numpy.ndarray, pandas.DataFrame or list
+        The records, in the order of indices (see AsRecordArray)
+
+    """
+    records = AsRecordArray(data, RecordType(variable))
+    indices = numpy.asarray(indices).astype(numpy.int64).ravel()
+    if len(indices) == 0:
+        return
+    order = numpy.argsort(indices, kind="stable")
+    indices = indices[order]
+    records = records[order]
+    chunking = variable.chunking()
+    maxGap = chunking[0] if isinstance(chunking, list) else 1
+    breaks = numpy.flatnonzero(numpy.diff(indices) > maxGap) + 1
+    runStarts = numpy.concatenate(([0], breaks))
+    runStops = numpy.concatenate((breaks, [len(indices)]))
+    for runStart, runStop in zip(runStarts, runStops):
+        start = indices[runStart]
+        stop = indices[runStop - 1] + 1
+        if stop - start == runStop - runStart:
+            # The run has no gaps so its records are written as they are
+            variable[start:stop] = records[runStart:runStop]
+            continue
+        block = numpy.ma.getdata(variable[start:stop]).astype(records.dtype)
+        block[indices[runStart:runStop] - start] = records[runStart:runStop]
+        variable[start:stop] = block
+
+
+# Number of records read per block when scanning an element
+blockRows = 65536
+
+# Comparison operators accepted in where conditions
+whereOperators = {
+    "==": numpy.equal,
+    "!=": numpy.not_equal,
+    "<": numpy.less,
+    "<=": numpy.less_equal,
+    ">": numpy.greater,
+    ">=": numpy.greater_equal,
+}
+
+
+def IterBlocks(variable, start, stop, rows=None):
+    """
+    **IterBlocks** - Iterates over the records [start, stop) of a netCDF
+    variable as structured arrays of about rows records, with block
+    boundaries on HDF5 chunk boundaries so no chunk is decompressed twice
+
+    Parameters
+    ----------
+    variable: netCDF4.Variable
+        The variable holding the records
+    start, stop: int
+        The range of records to read
+    rows: int or None
+        The number of records per block (rounded to whole chunks), defaults
+        to blockRows
+
+    Yields
+    ------
+    (int, numpy.ndarray)
+        The index of the first record of the block and its records
+
+    """
+    rows = blockRows if rows is None else max(1, int(rows))
+    chunking = variable.chunking()
+    chunkRows = chunking[0] if isinstance(chunking, list) else 1
+    rows = max(1, rows // chunkRows) * chunkRows
+    start = max(0, int(start))
+    while start < stop:
+        blockStop = min(stop, (start // rows + 1) * rows)
+        yield start, numpy.ma.getdata(variable[start:blockStop])
+        start = blockStop
+
+
+def CopyGroup(source, target, types=None):
+    """
+    **CopyGroup** - Copies the attributes, dimensions, compound types,
+    variables (with their compression and chunking) and subgroups of a
+    netCDF group into an empty group, one block of blockRows records at a
+    time
+
+    Parameters
+    ----------
+    source: netCDF4.Group
+        The group to copy
+    target: netCDF4.Group
+        The empty group to copy into, of a writable file
+    types: dict {string: netCDF4.CompoundType} or None
+        The compound types already copied into the ancestors of target
+
+    """
+    types = dict(types or {})
+    target.setncatts({name: source.getncattr(name) for name in source.ncattrs()})
+    for name, dimension in source.dimensions.items():
+        target.createDimension(name, None if dimension.isunlimited() else len(dimension))
+    for name, compoundType in source.cmptypes.items():
+        types[name] = target.createCompoundType(compoundType.dtype, name)
+
+    for name, variable in source.variables.items():
+        datatype = variable.datatype
+        if isinstance(datatype, netCDF4.CompoundType):
+            datatype = types[datatype.name]
+        filters = variable.filters() or {}
+        chunking = variable.chunking()
+        attributes = variable.ncattrs()
+        copy = target.createVariable(
+            name,
+            datatype,
+            variable.dimensions,
+            zlib=bool(filters.get("zlib")),
+            complevel=filters.get("complevel") or 4,
+            shuffle=bool(filters.get("shuffle")),
+            fletcher32=bool(filters.get("fletcher32")),
+            chunksizes=None if chunking == "contiguous" else chunking,
+            fill_value=variable.getncattr("_FillValue") if "_FillValue" in attributes else None,
+        )
+        copy.setncatts(
+            {key: variable.getncattr(key) for key in attributes if key != "_FillValue"}
+        )
+        # Copy the stored values as they are, without masking or decoding
+        for var in (variable, copy):
+            var.set_auto_maskandscale(False)
+            var.set_auto_chartostring(False)
+        if not variable.dimensions:
+            copy.assignValue(variable.getValue())
+            continue
+        for start in range(0, len(variable), blockRows):
+            stop = min(len(variable), start + blockRows)
+            copy[start:stop] = variable[start:stop]
+
+    for name, group in source.groups.items():
+        CopyGroup(group, target.createGroup(name), types)
+
+
+def _EncodeValue(value, dtype):
+    # Byte string fields are compared with encoded strings
+    if dtype.kind == "S":
+        if isinstance(value, str):
+            return value.encode()
+        if isinstance(value, (list, tuple, set, numpy.ndarray)):
+            return [v.encode() if isinstance(v, str) else v for v in value]
+    return value
+
+
+def _IsCondition(condition):
+    return (
+        isinstance(condition, tuple)
+        and len(condition) == 2
+        and isinstance(condition[0], str)
+        and (condition[0] in whereOperators or condition[0] in ("in", "not in"))
+    )
+
+
+def _ConditionMask(column, condition):
+    if _IsCondition(condition):
+        operator, value = condition
+        value = _EncodeValue(value, column.dtype)
+        if operator == "in":
+            return numpy.isin(column, list(value))
+        if operator == "not in":
+            return ~numpy.isin(column, list(value))
+        return whereOperators[operator](column, value)
+    if isinstance(condition, list) and condition and all(_IsCondition(c) for c in condition):
+        # Several conditions on one field must all hold
+        mask = numpy.ones(len(column), dtype=bool)
+        for c in condition:
+            mask &= _ConditionMask(column, c)
+        return mask
+    if isinstance(condition, dict):
+        raise ValueError(f"Invalid where condition {condition!r}")
+    if isinstance(condition, (list, tuple, set, numpy.ndarray)):
+        return numpy.isin(column, list(_EncodeValue(condition, column.dtype)))
+    return column == _EncodeValue(condition, column.dtype)
+
+
+def CheckWhere(dtype, where):
+    """
+    **CheckWhere** - Checks that the fields and operators of a where query
+    exist for records of dtype
+
+    Raises
+    ------
+    ValueError
+        if a field is not in dtype or a condition is not understood
+
+    """
+    if not isinstance(where, dict):
+        raise ValueError("where must be a dictionary of {field: condition}")
+    for name, condition in where.items():
+        if name not in dtype.names:
+            raise ValueError(f"Unknown field '{name}' in where, expected one of {dtype.names}")
+        if isinstance(condition, tuple) and len(condition) == 2 and isinstance(condition[0], str):
+            if not _IsCondition(condition):
+                raise ValueError(f"Unknown operator '{condition[0]}' in where for '{name}'")
+
+
+def WhereMask(records, where):
+    """
+    **WhereMask** - The rows of a structured array of records matching every
+    condition of a where query, evaluated with vectorized numpy comparisons
+
+    Examples
+    --------
+    >>> mask = WhereMask(records, {"eventId": [3, 7], "posOnly": 1, "dip": (">", 60)})
+
+    Parameters
+    ----------
+    records: numpy.ndarray
+        The structured array of records
+    where: dict {field: condition}
+        Each condition is a value (equality), a list/set/array of values
+        (membership), an (operator, value) tuple with operator one of ==, !=,
+        <, <=, >, >=, in, not in, or a list of such tuples that must all hold
+
+    Returns
+    -------
+    numpy.ndarray of bool
+        True for the matching rows
+
+    """
+    mask = numpy.ones(len(records), dtype=bool)
+    for name, condition in where.items():
+        mask &= _ConditionMask(records[name], condition)
+    return mask
+
+
+def KeywordMask(records, keyword):
+    """
+    **KeywordMask** - The rows of a structured array of records with any
+    byte string field equal to keyword (no rows for elements without one)
+    """
+    mask = numpy.zeros(len(records), dtype=bool)
+    value = keyword.encode() if isinstance(keyword, str) else keyword
+    for name in records.dtype.names:
+        if records.dtype[name].kind == "S":
+            mask |= records[name] == value
+    return mask
+
+
+def CheckColumns(dtype, columns):
+    """
+    **CheckColumns** - Checks that columns are distinct fields of records of
+    dtype
+
+    Raises
+    ------
+    ValueError
+        if a column is not a field of dtype or is repeated
+
+    """
+    if isinstance(columns, str) or len(columns) == 0:
+        raise ValueError("columns must be a non empty list of field names")
+    for name in columns:
+        if name not in dtype.names:
+            raise ValueError(f"Unknown column '{name}', expected one of {dtype.names}")
+    if len(set(columns)) != len(columns):
+        raise ValueError(f"Repeated column in {list(columns)}")
+
+
+def ProjectedType(dtype, columns):
+    """
+    **ProjectedType** - The packed compound type holding only the fields
+    columns of dtype (in the order of columns)
+    """
+    return numpy.dtype([(name, dtype.fields[name][0]) for name in columns])
+
+
+def ProjectRecords(records, columns):
+    """
+    **ProjectRecords** - A packed structured array with only the fields
+    columns of records, so the other fields are dropped as soon as read
+    """
+    projected = numpy.empty(len(records), dtype=ProjectedType(records.dtype, columns))
+    for name in columns:
+        projected[name] = records[name]
+    return projected
+
+
+def IterMatching(variable, start, stop, match=None, columns=None, rows=None):
+    """
+    **IterMatching** - Iterates over the records in [start, stop) for which
+    match is True, one chunk aligned block (see IterBlocks) at a time
+
+    Parameters
+    ----------
+    variable: netCDF4.Variable
+        The variable holding the records
+    start, stop: int
+        The range of records to scan
+    match: function(numpy.ndarray) -> numpy.ndarray of bool, or None
+        The mask of the matching rows of a block, None to keep every row
+    columns: list of strings or None
+        The fields to keep, None for all of them
+    rows: int or None
+        The number of records read per block, defaults to blockRows
+
+    Yields
+    ------
+    (int, numpy.ndarray)
+        The index of the first record of the block and its matching records,
+        blocks without matching records are skipped
+
+    """
+    for blockStart, block in IterBlocks(variable, start, stop, rows):
+        if match is not None:
+            block = block[match(block)]
+            if len(block) == 0:
+                continue
+        if columns is not None:
+            block = ProjectRecords(block, columns)
+        yield blockStart, block
+
+
+def ReadMatching(variable, start, stop, match=None, asArray=False, columns=None):
+    """
+    **ReadMatching** - Reads the records in [start, stop) for which match is
+    True, one chunk aligned block at a time so that only the matching rows
+    (and requested columns) are kept in memory
+
+    Parameters
+    ----------
+    variable: netCDF4.Variable
+        The variable holding the records
+    start, stop: int
+        The range of records to scan
+    match: function(numpy.ndarray) -> numpy.ndarray of bool, or None
+        The mask of the matching rows of a block, such as from WhereMask,
+        None to keep every row
+    asArray: bool
+        Whether to return a structured array rather than a list
+    columns: list of strings or None
+        The fields to keep, None for all of them
+
+    Returns
+    -------
+    list of numpy.void or numpy.ndarray
+        The matching records in file order
+
+    """
+    blocks = [block for _, block in IterMatching(variable, start, stop, match, columns)]
+    if blocks:
+        records = numpy.concatenate(blocks)
+    elif columns is not None:
+        records = numpy.empty(0, dtype=ProjectedType(variable.dtype, columns))
+    else:
+        records = numpy.empty(0, dtype=variable.dtype)
+    return records if asArray else list(records)
+
+
+def ArrayToColumns(array):
+    """
+    **ArrayToColumns** - The columns of a structured array of records as a
+    dictionary of views (no data is copied)
+
+    Parameters
+    ----------
+    array: numpy.ndarray
+        A structured array such as returned by Get with asArray=True
+
+    Returns
+    -------
+    dict {field: numpy.ndarray}
+        A view of each field of the records keyed by field name
+
+    """
+    return {name: array[name] for name in array.dtype.names}
+
+
+# Low cardinality byte string fields that can be returned as categoricals
+categoricalFields = ("group", "supergroup", "unit", "propertyCode", "layer", "colour")
+
+
+def DecodeStrings(column, categorical=False):
+    """
+    **DecodeStrings** - Decodes a column of byte strings (such as a S120
+    field of a structured array) as a whole rather than string by string
+
+    Parameters
+    ----------
+    column: numpy.ndarray
+        The fixed length byte strings
+    categorical: bool
+        Whether to return a categorical, decoding each distinct string once
+
+    Returns
+    -------
+    numpy.ndarray or pandas.Categorical
+        The decoded strings
+
+    """
+    column = numpy.asarray(column)
+    if categorical:
+        codes, uniques = pandas.factorize(column)
+        return pandas.Categorical.from_codes(codes, [value.decode() for value in uniques])
+    width = max(1, int(numpy.char.str_len(column).max())) if column.size else 1
+    try:
+        # numpy casts ascii strings (the common case) without a python loop
+        return column.astype("S" + str(width)).astype("U" + str(width))
+    except UnicodeDecodeError:
+        return numpy.char.decode(column, "utf-8")
+
+
+def EncodeStrings(values, dtype, name=""):
+    """
+    **EncodeStrings** - Encodes a column of strings (or bytes) as the fixed
+    length byte strings of a S field as a whole rather than value by value
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        The strings, such as the values of a dataframe column
+    dtype: numpy.dtype
+        The byte string type of the field, such as S120
+    name: string
+        The name of the field, for error messages
+
+    Returns
+    -------
+    numpy.ndarray
+        The encoded strings of type dtype
+
+    Raises
+    ------
+    ValueError
+        if a string is longer than the field (and would be truncated)
+
+    """
+    try:
+        # numpy casts ascii strings (the common case) without a python loop
+        encoded = numpy.asarray(values, dtype="S")
+    except UnicodeEncodeError:
+        encoded = numpy.asarray(
+            [value.encode() if isinstance(value, str) else value for value in values],
+            dtype="S",
+        )
+    if encoded.dtype.itemsize > dtype.itemsize:
+        lengths = numpy.char.str_len(encoded)
+        if (lengths > dtype.itemsize).any():
+            row = int(numpy.argmax(lengths > dtype.itemsize))
+            raise ValueError(
+                f"Value of {name} in row {row} is {lengths[row]} bytes long which "
+                f"would be truncated to the {dtype.itemsize} bytes of the field"
+            )
+    return encoded.astype(dtype)
+
+
+def _CategoricalNames(dtype, categorical):
+    if categorical is True:
+        categorical = categoricalFields
+    elif not categorical:
+        categorical = ()
+    return [name for name in dtype.names if name in categorical and dtype[name].kind == "S"]
+
+
+def DecodedColumns(array, categorical=False):
+    """
+    **DecodedColumns** - The columns of a structured array of records as a
+    dictionary with byte string fields decoded (see DecodeStrings) and the
+    other fields as views
+
+    Parameters
+    ----------
+    array: numpy.ndarray
+        A structured array such as returned by Get with asArray=True
+    categorical: bool or list of strings
+        The byte string fields to return as categoricals, True for those of
+        categoricalFields
+
+    Returns
+    -------
+    dict {field: numpy.ndarray or pandas.Categorical}
+
+    """
+    categorical = _CategoricalNames(array.dtype, categorical)
+    columns = ArrayToColumns(array)
+    for name, column in columns.items():
+        if array.dtype[name].kind == "S":
+            columns[name] = DecodeStrings(column, name in categorical)
+    return columns
+
+
+def ArrayToDataframe(array):
+    """
+    **ArrayToDataframe** - A dataframe over the columns of a structured array
+    of records without copying them (byte string fields are not decoded)
+
+    Parameters
+    ----------
+    array: numpy.ndarray
+        A structured array such as returned by Get with asArray=True
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    return pandas.DataFrame(ArrayToColumns(array), copy=False)
+
+
 def ElementFromDataframe(loopFilename, df, element, loopCompoundType):
     # print('Entered ElementFromDataframe')
     """
@@ -280,7 +981,7 @@ def FromCsv(loopFilename, importPath, overwrite=False):
     return "All CSV files processed successfully"
 
 
-def ElementToDataframe(loopFilename, element, loopCompoundType):
+def ElementToDataframe(loopFilename, element, loopCompoundType, columns=None, categorical=False):
     """
     **ElementToCsv** - Exports one element of the loop project file
     to a csv file outputFilename
@@ -293,12 +994,48 @@ def ElementToDataframe(loopFilename, element, loopCompoundType):
         The name of the element to extract
     loopCompoundType: numpy.compoundType
         The numpy data structure that the element is stored in
+    columns: list of strings or None
+        The fields to extract, None for all of them
+    categorical: bool or list of strings
+        The byte string fields to return as pandas categoricals, True for
+        the low cardinality ones (see categoricalFields)
 
     Returns
     -------
 
     """
-    resp = LoopProjectFile.Get(loopFilename, element)
+    if columns is None:
+        resp = LoopProjectFile.Get(loopFilename, element, asArray=True)
+        return ResponseToDataframe(resp, loopCompoundType, categorical)
+    resp = LoopProjectFile.Get(loopFilename, element, asArray=True, columns=columns)
+    if not resp["errorFlag"]:
+        loopCompoundType = resp["value"].dtype
+    return ResponseToDataframe(resp, loopCompoundType, categorical)
+
+
+def ResponseToDataframe(resp, loopCompoundType, categorical=False):
+    """
+    **ResponseToDataframe** - Converts the response of a Get call on a
+    compound typed element into a dataframe, decoding byte string fields
+    column by column
+
+    Parameters
+    ----------
+    resp: dict {"errorFlag", "errorString"/"value"}
+        The response from LoopProjectFile.Get (with or without asArray)
+    loopCompoundType: numpy.compoundType
+        The numpy data structure that the element is stored in
+    categorical: bool or list of strings
+        The byte string fields to return as pandas categoricals, True for
+        the low cardinality ones (group, supergroup, unit, propertyCode,
+        layer and colour)
+
+    Returns
+    -------
+    pandas.DataFrame or None
+        None if the response holds an error
+
+    """
     if resp["errorFlag"]:
         print(resp["errorString"])
         return None
@@ -306,12 +1043,20 @@ def ElementToDataframe(loopFilename, element, loopCompoundType):
         columns = list(loopCompoundType.names)
         attr = resp.get("attributes",{})
 
-        df = pandas.DataFrame.from_records(resp["value"], columns=columns)
-
-        for name in columns:
-            if type(loopCompoundType[name]) is not numpy.dtypes.VoidDType:
-                df[name] = df[name].astype(loopCompoundType[name])
-        df = df.map(lambda x: x.decode() if isinstance(x, bytes) else x)
+        if isinstance(resp["value"], numpy.ndarray):
+            # Structured arrays (asArray=True) already hold typed columns
+            df = pandas.DataFrame(DecodedColumns(resp["value"], categorical), copy=False)
+        else:
+            df = pandas.DataFrame.from_records(resp["value"], columns=columns)
+            categorical = _CategoricalNames(loopCompoundType, categorical)
+            for name in columns:
+                if loopCompoundType[name].kind == "S":
+                    df[name] = DecodeStrings(
+                        numpy.asarray(df[name].tolist(), dtype=loopCompoundType[name]),
+                        name in categorical,
+                    )
+                elif type(loopCompoundType[name]) is not numpy.dtypes.VoidDType:
+                    df[name] = df[name].astype(loopCompoundType[name])
         if "headers" in attr:
             if len(attr["headers"]) != len(columns):
                 print("Number of headers does not match number of columns")
@@ -344,10 +1089,47 @@ def ElementToCsv(loopFilename, outputFilename, element, loopCompoundType):
 
     """
     df = ElementToDataframe(loopFilename, element, loopCompoundType)
-    if df:
+    if df is not None:
         df.to_csv(outputFilename)
 
 
+# The elements exported by ToCsv and ToParquet as (description, file name
+# without extension, element)
+exportElements = [
+    ("contacts", "contacts", "contacts"),
+    ("fault event log", "faultLog", "faultLog"),
+    ("fault observations", "faultObs", "faultObservations"),
+    ("fold event log", "foldLog", "foldLog"),
+    ("fold observations", "foldObs", "foldObservations"),
+    ("foliation event log", "foliationLog", "foliationLog"),
+    ("foliation observations", "foliationObs", "foliationObservations"),
+    ("discontinuity event log", "discontinuityLog", "discontinuityLog"),
+    ("discontinuity observations", "discontinuityObs", "discontinuityObservations"),
+    ("stratigraphic event log", "stratigraphicLog", "stratigraphicLog"),
+    ("stratigraphic observations", "stratigraphicObs", "stratigraphicObservations"),
+    ("event relationships", "eventRel", "eventRelationships"),
+]
+
+# The columns of the exported extents in order (geodesic, utm, depth, spacing)
+extentsColumns = [
+    "minLong",
+    "maxLong",
+    "minLat",
+    "maxLat",
+    "utmZone",
+    "isUtmZoneNorth",
+    "minEasting",
+    "maxEasting",
+    "minNorthing",
+    "maxNorthing",
+    "lowerBound",
+    "upperBound",
+    "spacingEastWest",
+    "spacingNorthSouth",
+    "spacingDepth",
+]
+
+
 def ToCsv(loopFilename, outputPath):
     """
     **ToCsv** - Exports all elements of the loop project file
@@ -378,14 +1160,25 @@ def ToCsv(loopFilename, outputPath):
         print("Output Path", outputPath, "does not exist. Creating now.")
         os.mkdir(outputPath)
 
+    # Extract all the elements with a single open of the project file
+    csvElements = [
+        (description, stem + ".csv", element, LoopProjectFile.GetElementDefinition(element).compoundType)
+        for description, stem, element in exportElements
+    ]
+    responses = LoopProjectFile.GetMany(
+        loopFilename,
+        ["version", "extents"] + [e[2] for e in csvElements],
+        **{e[2]: {"asArray": True} for e in csvElements},
+    )
+
     # Extract and print version
     print(loopFilename, ":")
-    resp = LoopProjectFile.Get(loopFilename, "version")
+    resp = responses["version"]
     if resp["errorFlag"]:
         print(loopFilename, "is not a loop project file")
         return
     print("  Exporting extents into", str(outputPath) + "extents.csv")
-    resp = LoopProjectFile.Get(loopFilename, "extents")
+    resp = responses["extents"]
     if resp["errorFlag"]:
         print(resp["errorString"])
         return
@@ -396,23 +1189,7 @@ def ToCsv(loopFilename, outputPath):
         print("    easting: ", resp["value"]["utm"][2], "-", resp["value"]["utm"][3])
         print("    northing:", resp["value"]["utm"][4], "-", resp["value"]["utm"][5])
         print("    altitude:", resp["value"]["depth"][0], "-", resp["value"]["depth"][1])
-        columns = [
-            "minLong",
-            "maxLong",
-            "minLat",
-            "maxLat",
-            "utmZone",
-            "isUtmZoneNorth",
-            "minEasting",
-            "maxEasting",
-            "minNorthing",
-            "maxNorthing",
-            "lowerBound",
-            "upperBound",
-            "spacingEastWest",
-            "spacingNorthSouth",
-            "spacingDepth",
-        ]
+        columns = extentsColumns
         df = pandas.DataFrame(columns=columns)
         df.loc[0] = list(
             resp["value"]["geodesic"]
@@ -424,108 +1201,224 @@ def ToCsv(loopFilename, outputPath):
         df.to_csv(str(outputPath) + "extents.csv")
 
     # Extract each element into separate csv files
-    print("  Exporting contacts into", str(outputPath) + "contacts.csv")
-    ElementToCsv(
-        loopFilename,
-        outputPath + "contacts.csv",
-        "contacts",
-        LoopProjectFile.contactObservationType,
-    )
+    for description, csvName, element, loopCompoundType in csvElements:
+        print("  Exporting", description, "into", str(outputPath) + csvName)
+        df = ResponseToDataframe(responses[element], loopCompoundType)
+        if df is not None:
+            df.to_csv(outputPath + csvName)
 
-    print("  Exporting fault event log into", str(outputPath) + "faultLog.csv")
-    ElementToCsv(
-        loopFilename,
-        outputPath + "faultLog.csv",
-        "faultLog",
-        LoopProjectFile.faultEventType,
-    )
-    print("  Exporting fault observations into", str(outputPath) + "faultObs.csv")
-    ElementToCsv(
-        loopFilename,
-        outputPath + "faultObs.csv",
-        "faultObservations",
-        LoopProjectFile.faultObservationType,
-    )
 
-    print("  Exporting fold event log into", str(outputPath) + "foldLog.csv")
-    ElementToCsv(
-        loopFilename,
-        outputPath + "foldLog.csv",
-        "foldLog",
-        LoopProjectFile.foldEventType,
-    )
-    print("  Exporting fold observations into", str(outputPath) + "foldObs.csv")
-    ElementToCsv(
-        loopFilename,
-        outputPath + "foldObs.csv",
-        "foldObservations",
-        LoopProjectFile.foldObservationType,
-    )
+def ElementToParquet(loopFilename, outputFilename, element, rowGroupRows=None):
+    """
+    **ElementToParquet** - Exports one table element of the loop project
+    file to a parquet file outputFilename, streaming it one row group per
+    chunk aligned block so large elements are never fully in memory (needs
+    pyarrow)
 
-    print("  Exporting foliation event log into", str(outputPath) + "foliationLog.csv")
-    ElementToCsv(
-        loopFilename,
-        outputPath + "foliationLog.csv",
-        "foliationLog",
-        LoopProjectFile.foliationEventType,
-    )
-    print("  Exporting foliation observations into", str(outputPath) + "foliationObs.csv")
-    ElementToCsv(
-        loopFilename,
-        outputPath + "foliationObs.csv",
-        "foliationObservations",
-        LoopProjectFile.foliationObservationType,
-    )
+    Parameters
+    ----------
+    loopFilename: string
+        The filename of the loop project file
+    outputFilename: string
+        The filename of the parquet file to write
+    element: string
+        The name of the element to extract
+    rowGroupRows: int or None
+        The number of records per row group, defaults to blockRows
 
-    print(
-        "  Exporting discontinuity event log into",
-        str(outputPath) + "discontinuityLog.csv",
-    )
-    ElementToCsv(
-        loopFilename,
-        outputPath + "discontinuityLog.csv",
-        "discontinuityLog",
-        LoopProjectFile.discontinuityEventType,
-    )
-    print(
-        "  Exporting discontinuity observations into",
-        str(outputPath) + "discontinuityObs.csv",
-    )
-    ElementToCsv(
-        loopFilename,
-        outputPath + "discontinuityObs.csv",
-        "discontinuityObservations",
-        LoopProjectFile.discontinuityObservationType,
-    )
+    Returns
+    -------
+    bool
+        Whether the element was exported (False if it is not in the file)
 
-    print(
-        "  Exporting stratigraphic event log into",
-        str(outputPath) + "stratigraphicLog.csv",
-    )
-    ElementToCsv(
-        loopFilename,
-        outputPath + "stratigraphicLog.csv",
-        "stratigraphicLog",
-        LoopProjectFile.stratigraphicLayerType,
-    )
-    print(
-        "  Exporting stratigraphic observations into",
-        str(outputPath) + "stratigraphicObs.csv",
+    """
+    import pyarrow.parquet as parquet
+    from LoopProjectFile import arrow
+
+    schema = arrow.ArrowSchema(LoopProjectFile.GetElementDefinition(element).compoundType)
+    batches = arrow.ToArrowBatches(loopFilename, element, rowGroupRows)
+    try:
+        # Read the first block before creating the file so missing elements
+        # leave no file behind
+        try:
+            batch = next(batches, None)
+        except Exception as e:
+            print(e)
+            return False
+        with parquet.ParquetWriter(outputFilename, schema) as writer:
+            while batch is not None:
+                writer.write_batch(batch)
+                batch = next(batches, None)
+        return True
+    finally:
+        batches.close()
+
+
+def ElementFromParquet(loopFilename, importFilename, element, rowGroupRows=None):
+    """
+    **ElementFromParquet** - Imports one table element of the loop project
+    file from a parquet file, one batch of rowGroupRows records at a time
+    (needs pyarrow)
+
+    The batches are written as they are read, so a batch that fails to
+    import leaves the ones before it written (see arrow.FromArrow).
+
+    Parameters
+    ----------
+    loopFilename: string
+        The filename of the loop project file
+    importFilename: string
+        The filename of the parquet file containing the element data
+    element: string
+        The name of the element to import
+    rowGroupRows: int or None
+        The number of records read per batch, defaults to blockRows
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"} or None
+        The response of the set, None if importFilename does not exist
+
+    """
+    import pyarrow.parquet as parquet
+    from LoopProjectFile import arrow
+
+    if not os.path.isfile(importFilename):
+        print(importFilename, "does not exist")
+        return None
+    batches = parquet.ParquetFile(importFilename).iter_batches(
+        batch_size=blockRows if rowGroupRows is None else rowGroupRows
     )
-    ElementToCsv(
-        loopFilename,
-        outputPath + "stratigraphicObs.csv",
-        "stratigraphicObservations",
-        LoopProjectFile.stratigraphicObservationType,
+    resp = arrow.FromArrow(loopFilename, element, batches)
+    if resp["errorFlag"]:
+        raise Exception(f"Error processing {importFilename}: {resp['errorString']}")
+    return resp
+
+
+def ToParquet(loopFilename, outputPath, rowGroupRows=None):
+    """
+    **ToParquet** - Exports the elements exported by ToCsv to parquet files
+    (named as the csv files with a .parquet extension) in the outputPath
+    directory, keeping the types of the fields exactly (needs pyarrow)
+
+    Parameters
+    ----------
+    loopFilename: string
+        The filename of the loop project file
+    outputPath: string
+        The path to where the parquet files containing the element data will
+        be exported
+    rowGroupRows: int or None
+        The number of records per row group, defaults to blockRows
+
+    Returns
+    -------
+
+    """
+    import pyarrow
+    import pyarrow.parquet as parquet
+
+    if not os.path.isfile(loopFilename):
+        print(loopFilename, "does not exist")
+        return
+
+    outputPath = outputPath.replace("\\", "/")
+    if outputPath[-1] != "/":
+        outputPath += "/"
+    if not os.path.isdir(outputPath):
+        print("Output Path", outputPath, "does not exist. Creating now.")
+        os.mkdir(outputPath)
+
+    resp = LoopProjectFile.Get(loopFilename, "extents")
+    if resp["errorFlag"]:
+        print(resp["errorString"])
+        return
+    print("  Exporting extents into", outputPath + "extents.parquet")
+    values = (
+        resp["value"]["geodesic"]
+        + resp["value"]["utm"]
+        + resp["value"]["depth"]
+        + resp["value"]["spacing"]
     )
+    extents = {name: [value] for name, value in zip(extentsColumns, values)}
+    extents["epsg"] = [resp["value"]["epsg"]]
+    parquet.write_table(pyarrow.table(extents), outputPath + "extents.parquet")
+
+    for description, stem, element in exportElements:
+        print("  Exporting", description, "into", outputPath + stem + ".parquet")
+        ElementToParquet(loopFilename, outputPath + stem + ".parquet", element, rowGroupRows)
 
-    print("  Exporting event relationships into", str(outputPath) + "eventRel.csv")
-    ElementToCsv(
+
+def FromParquet(loopFilename, importPath, overwrite=False, rowGroupRows=None):
+    """
+    **FromParquet** - Creates a loop project file from the parquet files
+    written by ToParquet in importPath (needs pyarrow)
+
+    Parameters
+    ----------
+    loopFilename: string
+        The filename of the loop project file
+    importPath: string
+        The path to the parquet files containing the element data
+    overwrite: bool (default=False)
+        A flag to indicate whether to overwrite a pre-existing loop
+        project file
+    rowGroupRows: int or None
+        The number of records read per batch, defaults to blockRows
+
+    Returns
+    -------
+    string
+        A success message
+
+    Raises
+    ------
+    Exception
+        if the loop project file cannot be created or the extents or an
+        element cannot be imported
+
+    """
+    import pyarrow.parquet as parquet
+
+    if os.path.isfile(loopFilename):
+        if overwrite:
+            os.remove(loopFilename)
+        else:
+            print(loopFilename, "already exists and overwrite not set", file=sys.stderr)
+            raise Exception("already exists and overwrite not set")
+
+    importPath = importPath.replace("\\", "/")
+    if importPath[-1] != "/":
+        importPath += "/"
+    if not os.path.isdir(importPath):
+        print("Import path", importPath, "does not exist", file=sys.stderr)
+        raise Exception(f"Import path {importPath} does not exist")
+    if not os.path.isfile(importPath + "extents.parquet"):
+        print(importPath + "extents.parquet", "does not exist")
+        raise Exception("extents.parquet is required")
+
+    print("Creating", loopFilename)
+    resp = LoopProjectFile.CreateBasic(loopFilename)
+    if resp["errorFlag"]:
+        raise Exception(f"Error creating {loopFilename}: {resp['errorString']}")
+    extents = parquet.read_table(importPath + "extents.parquet").to_pylist()[0]
+    values = [extents[name] for name in extentsColumns]
+    resp = LoopProjectFile.Set(
         loopFilename,
-        outputPath + "eventRel.csv",
-        "eventRelationships",
-        LoopProjectFile.eventRelationshipType,
+        "extents",
+        geodesic=values[0:4],
+        utm=values[4:10],
+        depth=values[10:12],
+        spacing=values[12:15],
+        epsg=extents["epsg"],
     )
+    if resp["errorFlag"]:
+        raise Exception(f"Error processing {importPath}extents.parquet: {resp['errorString']}")
+
+    for _, stem, element in exportElements:
+        print("  Importing from", importPath + stem + ".parquet", "into project file")
+        ElementFromParquet(loopFilename, importPath + stem + ".parquet", element, rowGroupRows)
+    return "All parquet files processed successfully"
 
 
 def handleLoopProjectFile(file, shared_path="/shared"):
@@ -536,10 +1429,10 @@ def handleLoopProjectFile(file, shared_path="/shared"):
         filepath = os.path.join(shared_path, filename)
         if os.path.exists(filepath):
             raise Exception(f"File {filename} already exists in the shared path.")
-        file.save(filepath)
-        if not LoopProjectFile.CheckFileValid(filepath):
-            os.remove(filepath)
+        # Validate the upload in memory so invalid files never reach disk
+        if not LoopProjectFile.CheckFileValid(file):
             raise Exception("Uploaded file is not a valid LoopProjectFile.")
+        file.save(filepath)
         return
     else:
         raise Exception("No file was provided for upload.")
@@ -1,8 +1,22 @@
 from .LoopProjectFile import (
     CreateBasic, # noqa: F401
+    CreateInMemory, # noqa: F401
     Get, # noqa: F401
+    GetArray, # noqa: F401
+    IterElement, # noqa: F401
     Set, # noqa: F401
+    GetMany, # noqa: F401
+    SetMany, # noqa: F401
+    Upsert, # noqa: F401
+    UpsertElement, # noqa: F401
+    GetElement, # noqa: F401
+    SetElement, # noqa: F401
+    Session, # noqa: F401
+    MemorySession, # noqa: F401
+    Batch, # noqa: F401
+    ElementWriter, # noqa: F401
     OpenProjectFile, # noqa: F401
+    OpenProjectBuffer, # noqa: F401
     CheckFileValid, # noqa: F401
     faultEventType, # noqa: F401
     foldEventType, # noqa: F401
@@ -42,10 +56,42 @@ from .LoopProjectFileUtils import (
     FromCsv, # noqa: F401
     ElementToCsv, # noqa: F401
     ElementFromCsv, # noqa: F401
+    ToParquet, # noqa: F401
+    FromParquet, # noqa: F401
+    ElementToParquet, # noqa: F401
+    ElementFromParquet, # noqa: F401
     ElementToDataframe, # noqa: F401
     ElementFromDataframe, # noqa: F401
+    ArrayToColumns, # noqa: F401
+    ArrayToDataframe, # noqa: F401
 )  
 
+from .ElementRegistry import (
+    RegisterElement, # noqa: F401
+    GetElementDefinition, # noqa: F401
+    ElementNames, # noqa: F401
+)
+
+from .FileLocks import (
+    ReadWriteLock, # noqa: F401
+    GetFileLock, # noqa: F401
+)
+
+from .HandlePool import (
+    HandlePool, # noqa: F401
+    GetHandlePool, # noqa: F401
+    ReleaseFile, # noqa: F401
+)
+
 from .version import LoopVersion  # noqa: F401
 from .version import __version__ # noqa: F401
 from .projectfile import ProjectFile  # noqa: F401
+
+
+def __getattr__(name):
+    # The Arrow interop needs the optional pyarrow, only imported when used
+    if name in ("ToArrow", "ToArrowBatches", "FromArrow"):
+        from LoopProjectFile import arrow
+
+        return getattr(arrow, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
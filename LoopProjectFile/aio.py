@@ -0,0 +1,206 @@
+"""
+Awaitable equivalents of the Loop Project File accessors for asyncio callers
+
+The blocking netCDF I/O runs on a bounded thread pool and calls on the same
+file are serialized by a per file asyncio lock so that concurrent coroutines
+never interleave HDF5 calls on one file.
+
+Examples
+--------
+>>> from LoopProjectFile import aio
+>>> resp = await aio.Get("test.loop3d", "faultLog")
+>>> project = aio.AsyncProjectFile("test.loop3d")
+>>> faultLog = await project.faultLog
+>>> await project.set("faultLog", faultLog)
+"""
+import asyncio
+import concurrent.futures
+import functools
+import os
+import threading
+import weakref
+
+import LoopProjectFile
+from LoopProjectFile.projectfile import ProjectFile
+
+maxWorkers = 4
+
+_executor = None
+_executorLock = threading.Lock()
+# Per event loop dictionaries of per file locks (asyncio locks belong to a loop)
+_fileLocks = weakref.WeakKeyDictionary()
+
+
+def GetExecutor():
+    """
+    **GetExecutor** - The bounded thread pool the blocking I/O runs on,
+    created with maxWorkers threads on first use
+
+    Returns
+    -------
+    concurrent.futures.Executor
+
+    """
+    global _executor
+    with _executorLock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=maxWorkers, thread_name_prefix="LoopProjectFile"
+            )
+        return _executor
+
+
+def SetExecutor(executor):
+    """
+    **SetExecutor** - Replaces the executor the blocking I/O runs on (the
+    previous executor is not shut down)
+
+    Parameters
+    ----------
+    executor: concurrent.futures.Executor or None
+        The executor to use, None to create a default one on next use
+
+    """
+    global _executor
+    with _executorLock:
+        _executor = executor
+
+
+def _FileKey(filename):
+    if isinstance(filename, LoopProjectFile.Session):
+        filename = filename.filename
+    if isinstance(filename, str):
+        return os.path.abspath(filename)
+    # Buffers and file-like objects are serialized per object
+    return id(filename)
+
+
+def FileLock(filename):
+    """
+    **FileLock** - The asyncio lock serializing I/O on filename in the
+    running event loop
+
+    Returns
+    -------
+    asyncio.Lock
+
+    """
+    loop = asyncio.get_running_loop()
+    locks = _fileLocks.setdefault(loop, {})
+    return locks.setdefault(_FileKey(filename), asyncio.Lock())
+
+
+async def _run(filename, func, *args, **kwargs):
+    async with FileLock(filename):
+        return await asyncio.get_running_loop().run_in_executor(
+            GetExecutor(), functools.partial(func, *args, **kwargs)
+        )
+
+
+async def Get(filename, element, **kwargs):
+    """
+    **Get** - Awaitable LoopProjectFile.Get run on the executor
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"/"value"}
+        errorString exist and contains error message only when errorFlag is
+        True otherwise the extracted value is in the "value" keyword
+
+    """
+    return await _run(filename, LoopProjectFile.Get, filename, element, **kwargs)
+
+
+async def GetMany(filename, elements, **kwargs):
+    """
+    **GetMany** - Awaitable LoopProjectFile.GetMany run on the executor
+
+    Returns
+    -------
+    dict {element: {"errorFlag", "errorString"/"value"}}
+
+    """
+    return await _run(filename, LoopProjectFile.GetMany, filename, elements, **kwargs)
+
+
+async def Set(filename, element, **kwargs):
+    """
+    **Set** - Awaitable LoopProjectFile.Set run on the executor
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    return await _run(filename, LoopProjectFile.Set, filename, element, **kwargs)
+
+
+class AsyncProjectFile:
+    """
+    **AsyncProjectFile** - Awaitable accessors of a ProjectFile whose reads
+    and writes run on the executor, serialized with the other aio calls on
+    the same file
+
+    Elements and properties of the ProjectFile are read by awaiting the
+    attribute of the same name (or get) and written with set.
+
+    Examples
+    --------
+    >>> project = AsyncProjectFile("test.loop3d")
+    >>> extents = await project.extents
+    >>> faultLog = await project.get("faultLog")
+    >>> await project.set("faultLog", faultLog)
+
+    Parameters
+    ----------
+    project: string or ProjectFile
+        The project file (or the name of it) to access
+
+    """
+
+    def __init__(self, project):
+        if not isinstance(project, ProjectFile):
+            project = ProjectFile(project)
+        self.project = project
+
+    def _isProperty(self, name):
+        return isinstance(getattr(type(self.project), name, None), property)
+
+    def _get(self, name):
+        if self._isProperty(name):
+            return getattr(self.project, name)
+        return self.project[name]
+
+    def _set(self, name, value):
+        if self._isProperty(name):
+            setattr(self.project, name, value)
+        else:
+            self.project[name] = value
+
+    async def get(self, name):
+        """
+        **get** - Reads an element or property of the project file
+        """
+        return await _run(self.project.project_filename, self._get, name)
+
+    async def set(self, name, value):
+        """
+        **set** - Writes an element or property of the project file
+        """
+        return await _run(self.project.project_filename, self._set, name, value)
+
+    async def close(self):
+        """
+        **close** - Releases the project file (see ProjectFile.close)
+        """
+        return await _run(self.project.project_filename, self.project.close)
+
+    def __getattr__(self, name):
+        # Only reached for names not defined on this class
+        if name.startswith("_") or "project" not in self.__dict__:
+            raise AttributeError(name)
+        if self._isProperty(name) or LoopProjectFile.GetElementDefinition(name) is not None:
+            return self.get(name)
+        raise AttributeError(name)
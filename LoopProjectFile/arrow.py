@@ -0,0 +1,280 @@
+"""
+Apache Arrow interop for the table elements of a Loop Project File
+
+Elements are read straight from their structured arrays into Arrow record
+batches, one chunk aligned block at a time (see LoopProjectFile.IterElement),
+without going through lists of records or pandas. Numeric fields become
+Arrow arrays over the block's contiguous columns and byte string fields
+become dictionary encoded string arrays. This module needs the optional
+pyarrow package (pip install LoopProjectFile[arrow]).
+
+Examples
+--------
+>>> from LoopProjectFile import arrow
+>>> table = arrow.ToArrow("test.loop3d", "drillholeObservations")
+>>> for batch in arrow.ToArrowBatches("test.loop3d", "drillholeObservations"):
+>>>     writer.write_batch(batch)
+>>> resp = arrow.FromArrow("copy.loop3d", "drillholeObservations", table)
+"""
+import numpy
+import pandas
+
+try:
+    import pyarrow
+except ImportError as e:
+    raise ImportError(
+        "LoopProjectFile.arrow needs pyarrow, install it with pip install pyarrow"
+    ) from e
+
+import LoopProjectFile
+import LoopProjectFile.ElementRegistry as ElementRegistry
+import LoopProjectFile.LoopProjectFileUtils as LoopProjectFileUtils
+
+# Byte string fields are dictionary encoded strings
+stringType = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+
+
+def _TableDefinition(element):
+    definition = ElementRegistry.GetElementDefinition(element)
+    if definition is None or not definition.isTable:
+        raise ValueError(f"Element '{element}' is not stored as a table")
+    return definition
+
+
+def _OutputType(element, columns):
+    # The compound type of the records read with the columns option
+    loopCompoundType = _TableDefinition(element).compoundType
+    if columns is not None:
+        LoopProjectFileUtils.CheckColumns(loopCompoundType, columns)
+        loopCompoundType = LoopProjectFileUtils.ProjectedType(loopCompoundType, columns)
+    return loopCompoundType
+
+
+def ArrowSchema(loopCompoundType):
+    """
+    **ArrowSchema** - The Arrow schema of the records of a compound type
+
+    Parameters
+    ----------
+    loopCompoundType: numpy.compoundType
+        The numpy data structure that the element is stored in
+
+    Returns
+    -------
+    pyarrow.Schema
+        One field per field of the compound type, byte strings as dictionary
+        encoded strings, with the numpy type of each field in its "numpyType"
+        metadata
+
+    """
+    fields = []
+    for name in loopCompoundType.names:
+        fieldType = loopCompoundType[name]
+        metadata = {"numpyType": fieldType.str}
+        if fieldType.kind == "S":
+            fields.append(pyarrow.field(name, stringType, metadata=metadata))
+        else:
+            fields.append(
+                pyarrow.field(name, pyarrow.from_numpy_dtype(fieldType), metadata=metadata)
+            )
+    return pyarrow.schema(fields)
+
+
+def _StringArray(column):
+    codes, uniques = pandas.factorize(column)
+    dictionary = LoopProjectFileUtils.DecodeStrings(numpy.asarray(uniques, dtype=column.dtype))
+    return pyarrow.DictionaryArray.from_arrays(
+        pyarrow.array(codes.astype(numpy.int32)), pyarrow.array(dictionary, pyarrow.string())
+    )
+
+
+def ArrayToRecordBatch(array, schema=None):
+    """
+    **ArrayToRecordBatch** - Converts a structured array of records into an
+    Arrow record batch, column by column
+
+    Parameters
+    ----------
+    array: numpy.ndarray
+        A structured array such as returned by GetArray
+    schema: pyarrow.Schema or None
+        The schema of the batch, defaults to ArrowSchema(array.dtype)
+
+    Returns
+    -------
+    pyarrow.RecordBatch
+
+    """
+    if schema is None:
+        schema = ArrowSchema(array.dtype)
+    columns = []
+    for name in array.dtype.names:
+        if array.dtype[name].kind == "S":
+            columns.append(_StringArray(array[name]))
+        else:
+            # Arrow wraps contiguous numeric columns without copying them
+            columns.append(pyarrow.array(numpy.ascontiguousarray(array[name])))
+    return pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def RecordBatchToArray(batch, loopCompoundType):
+    """
+    **RecordBatchToArray** - Converts an Arrow record batch (or table) into a
+    structured array of a compound type, matching columns by name
+
+    Raises
+    ------
+    ValueError
+        if a field is missing, holds nulls or a value does not fit its field
+        (see LoopProjectFile.ConvertDataFrame)
+
+    """
+    data = numpy.empty(batch.num_rows, dtype=loopCompoundType)
+    for name in loopCompoundType.names:
+        if name not in batch.schema.names:
+            raise ValueError(f"Arrow data has no column {name}")
+        column = batch.column(name)
+        if isinstance(column, pyarrow.ChunkedArray):
+            column = column.combine_chunks()
+        if column.null_count:
+            raise ValueError(f"Column {name} of the arrow data holds nulls")
+        fieldType = loopCompoundType[name]
+        if pyarrow.types.is_dictionary(column.type):
+            # Encode each distinct string once
+            dictionary = column.dictionary.to_numpy(zero_copy_only=False)
+            if fieldType.kind == "S":
+                dictionary = LoopProjectFileUtils.EncodeStrings(dictionary, fieldType, name)
+            data[name] = numpy.asarray(dictionary)[column.indices.to_numpy(zero_copy_only=False)]
+            continue
+        values = column.to_numpy(zero_copy_only=False)
+        if fieldType.kind == "S":
+            data[name] = LoopProjectFileUtils.EncodeStrings(values, fieldType, name)
+        else:
+            data[name] = values
+    return data
+
+
+def ToArrowBatches(filename, element, chunkRows=None, **kwargs):
+    """
+    **ToArrowBatches** - Iterates over a table element as Arrow record
+    batches of about chunkRows records aligned to its HDF5 chunks
+
+    Parameters
+    ----------
+    filename: string, bytes, file-like object or Session
+        The Loop Project File to read
+    element: string
+        The name of a table element
+    chunkRows: int or None
+        The number of records per batch, defaults to
+        LoopProjectFileUtils.blockRows
+    kwargs: dict
+        The where, columns, keyword and indexRange options of Get
+
+    Yields
+    ------
+    pyarrow.RecordBatch
+
+    """
+    schema = ArrowSchema(_OutputType(element, kwargs.get("columns")))
+    for records in LoopProjectFile.IterElement(filename, element, chunkRows, **kwargs):
+        yield ArrayToRecordBatch(records, schema)
+
+
+def ToArrow(filename, element, chunkRows=None, **kwargs):
+    """
+    **ToArrow** - Reads a table element as an Arrow table made of one record
+    batch per chunk aligned block (see ToArrowBatches)
+
+    Returns
+    -------
+    pyarrow.Table
+
+    Raises
+    ------
+    ValueError
+        if element is not a table element or the options name an unknown
+        field or operator
+    Exception
+        if the file or element cannot be read
+
+    """
+    schema = ArrowSchema(_OutputType(element, kwargs.get("columns")))
+    batches = list(ToArrowBatches(filename, element, chunkRows, **kwargs))
+    return pyarrow.Table.from_batches(batches, schema=schema)
+
+
+def FromArrow(filename, element, table, append=False):
+    """
+    **FromArrow** - Writes Arrow data into a table element, one record batch
+    at a time for appendable elements
+
+    A table or record batch is converted (and checked against the element)
+    before anything is written, so one that does not match leaves the
+    element unchanged. An iterable of batches is converted and written as it
+    is consumed to bound memory use, so it is not atomic: a batch that fails
+    leaves the batches before it written (replacing or appended to the
+    element).
+
+    Parameters
+    ----------
+    filename: string or Session
+        The Loop Project File to write
+    element: string
+        The name of a table element
+    table: pyarrow.Table, pyarrow.RecordBatch or iterable of record batches
+        The records, with a column named after each field of the element
+    append: bool
+        Whether to append to the records already in the element
+
+    Returns
+    -------
+    dict {"errorFlag", "errorString"}
+        errorString exist and contains error message only when errorFlag is
+        True
+
+    """
+    definition = _TableDefinition(element)
+    if isinstance(table, pyarrow.Table):
+        batches = table.to_batches()
+    elif isinstance(table, pyarrow.RecordBatch):
+        batches = [table]
+    else:
+        batches = None
+    if append and not definition.appendable:
+        errStr = "(ERROR) Element '" + element + "' cannot be appended to"
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
+    try:
+        if batches is not None:
+            # Already in memory, so convert everything before the first write
+            arrays = [RecordBatchToArray(batch, definition.compoundType) for batch in batches]
+        else:
+            arrays = (RecordBatchToArray(batch, definition.compoundType) for batch in table)
+        if not definition.appendable:
+            # Written in one set as the element is replaced on every set
+            data = list(arrays)
+            data = numpy.concatenate(data) if data else numpy.empty(0, definition.compoundType)
+            return LoopProjectFile.Set(filename, element, data=data)
+        session = filename
+        if not isinstance(filename, LoopProjectFile.Session):
+            session = LoopProjectFile.Session(filename, "a").open()
+        try:
+            name = element + "Append" if append else element
+            response = {"errorFlag": False}
+            for data in arrays:
+                response = session.Set(name, data=data)
+                if response["errorFlag"]:
+                    return response
+                name = element + "Append"
+            if name == element:
+                # No batches, so no records
+                response = session.Set(element, data=numpy.empty(0, definition.compoundType))
+            return response
+        finally:
+            if session is not filename:
+                session.close()
+    except ValueError as e:
+        errStr = "(ERROR) " + str(e)
+        print(errStr)
+        return {"errorFlag": True, "errorString": errStr}
@@ -1,36 +1,54 @@
 # from multiprocessing.sharedctypes import Value
 from .LoopProjectFile import (
-    Get,
     Set,
+    Session,
+    MemorySession,
+    Batch,
+    ConvertDataFrame,
     CheckFileValid,
     CheckFileIsLoopProjectFile,
+    IsFileBuffer,
+    ReadFileBuffer,
+    FileDisplayName,
+    IterElement,
+    Upsert,
 )  # , CreateBasic, OpenProjectFile
-from .LoopProjectFileUtils import ElementFromDataframe  # , ElementFromDataframe
+from .LoopProjectFileUtils import (
+    ResponseToDataframe,
+    CheckWhere,
+    CheckColumns,
+    ProjectRecords,
+)
+from .ElementRegistry import ElementNames, GetElementDefinition
+from .FileLocks import ReadingFile
 import LoopProjectFile
 import pandas as pd
 import numpy as np
+import collections.abc
+import contextlib
+import copy
+import os
+import threading
 
-compoundTypeMap = {
-    "version": None,
-    "extents": None,
-    "strModel": None,
-    "faultObservations": LoopProjectFile.faultObservationType,
-    "foldObservations": LoopProjectFile.foldObservationType,
-    "foliationObservations": LoopProjectFile.foliationObservationType,
-    "discontinuityObservations": LoopProjectFile.discontinuityObservationType,
-    "stratigraphicObservations": LoopProjectFile.stratigraphicObservationType,
-    "contacts": LoopProjectFile.contactObservationType,
-    "stratigraphicLog": LoopProjectFile.stratigraphicLayerType,
-    "stratigraphicThicknesses": LoopProjectFile.stratigraphicThicknessType,
-    "faultLog": LoopProjectFile.faultEventType,
-    "foldLog": None,
-    "foliationLog": None,
-    "discontinuityLog": None,
-    "dataCollectionConfig": None,
-    "dataCollectionSources": None,
-    "eventRelationships": LoopProjectFile.eventRelationshipType,
-    "structuralModelsConfig": None,
-}
+class _CompoundTypeMap(collections.abc.Mapping):
+    # Compound type of each registered element (None if not stored as a
+    # table), looked up in the registry on access so elements registered
+    # after import are included
+
+    def __getitem__(self, element):
+        definition = GetElementDefinition(element)
+        if definition is None:
+            raise KeyError(element)
+        return definition.compoundType
+
+    def __iter__(self):
+        return iter(ElementNames())
+
+    def __len__(self):
+        return len(ElementNames())
+
+
+compoundTypeMap = _CompoundTypeMap()
 
 
 class ProjectFile:
@@ -39,17 +57,33 @@ class ProjectFile:
 
         Parameters
         ----------
-        project_filename : string
-            name/path of projectfile
+        project_filename : string, bytes, file-like object or Session
+            name/path of projectfile, its contents (opened read only in
+            memory) or an open Session (such as an in memory project) to read
+            and write through
 
         Raises
         ------
         BaseException
             Exception if project file doesn't exist
         """
-        valid = CheckFileIsLoopProjectFile(project_filename)
-        if valid is False:
-            raise BaseException("Project file does not exist")
+        # Open session backing the project instead of a file on disk
+        self._openSession = None
+        if isinstance(project_filename, Session):
+            if not project_filename.isOpen:
+                raise BaseException("Project session is not open")
+            self._openSession = project_filename
+            project_filename = project_filename.filename
+        elif IsFileBuffer(project_filename):
+            try:
+                self._openSession = Session(ReadFileBuffer(project_filename)).open()
+            except Exception as e:
+                raise BaseException(f"Project file is not a LoopProjectFile: {e}")
+            project_filename = FileDisplayName(project_filename)
+        else:
+            valid = CheckFileIsLoopProjectFile(project_filename)
+            if valid is False:
+                raise BaseException("Project file does not exist")
         self.project_filename = project_filename
         self.element_names = [
             "version",
@@ -72,6 +106,203 @@ class ProjectFile:
             "structuralModelsConfig",
         ]
         self.compoundTypeMap = compoundTypeMap
+        # Per element cache of Get values, dropped on writes or when the
+        # file's modification time or size changes
+        self._fileStamp = None
+        self._cache = {}
+        self._batch = None
+        # The cache is shared by the threads using this object
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Release the project file.
+
+        The file is only open while an element is read, so other handles
+        can write to it at any time and nothing needs closing. Cached element
+        values are kept and are dropped on the next access if the file's
+        modification time or size has changed in the meantime.
+        """
+
+    def _invalidate(self):
+        with self._lock:
+            self._fileStamp = None
+            self._cache = {}
+
+    def _file_stamp(self):
+        stat = os.stat(self.project_filename)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _get(self, element):
+        """Get the response for element from the cache or the file
+
+        Parameters
+        ----------
+        element : string
+            name of the element to get
+
+        Returns
+        -------
+        dict {"errorFlag", "errorString"/"value"}
+            the Get response for element, table elements as structured arrays
+        """
+        with self._lock:
+            if self._openSession is not None:
+                if element not in self._cache:
+                    self._cache[element] = self._openSession.Get(element, asArray=True)
+                return self._cache[element]
+            with ReadingFile(self.project_filename):
+                stamp = self._file_stamp()
+                if stamp != self._fileStamp:
+                    # File changed on disk since the values were cached
+                    self._invalidate()
+                    self._fileStamp = stamp
+                if element not in self._cache:
+                    with self._reader() as session:
+                        self._cache[element] = session.Get(element, asArray=True)
+                return self._cache[element]
+
+    @contextlib.contextmanager
+    def _reader(self):
+        """A session open for one read. Used holding the lock and the file's
+        read lock.
+
+        The file is closed again after the read since HDF5 refuses to open a
+        file for writing while another handle has it open.
+        """
+        session = Session(self.project_filename).open()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Buffer every write made in the block and commit them atomically.
+
+        The writes are applied in one write session to a temporary copy of
+        the project file which then replaces it, so the file on disk is
+        either fully updated or left untouched. Reads inside the block see
+        the file as it was before the block.
+
+        Examples
+        --------
+        >>> with project.batch():
+        >>>     project.faultLog = faultLog
+        >>>     project.faultObservations = faultObservations
+        """
+        if self._batch is not None:
+            # Nested batches join the outer one
+            yield self._batch
+            return
+        if self._openSession is not None:
+            # Nothing is on disk until persisted so writes go straight through
+            yield self._openSession
+            return
+        self._batch = Batch(self.project_filename)
+        try:
+            yield self._batch
+        except BaseException:
+            self._batch.discard()
+            raise
+        else:
+            self._invalidate()
+            response = self._batch.commit()
+            self._invalidate()
+            if response["errorFlag"]:
+                raise Exception(response["errorString"])
+        finally:
+            self._batch = None
+
+    def _set(self, element, **kwargs):
+        """Set element through the batch, the open session or the file
+
+        Raises
+        ------
+        Exception
+            if the element could not be written
+        """
+        with self._lock:
+            if self._batch is not None:
+                response = self._batch.Set(element, **kwargs)
+            elif self._openSession is not None:
+                self._cache = {}
+                response = self._openSession.Set(element, **kwargs)
+            else:
+                try:
+                    response = Set(self.project_filename, element, **kwargs)
+                finally:
+                    self._invalidate()
+        if response["errorFlag"]:
+            raise Exception(response["errorString"])
+        return response
+
+    def upsert(self, element, records, key="eventId") -> dict:
+        """Update the records of a table element by key and append the new ones
+
+        Records whose key matches a record of the element overwrite it in
+        place, the others are appended, and the rest of the element is not
+        rewritten (see LoopProjectFile.Upsert). A matching record is replaced
+        as a whole rather than merged field by field, so pass complete rows.
+
+        Examples
+        --------
+        >>> log = project.faultLog
+        >>> fault = log[log["eventId"] == 3].assign(avgDisplacement=250.0)
+        >>> project.upsert("faultLog", fault)
+
+        Parameters
+        ----------
+        element : string
+            name of a table element, such as "faultLog"
+        records : pd.DataFrame or np.ndarray
+            the records, a dataframe with a column named after each field of
+            the element or a structured array of its compound type
+        key : string or list of strings
+            field(s) identifying a record, such as "eventId", "layerId" or
+            "collarId"
+
+        Returns
+        -------
+        dict
+            the number of records "updated" and "inserted"
+
+        Raises
+        ------
+        TypeError
+            if the element is not stored as a table
+        ValueError
+            if a dataframe lacks a column of the element
+        Exception
+            if the upsert fails or is called within a batch
+        """
+        loopCompoundType = self._compound_type(element)
+        if loopCompoundType is None:
+            raise TypeError(f"{element} is not stored as a table")
+        if isinstance(records, pd.DataFrame):
+            names = loopCompoundType.names
+            if not pd.Index(names).isin(records.columns).all():
+                raise ValueError("Dataframe must have columns: {}".format(names))
+            records = ConvertDataFrame(records.loc[:, names], loopCompoundType)
+        with self._lock:
+            if self._batch is not None:
+                raise Exception("upsert cannot be buffered in a batch")
+            if self._openSession is not None:
+                self._cache = {}
+                resp = Upsert(self._openSession, element, records, key=key)
+            else:
+                try:
+                    resp = Upsert(self.project_filename, element, records, key=key)
+                finally:
+                    self._invalidate()
+        if resp["errorFlag"]:
+            raise Exception(resp["errorString"])
+        return resp["value"]
 
     @classmethod
     def new(cls, filename):
@@ -91,6 +322,51 @@ class ProjectFile:
         projectfile = ProjectFile(filename)
         return projectfile
 
+    @classmethod
+    def new_in_memory(cls):
+        """Create a new project held in memory until persisted to disk.
+
+        Examples
+        --------
+        >>> project = ProjectFile.new_in_memory()
+        >>> project.extents = extents
+        >>> project.faultLog = faultLog
+        >>> project.persist("test.loop3d")
+
+        Returns
+        -------
+        ProjectFile
+            the new projectfile class backed by a MemorySession
+        """
+        return ProjectFile(MemorySession())
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the project is held in memory rather than on disk"""
+        return isinstance(self._openSession, MemorySession)
+
+    def persist(self, filename):
+        """Write an in memory project to disk and continue on the written file.
+
+        Parameters
+        ----------
+        filename : string
+            name/path of the projectfile to write
+
+        Raises
+        ------
+        Exception
+            if the project is not in memory or could not be written
+        """
+        if not self.in_memory:
+            raise Exception("Only in memory projects can be persisted")
+        response = self._openSession.persist(filename)
+        if response["errorFlag"]:
+            raise Exception(response["errorString"])
+        self._openSession = None
+        self.project_filename = filename
+        self._invalidate()
+
     @property
     def valid(self) -> bool:
         """Check if the project file is valid
@@ -103,6 +379,8 @@ class ProjectFile:
         return self.is_valid()
 
     def is_valid(self) -> bool:
+        if self._openSession is not None:
+            return CheckFileValid(self._openSession)
         return CheckFileValid(self.project_filename)
 
     def _add_names_to_df(self, log, df):
@@ -128,15 +406,14 @@ class ProjectFile:
         np.ndarray
             _description_
         """
-        resp = Get(self.project_filename, "extents")
+        resp = self._get("extents")
         if resp["errorFlag"] is True:
             return None
-        return resp["value"]
+        return copy.deepcopy(resp["value"])
 
     @extents.setter
     def extents(self, extents):
-        Set(self.project_filename, "extents", **extents)
-        pass
+        self._set("extents", **extents)
 
     @property
     def version(self) -> str:
@@ -147,7 +424,7 @@ class ProjectFile:
         str
             version string major.minor.patch
         """
-        resp = Get(self.project_filename, "version")
+        resp = self._get("version")
         if resp["errorFlag"] is True:
             return None
         return "{}.{}.{}".format(*resp["value"])
@@ -155,10 +432,11 @@ class ProjectFile:
     @property
     def origin(self) -> np.ndarray:
         """Get the origin of the model"""
+        extents = self.extents
         origin = np.zeros(3)
-        origin[0] = self.extents["utm"][2]
-        origin[1] = self.extents["utm"][4]
-        origin[2] = self.extents["depth"][0]
+        origin[0] = extents["utm"][2]
+        origin[1] = extents["utm"][4]
+        origin[2] = extents["depth"][0]
         return origin
 
     @property
@@ -170,10 +448,11 @@ class ProjectFile:
         np.ndarray
             _description_
         """
+        extents = self.extents
         maximum = np.zeros(3)
-        maximum[0] = self.extents["utm"][3]
-        maximum[1] = self.extents["utm"][5]
-        maximum[2] = self.extents["depth"][1]
+        maximum[0] = extents["utm"][3]
+        maximum[1] = extents["utm"][5]
+        maximum[2] = extents["depth"][1]
         return maximum
 
     @property
@@ -361,18 +640,234 @@ class ProjectFile:
         )
         self.__setitem__("stratigraphicObservations", value)
 
+    def _compound_type(self, element):
+        return compoundTypeMap[element]
+
+    def _select(self, element, **kwargs):
+        """Get the response for element with where/columns options through
+        the file without caching it
+
+        Raises
+        ------
+        TypeError
+            if the element is not stored as a table
+        ValueError
+            if the options name an unknown field or operator
+        """
+        loopCompoundType = self._compound_type(element)
+        if loopCompoundType is None:
+            raise TypeError(f"{element} is not stored as a table")
+        if kwargs.get("where") is not None:
+            CheckWhere(loopCompoundType, kwargs["where"])
+        if kwargs.get("columns") is not None:
+            CheckColumns(loopCompoundType, kwargs["columns"])
+        with self._lock:
+            if self._openSession is not None:
+                return self._openSession.Get(element, asArray=True, **kwargs)
+            with ReadingFile(self.project_filename), self._reader() as session:
+                return session.Get(element, asArray=True, **kwargs)
+
+    def get_array(self, element, columns=None) -> np.ndarray:
+        """Get a table element as one structured array of its compound type
+
+        Use LoopProjectFile.ArrayToDataframe or ArrayToColumns on the result
+        for a dataframe or dictionary of columns that shares its memory.
+
+        Parameters
+        ----------
+        element : string
+            name of the element to get, such as "faultObservations"
+        columns : list of strings or None
+            fields to get, None for all of them
+
+        Returns
+        -------
+        np.ndarray or None
+            the records of the element, None if it is not in the file
+
+        Raises
+        ------
+        TypeError
+            if the element is not stored as a table
+        """
+        if self._compound_type(element) is None:
+            raise TypeError(f"{element} is not stored as a table")
+        with self._lock:
+            if columns is None or element in self._cache:
+                resp = self._get(element)
+                if resp["errorFlag"] is True:
+                    return None
+                if columns is None:
+                    return resp["value"].copy()
+                CheckColumns(resp["value"].dtype, columns)
+                return ProjectRecords(resp["value"], columns)
+        resp = self._select(element, columns=columns)
+        if resp["errorFlag"] is True:
+            return None
+        return resp["value"]
+
+    def read(self, element, columns=None, where=None, categorical=False, **kwargs) -> pd.DataFrame:
+        """Get the rows and columns of a table element selected in the file
+
+        Only the listed columns of the rows matching the where query (see
+        LoopProjectFile.Get) are kept as the element is read block by block,
+        and the result is not cached.
+
+        Examples
+        --------
+        >>> project.read("foldObservations", columns=["easting", "northing", "altitude"])
+        >>> project.read("faultObservations", where={"eventId": [3, 7], "dip": (">", 60)})
+
+        Parameters
+        ----------
+        element : string
+            name of the element to read, such as "faultObservations"
+        columns : list of strings or None
+            fields to read, None for all of them
+        where : dict {field: condition} or None
+            the conditions the rows must match, None for all rows
+        categorical : bool or list of strings
+            string fields to return as pandas categoricals, True for the low
+            cardinality ones (group, supergroup, unit, propertyCode, layer
+            and colour)
+        kwargs : dict
+            other Get options such as indexRange
+
+        Returns
+        -------
+        pd.DataFrame or None
+            the selected rows, None if the element is not in the file
+
+        Raises
+        ------
+        ValueError
+            if the options name an unknown field or operator
+        """
+        resp = self._select(element, columns=columns, where=where, **kwargs)
+        if resp["errorFlag"] is True:
+            return None
+        return ResponseToDataframe(resp, resp["value"].dtype, categorical)
+
+    def query(self, element, where, **kwargs) -> pd.DataFrame:
+        """Get the rows of a table element matching a where query
+
+        Same as read with where (and columns) options.
+
+        Examples
+        --------
+        >>> project.query("faultObservations", {"eventId": [3, 7], "dip": (">", 60)})
+        """
+        return self.read(element, where=where, **kwargs)
+
+    def iter(self, element, chunk_rows=None, columns=None, where=None, as_array=False, **kwargs):
+        """Iterate over a table element in blocks of about chunk_rows rows
+
+        The blocks are aligned to the HDF5 chunks of the element and read
+        one at a time, bypassing the cache, so memory use stays flat however
+        large the element is. The file is kept open for reading until the
+        iteration ends, so do not write to the project while iterating, but
+        it is only locked while a block is read so the iterator may be
+        paused or resumed on any thread.
+
+        Examples
+        --------
+        >>> for df in project.iter("drillholeObservations", chunk_rows=100000):
+        >>>     process(df)
+
+        Parameters
+        ----------
+        element : string
+            name of the element to iterate over, such as "drillholeObservations"
+        chunk_rows : int or None
+            rows read per block (rounded to whole HDF5 chunks), None for the
+            default block size
+        columns : list of strings or None
+            fields to read, None for all of them
+        where : dict {field: condition} or None
+            the conditions the rows must match, None for all rows
+        as_array : bool
+            yield structured arrays rather than dataframes
+        kwargs : dict
+            other Get options such as indexRange
+
+        Yields
+        ------
+        pd.DataFrame or np.ndarray
+            the selected rows of each block
+
+        Raises
+        ------
+        ValueError
+            if the element is not a table or the options name an unknown
+            field or operator
+        """
+        source = self._openSession if self._openSession is not None else self.project_filename
+        return IterElement(
+            source,
+            element,
+            chunkRows=chunk_rows,
+            asDataframe=not as_array,
+            columns=columns,
+            where=where,
+            **kwargs,
+        )
+
+    def to_arrow(self, element, columns=None, where=None, chunk_rows=None, **kwargs):
+        """Get a table element as an Arrow table (needs pyarrow)
+
+        The element is read block by block into one record batch per block,
+        with numeric columns as plain Arrow arrays and string columns
+        dictionary encoded (see LoopProjectFile.arrow).
+
+        Examples
+        --------
+        >>> table = project.to_arrow("drillholeObservations", columns=["collarId", "from", "to"])
+
+        Parameters
+        ----------
+        element : string
+            name of the element to get, such as "drillholeObservations"
+        columns : list of strings or None
+            fields to get, None for all of them
+        where : dict {field: condition} or None
+            the conditions the rows must match, None for all rows
+        chunk_rows : int or None
+            rows per record batch (rounded to whole HDF5 chunks), None for
+            the default block size
+        kwargs : dict
+            other Get options such as indexRange
+
+        Returns
+        -------
+        pyarrow.Table
+
+        Raises
+        ------
+        ValueError
+            if the element is not a table or the options name an unknown
+            field or operator
+        """
+        from LoopProjectFile import arrow
+
+        source = self._openSession if self._openSession is not None else self.project_filename
+        return arrow.ToArrow(source, element, chunk_rows, columns=columns, where=where, **kwargs)
+
     def _ipython_key_completions_(self):
         return self.element_names
 
     def __getitem__(self, element):
-        resp = Get(self.project_filename, element)
+        if isinstance(element, tuple):
+            # project[element, columns] reads only those columns
+            element, columns = element
+            return self.read(element, columns=columns)
+        resp = self._get(element)
         if resp["errorFlag"] is False:
-            if compoundTypeMap[element] is None:
-                return resp["value"]
+            if self._compound_type(element) is None:
+                return copy.deepcopy(resp["value"])
             else:
-                return LoopProjectFile.ElementToDataframe(
-                    self.project_filename, element, compoundTypeMap[element]
-                )
+                if "dataframe" not in resp:
+                    resp["dataframe"] = ResponseToDataframe(resp, self._compound_type(element))
+                return resp["dataframe"].copy()
         # if the project file is empty for a given element, return an empty dataframe with the correct headers
         if resp["errorFlag"] is True:
             if (
@@ -381,32 +876,28 @@ class ProjectFile:
             ):
                 # TODO: this isn't really ideal and maybe need to be removed but at least it gives an idea of the column
                 # names needed.
-                return pd.DataFrame(columns=list(compoundTypeMap[element].names))
+                return pd.DataFrame(columns=list(self._compound_type(element).names))
             if (
                 resp["errorString"]
                 == "No EventLog present in ExtractedInformation for access request"
             ):
                 # TODO: this isn't really ideal and maybe need to be removed but at least it gives an idea of the column
                 # names needed.
-                return pd.DataFrame(columns=list(compoundTypeMap[element].names))
+                return pd.DataFrame(columns=list(self._compound_type(element).names))
         # return ProjectFileElement(self.project_filename, element).value
 
     def __setitem__(self, element, value):
-        if compoundTypeMap[element] is None:
+        loopCompoundType = self._compound_type(element)
+        if loopCompoundType is None:
             if isinstance(value, dict):
-                Set(self.project_filename, element, **value)
+                self._set(element, **value)
             else:
-                Set(self.project_filename, element, {element: value})
+                self._set(element, **{element: value})
         else:
             if isinstance(value, pd.DataFrame):
-                names = compoundTypeMap[element].names
+                names = loopCompoundType.names
                 if pd.Index(names).isin(value.columns).all():
-                    ElementFromDataframe(
-                        self.project_filename,
-                        value.loc[:, names],
-                        element,
-                        compoundTypeMap[element],
-                    )
+                    self._set(element, data=ConvertDataFrame(value.loc[:, names], loopCompoundType))
                 else:
                     raise ValueError("Dataframe must have columns: {}".format(names))
             else:
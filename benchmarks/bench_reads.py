@@ -0,0 +1,72 @@
+"""
+Benchmark of reading a table element of a Loop Project File one record per
+HDF5 read (the former getter loop) against the single slice read now used
+by the getters.
+
+Usage:
+    python benchmarks/bench_reads.py [--rows 200000] [--loop-rows 20000]
+
+The per record loop is timed on the first --loop-rows records only and
+scaled to --rows as it is linear in the number of records.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy
+
+import LoopProjectFile
+
+
+def makeProject(filename, rows):
+    LoopProjectFile.CreateBasic(filename)
+    data = numpy.zeros(rows, LoopProjectFile.faultObservationType)
+    data["eventId"] = numpy.arange(rows) % 100
+    data["easting"] = numpy.random.default_rng(0).uniform(0, 1e5, rows)
+    data["northing"] = numpy.random.default_rng(1).uniform(0, 1e5, rows)
+    resp = LoopProjectFile.Set(filename, "faultObservations", data=data)
+    if resp["errorFlag"]:
+        raise Exception(resp["errorString"])
+
+
+def perRecordRead(filename, rows):
+    fileResp = LoopProjectFile.OpenProjectFile(filename)
+    root = fileResp["root"]
+    try:
+        variable = root["DataCollection"]["Observations"].variables["faultObservations"]
+        return [variable[i] for i in range(rows)]
+    finally:
+        root.close()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--loop-rows", type=int, default=20000)
+    args = parser.parse_args()
+    loopRows = min(args.loop_rows, args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "bench.loop3d")
+        makeProject(filename, args.rows)
+
+        loopTime, _ = timed(perRecordRead, filename, loopRows)
+        loopTime *= args.rows / loopRows
+        sliceTime, resp = timed(LoopProjectFile.Get, filename, "faultObservations")
+        assert len(resp["value"]) == args.rows
+
+    print(f"faultObservations rows:   {args.rows}")
+    print(f"per record reads:         {loopTime:8.3f} s (scaled from {loopRows} rows)")
+    print(f"single slice read (Get):  {sliceTime:8.3f} s")
+    print(f"speedup:                  {loopTime / sliceTime:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
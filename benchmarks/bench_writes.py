@@ -0,0 +1,81 @@
+"""
+Benchmark of writing a table element of a Loop Project File one record per
+HDF5 write (the former setter loop) against the single slice write now used
+by the setters.
+
+Usage:
+    python benchmarks/bench_writes.py [--rows 200000] [--loop-rows 20000]
+
+The per record loop is timed on the first --loop-rows records only and
+scaled to --rows as it is linear in the number of records.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy
+
+import LoopProjectFile
+
+
+def makeContacts(rows):
+    data = numpy.zeros(rows, LoopProjectFile.contactObservationType)
+    data["layerId"] = numpy.arange(rows) % 100
+    data["easting"] = numpy.random.default_rng(0).uniform(0, 1e5, rows)
+    data["northing"] = numpy.random.default_rng(1).uniform(0, 1e5, rows)
+    return data
+
+
+def perRecordWrite(filename, data):
+    # The setters' former loop, on a contacts group created by an empty set
+    LoopProjectFile.Set(filename, "contacts", data=data[:0])
+    fileResp = LoopProjectFile.OpenProjectFile(filename, readOnly=False)
+    root = fileResp["root"]
+    try:
+        group = root["DataCollection"]["Contacts"]
+        variable = group.variables["contacts"]
+        index = 0
+        for i in data:
+            variable[index] = i
+            index += 1
+        group.setncattr("index_MaxValid", index)
+    finally:
+        root.close()
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--loop-rows", type=int, default=20000)
+    args = parser.parse_args()
+    loopRows = min(args.loop_rows, args.rows)
+    data = makeContacts(args.rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        loopFilename = os.path.join(directory, "loop.loop3d")
+        LoopProjectFile.CreateBasic(loopFilename)
+        loopTime, _ = timed(perRecordWrite, loopFilename, data[:loopRows])
+        loopTime *= args.rows / loopRows
+
+        bulkFilename = os.path.join(directory, "bulk.loop3d")
+        LoopProjectFile.CreateBasic(bulkFilename)
+        bulkTime, resp = timed(LoopProjectFile.Set, bulkFilename, "contacts", data=data)
+        assert not resp["errorFlag"]
+        written = LoopProjectFile.GetArray(bulkFilename, "contacts")["value"]
+        assert numpy.array_equal(written, data)
+
+    print(f"contacts rows:            {args.rows}")
+    print(f"per record writes:        {loopTime:8.3f} s (scaled from {loopRows} rows)")
+    print(f"single slice write (Set): {bulkTime:8.3f} s")
+    print(f"speedup:                  {loopTime / bulkTime:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+import LoopProjectFile
+
+
+@pytest.fixture
+def project_path(tmp_path):
+    """A basic project file with extents and a small fault log."""
+    filename = str(tmp_path / "test.loop3d")
+    LoopProjectFile.CreateBasic(filename)
+    LoopProjectFile.Set(
+        filename,
+        "extents",
+        geodesic=[0, 1, -180, -179],
+        utm=[1, 1, 10000000, 9889363.77, 833966.132, 722587.169],
+        depth=[-1000, -2000],
+        spacing=[1000, 1000, 10],
+        epsg="EPSG:32753",
+    )
+    faultLog = np.zeros(3, LoopProjectFile.faultEventType)
+    faultLog["eventId"] = [1, 2, 3]
+    faultLog["name"] = [b"F1", b"F2", b"F3"]
+    faultLog["avgDisplacement"] = [10.0, 20.0, 30.0]
+    LoopProjectFile.Set(filename, "faultLog", data=faultLog)
+    return filename
@@ -0,0 +1,40 @@
+import asyncio
+
+import numpy as np
+
+import LoopProjectFile
+from LoopProjectFile import aio
+
+
+def test_get_set(project_path):
+    async def main():
+        faultLog = await aio.Get(project_path, "faultLog")
+        data = faultLog["value"]
+        # Concurrent calls on one file are serialized rather than interleaved
+        resps = await asyncio.gather(
+            *[aio.Set(project_path, "faultLogAppend", data=data) for _ in range(3)],
+            aio.Get(project_path, "extents"),
+        )
+        assert not any(resp["errorFlag"] for resp in resps)
+        return await aio.GetMany(project_path, ["faultLog", "version"])
+
+    resps = asyncio.run(main())
+    assert len(resps["faultLog"]["value"]) == 12
+    assert not resps["version"]["errorFlag"]
+
+
+def test_async_project_file(project_path):
+    async def main():
+        project = aio.AsyncProjectFile(project_path)
+        faultLog = await project.faultLog
+        faultLog["avgDisplacement"] = 2.0
+        await project.set("faultLog", faultLog)
+        origin = await project.origin
+        result = await project.get("faultLog")
+        await project.close()
+        return origin, result
+
+    origin, faultLog = asyncio.run(main())
+    assert origin[0] == 9889363.77
+    assert np.all(faultLog["avgDisplacement"] == 2.0)
+    assert len(LoopProjectFile.Get(project_path, "faultLog")["value"]) == 3
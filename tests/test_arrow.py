@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+import LoopProjectFile
+from LoopProjectFile import ProjectFile
+
+pa = pytest.importorskip("pyarrow")
+arrow = pytest.importorskip("LoopProjectFile.arrow")
+
+
+def _fold_observations(count):
+    data = np.zeros(count, LoopProjectFile.foldObservationType)
+    data["eventId"] = np.arange(count)
+    data["easting"] = np.arange(count) * 0.5
+    data["foliation"] = [b"S%d" % (i % 4) for i in range(count)]
+    return data
+
+
+def test_to_arrow(tmp_path):
+    filename = str(tmp_path / "arrow.loop3d")
+    LoopProjectFile.CreateBasic(filename)
+    data = _fold_observations(500)
+    LoopProjectFile.Set(filename, "foldObservations", data=data)
+
+    table = arrow.ToArrow(filename, "foldObservations", chunkRows=100)
+    assert table.num_rows == 500
+    assert len(table.to_batches()) > 1
+    assert table.schema.field("eventId").type == pa.uint32()
+    assert pa.types.is_dictionary(table.schema.field("foliation").type)
+    assert table.column("easting").to_pylist() == list(data["easting"])
+    assert table.column("foliation").to_pylist()[:5] == ["S0", "S1", "S2", "S3", "S0"]
+
+    table = arrow.ToArrow(filename, "foldObservations", columns=["eventId"], where={"foliation": "S1"})
+    assert table.column_names == ["eventId"]
+    assert table.column("eventId").to_pylist() == list(range(1, 500, 4))
+
+    with ProjectFile(filename) as project:
+        assert project.to_arrow("foldObservations").num_rows == 500
+
+
+def test_from_arrow(project_path):
+    data = _fold_observations(300)
+    table = pa.Table.from_batches(
+        [arrow.ArrayToRecordBatch(data[:100]), arrow.ArrayToRecordBatch(data[100:])]
+    )
+    assert not arrow.FromArrow(project_path, "foldObservations", table)["errorFlag"]
+    assert np.array_equal(LoopProjectFile.GetArray(project_path, "foldObservations")["value"], data)
+
+    plain = table.set_column(
+        table.schema.get_field_index("foliation"),
+        "foliation",
+        table.column("foliation").cast(pa.string()),
+    )
+    assert not arrow.FromArrow(project_path, "foldObservations", plain, append=True)["errorFlag"]
+    array = LoopProjectFile.GetArray(project_path, "foldObservations")["value"]
+    assert np.array_equal(array, np.concatenate([data, data]))
+
+    resp = arrow.FromArrow(project_path, "foldObservations", table.drop_columns(["easting"]))
+    assert resp["errorFlag"]
+    long = pa.table({name: table.column(name) for name in table.column_names})
+    long = long.set_column(
+        long.schema.get_field_index("foliation"), "foliation", pa.array(["x" * 121] * 300)
+    )
+    assert "truncated" in arrow.FromArrow(project_path, "foldObservations", long)["errorString"]
+
+
+def test_from_arrow_checks_tables_before_writing(project_path):
+    data = _fold_observations(200)
+    LoopProjectFile.Set(project_path, "foldObservations", data=data)
+    first = arrow.ArrayToRecordBatch(data[:100])
+    first = first.set_column(
+        first.schema.get_field_index("foliation"),
+        "foliation",
+        first.column("foliation").cast(pa.string()),
+    )
+    second = first.set_column(
+        first.schema.get_field_index("foliation"), "foliation", pa.array(["x" * 121] * 100)
+    )
+    # The second batch fails to convert, the first must not have been written
+    table = pa.Table.from_batches([first, second])
+    resp = LoopProjectFile.FromArrow(project_path, "foldObservations", table)
+    assert "truncated" in resp["errorString"]
+    array = LoopProjectFile.GetArray(project_path, "foldObservations")["value"]
+    assert np.array_equal(array, data)
+
+
+def test_parquet_round_trip(project_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(LoopProjectFile.LoopProjectFileUtils, "blockRows", 100)
+    parquet = pytest.importorskip("pyarrow.parquet")
+    data = _fold_observations(450)
+    LoopProjectFile.Set(project_path, "foldObservations", data=data)
+    outputPath = str(tmp_path / "export")
+    LoopProjectFile.ToParquet(project_path, outputPath)
+    assert parquet.ParquetFile(outputPath + "/foldObs.parquet").num_row_groups > 1
+    assert not (tmp_path / "export" / "contacts.parquet").exists()
+
+    filename = str(tmp_path / "imported.loop3d")
+    LoopProjectFile.FromParquet(filename, outputPath)
+    for element in ("faultLog", "foldObservations"):
+        original = LoopProjectFile.GetArray(project_path, element)["value"]
+        imported = LoopProjectFile.GetArray(filename, element)["value"]
+        assert imported.dtype == original.dtype
+        assert np.array_equal(imported, original)
+    assert LoopProjectFile.Get(filename, "extents")["value"] == LoopProjectFile.Get(project_path, "extents")["value"]
+
+
+def test_from_parquet_reports_extents_errors(project_path, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow.parquet")
+    outputPath = str(tmp_path / "export")
+    LoopProjectFile.ToParquet(project_path, outputPath)
+    set_element = LoopProjectFile.Set
+
+    def failing_set(filename, element, **kwargs):
+        if element == "extents":
+            return {"errorFlag": True, "errorString": "(ERROR) extents rejected"}
+        return set_element(filename, element, **kwargs)
+
+    monkeypatch.setattr(LoopProjectFile, "Set", failing_set)
+    with pytest.raises(Exception, match="extents rejected"):
+        LoopProjectFile.FromParquet(str(tmp_path / "imported.loop3d"), outputPath)
+
+
+def test_from_parquet_stops_when_create_fails(project_path, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow.parquet")
+    outputPath = str(tmp_path / "export")
+    LoopProjectFile.ToParquet(project_path, outputPath)
+    sets = []
+    monkeypatch.setattr(
+        LoopProjectFile,
+        "CreateBasic",
+        lambda filename: {"errorFlag": True, "errorString": "(ERROR) disk full"},
+    )
+    monkeypatch.setattr(LoopProjectFile, "Set", lambda *args, **kwargs: sets.append(args))
+    with pytest.raises(Exception, match="disk full"):
+        LoopProjectFile.FromParquet(str(tmp_path / "imported.loop3d"), outputPath)
+    assert sets == []
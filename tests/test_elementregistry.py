@@ -0,0 +1,73 @@
+import LoopProjectFile
+import LoopProjectFile.ElementRegistry as ElementRegistry
+
+
+def test_builtin_elements_registered():
+    names = LoopProjectFile.ElementNames()
+    for element in ["version", "extents", "faultObservations", "contacts", "drillholeLog"]:
+        assert element in names
+    definition = LoopProjectFile.GetElementDefinition("faultLog")
+    assert definition.groupPath == ("ExtractedInformation", "EventLog")
+    assert definition.maxValidName == "faultEventIndex_MaxValid"
+    assert definition.compoundType == LoopProjectFile.faultEventType
+    assert ElementRegistry.GetSetterDefinition("faultLogAppend") == (definition, True)
+    assert ElementRegistry.GetSetterDefinition("eventRelationshipsAppend") == (None, False)
+
+
+def test_unknown_element(project_path):
+    assert LoopProjectFile.Get(project_path, "bogus")["errorFlag"]
+    assert LoopProjectFile.Set(project_path, "bogus", data=[])["errorFlag"]
+
+
+def test_session_resolve_bulk_read_write(project_path):
+    with LoopProjectFile.Session(project_path, "a") as session:
+        resp = session.Resolve("faultLog")
+        assert session.Resolve("faultLog")["value"] is resp["value"]
+        resolved = resp["value"]
+        records = resolved.read()
+        assert list(records["eventId"]) == [1, 2, 3]
+        resolved.write(records[:2], append=True)
+        assert list(resolved.read(2)["eventId"]) == [3, 1, 2]
+        assert session.Resolve("contacts")["errorFlag"]
+
+
+def test_session_reuses_resolved_tables(project_path, monkeypatch):
+    with LoopProjectFile.Session(project_path, "a") as session:
+        resolved = session.Resolve("faultLog")["value"]
+        lookups = []
+        resolve = ElementRegistry.ResolveElement
+        monkeypatch.setattr(
+            ElementRegistry,
+            "ResolveElement",
+            lambda root, definition: lookups.append(definition.name) or resolve(root, definition),
+        )
+        records = session.Get("faultLog", asArray=True)["value"]
+        assert not session.Set("faultLogAppend", data=records[:1])["errorFlag"]
+        assert [r["eventId"] for r in session.Get("faultLog")["value"]] == [1, 2, 3, 1]
+        assert lookups == []
+
+        # A layout change renames the compound variable, drops the cached one
+        assert not session.Set("faultLog", layout="columnar")["errorFlag"]
+        assert session.Resolve("faultLog")["value"] is not resolved
+        assert not session.Set("faultLog", data=records)["errorFlag"]
+        assert list(session.Get("faultLog", asArray=True)["value"]["eventId"]) == [1, 2, 3]
+
+
+def test_register_third_party_element(project_path):
+    def getter(root, **kwargs):
+        return {"errorFlag": False, "value": root.getncattr("myValue")}
+
+    def setter(root, data, **kwargs):
+        root.setncattr("myValue", data)
+        return {"errorFlag": False}
+
+    LoopProjectFile.RegisterElement("myValue", getter, setter, compoundType=None)
+    try:
+        LoopProjectFile.Set(project_path, "myValue", data=3)
+        assert LoopProjectFile.Get(project_path, "myValue")["value"] == 3
+        # Elements registered after import are known to ProjectFile
+        project = LoopProjectFile.ProjectFile(project_path)
+        assert "myValue" in project.compoundTypeMap
+        assert project["myValue"] == 3
+    finally:
+        del ElementRegistry._elements["myValue"]
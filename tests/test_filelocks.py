@@ -0,0 +1,115 @@
+import concurrent.futures
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import LoopProjectFile
+from LoopProjectFile.FileLocks import GetFileLock, ReadWriteLock
+
+
+def test_readers_share_writers_exclusive():
+    lock = ReadWriteLock()
+    events = []
+    readersIn = threading.Barrier(2)
+
+    def reader(name):
+        with lock.reading():
+            # Both readers must be inside together to pass the barrier
+            readersIn.wait(timeout=5)
+            events.append(name)
+
+    def writer():
+        with lock.writing():
+            events.append("writer")
+
+    with lock.reading():
+        with lock.reading():
+            pass
+        threads = [threading.Thread(target=reader, args=(n,)) for n in ("r1", "r2")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writerThread = threading.Thread(target=writer)
+        writerThread.start()
+        time.sleep(0.05)
+        # The writer waits for the outstanding read lock
+        assert "writer" not in events
+    writerThread.join()
+    assert events[-1] == "writer"
+
+
+def test_release_from_another_thread_raises():
+    lock = ReadWriteLock()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        lock.acquireRead()
+        with pytest.raises(RuntimeError, match="not held by this thread"):
+            executor.submit(lock.releaseRead).result(timeout=5)
+        lock.releaseRead()
+        lock.acquireWrite()
+        with pytest.raises(RuntimeError, match="not held by this thread"):
+            executor.submit(lock.releaseWrite).result(timeout=5)
+        lock.releaseWrite()
+    # The failed releases left the lock usable
+    with lock.writing():
+        pass
+
+
+def test_file_lock_shared_per_path(tmp_path):
+    filename = str(tmp_path / "a.loop3d")
+    assert GetFileLock(filename) is GetFileLock(str(tmp_path / "." / "a.loop3d"))
+
+
+def test_concurrent_get_set(project_path):
+    data = LoopProjectFile.Get(project_path, "faultLog")["value"]
+
+    def work(i):
+        if i % 4 == 0:
+            return LoopProjectFile.Set(project_path, "faultLogAppend", data=data[:1])
+        return LoopProjectFile.Get(project_path, "faultLog")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        resps = list(executor.map(work, range(16)))
+    assert not any(resp["errorFlag"] for resp in resps)
+    assert len(LoopProjectFile.Get(project_path, "faultLog")["value"]) == 7
+    assert np.all(
+        [len(resp["value"]) >= 3 for resp in resps if "value" in resp]
+    )
+
+
+def test_iterator_resumed_on_another_thread(project_path):
+    blocks = LoopProjectFile.IterElement(project_path, "faultLog", chunkRows=1)
+    first = next(blocks)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        rest = executor.submit(list, blocks).result(timeout=10)
+    assert [r["eventId"] for block in [first] + rest for r in block] == [1, 2, 3]
+    # No lock was left behind by either thread
+    resp = LoopProjectFile.Set(project_path, "faultLog", data=first)
+    assert not resp["errorFlag"]
+
+
+def test_set_while_iterator_paused(project_path, tmp_path):
+    other = str(tmp_path / "other.loop3d")
+    shutil.copy(project_path, other)
+    data = LoopProjectFile.Get(other, "faultLog")["value"]
+    resps = []
+    blocks = LoopProjectFile.IterElement(project_path, "faultLog", chunkRows=1)
+    try:
+        next(blocks)
+        writer = threading.Thread(
+            target=lambda: resps.append(
+                LoopProjectFile.Set(other, "faultLogAppend", data=data[:1])
+            ),
+            daemon=True,
+        )
+        writer.start()
+        writer.join(timeout=10)
+        assert not writer.is_alive()
+        assert not resps[0]["errorFlag"]
+        # The iterating thread can still read the other file
+        assert len(LoopProjectFile.Get(other, "faultLog")["value"]) == 4
+    finally:
+        blocks.close()
@@ -0,0 +1,314 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import LoopProjectFile
+
+
+def test_get_all_and_range(project_path):
+    resp = LoopProjectFile.Get(project_path, "faultLog")
+    assert [r["eventId"] for r in resp["value"]] == [1, 2, 3]
+    assert all(isinstance(r, np.void) for r in resp["value"])
+    resp = LoopProjectFile.Get(project_path, "faultLog", indexRange=(1, 10))
+    assert [r["eventId"] for r in resp["value"]] == [2, 3]
+    resp = LoopProjectFile.Get(project_path, "contacts")
+    assert resp["errorFlag"]
+
+
+def test_index_list_coalesced(tmp_path):
+    filename = str(tmp_path / "many.loop3d")
+    LoopProjectFile.CreateBasic(filename)
+    data = np.zeros(5000, LoopProjectFile.faultObservationType)
+    data["eventId"] = np.arange(5000)
+    LoopProjectFile.Set(filename, "faultObservations", data=data)
+    indexList = [4999, 3, 2, 3, -1, 5000, 2500, 0, 4000]
+    resp = LoopProjectFile.Get(filename, "faultObservations", indexList=indexList)
+    assert [r["eventId"] for r in resp["value"]] == [4999, 3, 2, 3, 2500, 0, 4000]
+    resp = LoopProjectFile.Get(filename, "faultObservations", indexList=[7000])
+    assert resp["value"] == []
+
+
+def test_get_as_array(project_path):
+    resp = LoopProjectFile.GetArray(project_path, "faultLog")
+    array = resp["value"]
+    assert isinstance(array, np.ndarray)
+    assert array.dtype == LoopProjectFile.faultEventType
+    assert list(array["eventId"]) == [1, 2, 3]
+    resp = LoopProjectFile.Get(project_path, "faultLog", indexList=[2, 0], asArray=True)
+    assert list(resp["value"]["eventId"]) == [3, 1]
+    resp = LoopProjectFile.Get(project_path, "faultLog", indexRange=(5, 6), asArray=True)
+    assert resp["value"].dtype == LoopProjectFile.faultEventType
+    assert len(resp["value"]) == 0
+    # Non table elements ignore the option
+    resp = LoopProjectFile.Get(project_path, "version", asArray=True)
+    assert not resp["errorFlag"]
+
+
+def test_array_columns_share_memory(project_path):
+    array = LoopProjectFile.GetArray(project_path, "faultLog")["value"]
+    columns = LoopProjectFile.ArrayToColumns(array)
+    assert np.shares_memory(columns["avgDisplacement"], array)
+    df = LoopProjectFile.ArrayToDataframe(array)
+    assert np.shares_memory(df["avgDisplacement"].to_numpy(), array)
+    assert list(df["avgDisplacement"]) == [10.0, 20.0, 30.0]
+
+
+def test_where_query(tmp_path, monkeypatch):
+    # Small blocks so the scan crosses many block boundaries
+    monkeypatch.setattr(LoopProjectFile.LoopProjectFileUtils, "blockRows", 50)
+    filename = str(tmp_path / "where.loop3d")
+    LoopProjectFile.CreateBasic(filename)
+    data = np.zeros(1000, LoopProjectFile.faultObservationType)
+    data["eventId"] = np.arange(1000) % 10
+    data["dip"] = np.arange(1000) % 90
+    data["posOnly"] = np.arange(1000) % 2
+    LoopProjectFile.Set(filename, "faultObservations", data=data)
+    where = {"eventId": [3, 7], "posOnly": 1, "dip": (">", 60)}
+    expected = data[
+        np.isin(data["eventId"], [3, 7]) & (data["posOnly"] == 1) & (data["dip"] > 60)
+    ]
+    resp = LoopProjectFile.Get(filename, "faultObservations", where=where, asArray=True)
+    assert resp["value"].dtype == LoopProjectFile.faultObservationType
+    assert np.array_equal(resp["value"], expected)
+    resp = LoopProjectFile.Get(filename, "faultObservations", where=where)
+    assert [r["eventId"] for r in resp["value"]] == list(expected["eventId"])
+    resp = LoopProjectFile.Get(
+        filename, "faultObservations", where={"dip": [(">=", 10), ("<", 12)]},
+        indexRange=(0, 100),
+    )
+    assert [r["dip"] for r in resp["value"]] == [10, 11]
+    assert LoopProjectFile.Get(filename, "faultObservations", where={"bogus": 1})["errorFlag"]
+    assert LoopProjectFile.Get(filename, "faultObservations", where={"dip": ("~", 1)})["errorFlag"]
+    assert LoopProjectFile.Get(filename, "version", where={"dip": 1})["errorFlag"]
+
+
+def test_where_and_keyword_on_strings(project_path):
+    resp = LoopProjectFile.Get(project_path, "faultLog", where={"name": ["F1", "F3"]})
+    assert [r["eventId"] for r in resp["value"]] == [1, 3]
+    contacts = np.zeros(3, LoopProjectFile.contactObservationType)
+    LoopProjectFile.Set(project_path, "contacts", data=contacts)
+    # Contacts have no string fields so no record matches a keyword
+    resp = LoopProjectFile.Get(project_path, "contacts", keyword="S0")
+    assert resp["value"] == []
+
+
+def test_columns_projection(project_path, monkeypatch):
+    monkeypatch.setattr(LoopProjectFile.LoopProjectFileUtils, "blockRows", 1)
+    resp = LoopProjectFile.Get(project_path, "faultLog", columns=["avgDisplacement", "eventId"])
+    assert [tuple(r) for r in resp["value"]] == [(10.0, 1), (20.0, 2), (30.0, 3)]
+    array = LoopProjectFile.GetArray(
+        project_path, "faultLog", columns=["eventId", "name"], indexList=[2, 0]
+    )["value"]
+    assert array.dtype.names == ("eventId", "name")
+    assert array.dtype["name"] == LoopProjectFile.faultEventType["name"]
+    assert list(array["name"]) == [b"F3", b"F1"]
+    resp = LoopProjectFile.Get(
+        project_path, "faultLog", columns=["name"], where={"avgDisplacement": (">", 15)}
+    )
+    assert [r["name"] for r in resp["value"]] == [b"F2", b"F3"]
+    assert LoopProjectFile.Get(project_path, "faultLog", columns=["bogus"])["errorFlag"]
+    df = LoopProjectFile.ElementToDataframe(
+        project_path, "faultLog", LoopProjectFile.faultEventType, columns=["name", "eventId"]
+    )
+    assert list(df.columns) == ["name", "eventId"]
+    assert list(df["name"]) == ["F1", "F2", "F3"]
+
+
+def test_iter_element(tmp_path):
+    filename = str(tmp_path / "iter.loop3d")
+    LoopProjectFile.CreateBasic(filename)
+    data = np.zeros(1000, LoopProjectFile.faultObservationType)
+    data["eventId"] = np.arange(1000)
+    data["dip"] = np.arange(1000) % 90
+    LoopProjectFile.Set(filename, "faultObservations", data=data)
+    blocks = list(LoopProjectFile.IterElement(filename, "faultObservations", chunkRows=100))
+    assert all(len(block) <= 100 for block in blocks)
+    assert np.array_equal(np.concatenate(blocks), data)
+    blocks = LoopProjectFile.IterElement(
+        filename, "faultObservations", chunkRows=100, where={"dip": 5}, columns=["eventId"]
+    )
+    assert list(np.concatenate(list(blocks))["eventId"]) == list(range(5, 1000, 90))
+    frames = list(LoopProjectFile.IterElement(filename, "faultObservations", asDataframe=True))
+    assert sum(len(df) for df in frames) == 1000
+    with pytest.raises(ValueError):
+        LoopProjectFile.IterElement(filename, "extents")
+    with pytest.raises(ValueError):
+        LoopProjectFile.IterElement(filename, "faultObservations", columns=["bogus"])
+
+
+def test_dataframe_string_decoding():
+    data = np.zeros(3, LoopProjectFile.stratigraphicLayerType)
+    data["layerId"] = [1, 2, 3]
+    data["name"] = [b"A", "Ébène".encode(), b""]
+    data["group"] = [b"G1", b"G2", b"G1"]
+    df = LoopProjectFile.ConvertToDataFrame(data, LoopProjectFile.stratigraphicLayerType)
+    assert list(df["name"]) == ["A", "Ébène", ""]
+    assert list(df["group"]) == ["G1", "G2", "G1"]
+    assert list(df["layerId"]) == [1, 2, 3]
+    df = LoopProjectFile.ConvertToDataFrame(
+        list(data), LoopProjectFile.stratigraphicLayerType, categorical=True
+    )
+    assert isinstance(df["group"].dtype, pd.CategoricalDtype)
+    assert sorted(df["group"].cat.categories) == ["G1", "G2"]
+    assert list(df["group"]) == ["G1", "G2", "G1"]
+    assert not isinstance(df["name"].dtype, pd.CategoricalDtype)
+
+
+def test_convert_dataframe():
+    df = pd.DataFrame(
+        {"layerId": [1, 2], "name": ["A", "Ébène"], "group": ["G1", "G2"]}
+    )
+    dtype = np.dtype([("layerId", "<u4"), ("name", "S120"), ("group", "S7")])
+    data = LoopProjectFile.ConvertDataFrame(df, dtype)
+    assert data.dtype == dtype
+    assert list(data["layerId"]) == [1, 2]
+    assert list(data["name"]) == [b"A", "Ébène".encode()]
+    with pytest.raises(ValueError, match="group in row 1"):
+        LoopProjectFile.ConvertDataFrame(df.assign(group=["G1", "G" * 8]), dtype)
+    with pytest.raises(ValueError, match="not an integer"):
+        LoopProjectFile.ConvertDataFrame(df.assign(layerId=[1.0, 2.5]), dtype)
+    with pytest.raises(ValueError, match="out of the range"):
+        LoopProjectFile.ConvertDataFrame(df.assign(layerId=[-1, 2]), dtype)
+    assert list(LoopProjectFile.ConvertDataFrame(df.assign(layerId=[1.0, 2.0]), dtype)["layerId"]) == [1, 2]
+
+
+def test_set_accepts_arrays_dataframes_and_lists(project_path):
+    data = np.zeros(4, LoopProjectFile.contactObservationType)
+    data["layerId"] = [1, 2, 3, 4]
+    data["easting"] = [1.5, 2.5, 3.5, 4.5]
+    LoopProjectFile.Set(project_path, "contacts", data=data)
+    LoopProjectFile.Set(project_path, "contactsAppend", data=pd.DataFrame(data))
+    LoopProjectFile.Set(project_path, "contactsAppend", data=[tuple(r) for r in data[:2]])
+    array = LoopProjectFile.GetArray(project_path, "contacts")["value"]
+    assert np.array_equal(array, np.concatenate([data, data, data[:2]]))
+    records = LoopProjectFile.Get(project_path, "faultLog")["value"]
+    LoopProjectFile.Set(project_path, "faultLog", data=records[1:])
+    assert list(LoopProjectFile.GetArray(project_path, "faultLog")["value"]["name"]) == [b"F2", b"F3"]
+
+
+def test_append_after_shrinking_set(project_path):
+    def contacts(ids):
+        data = np.zeros(len(ids), LoopProjectFile.contactObservationType)
+        data["layerId"] = ids
+        return data
+
+    def dimension_size():
+        root = LoopProjectFile.OpenProjectFile(project_path)["root"]
+        try:
+            return root["DataCollection"]["Contacts"].dimensions["index"].size
+        finally:
+            root.close()
+
+    LoopProjectFile.Set(project_path, "contacts", data=contacts(range(10)))
+    LoopProjectFile.Set(project_path, "contacts", data=contacts([100, 101]))
+    LoopProjectFile.Set(project_path, "contactsAppend", data=contacts([102, 103]))
+    array = LoopProjectFile.GetArray(project_path, "contacts")["value"]
+    assert list(array["layerId"]) == [100, 101, 102, 103]
+    # The dead records were reused rather than the table grown
+    assert dimension_size() == 10
+
+    sizes = []
+    for start in range(4, 200, 4):
+        LoopProjectFile.Set(project_path, "contactsAppend", data=contacts(range(start + 100, start + 104)))
+        sizes.append(dimension_size())
+    assert list(LoopProjectFile.GetArray(project_path, "contacts")["value"]["layerId"]) == list(range(100, 300))
+    # Grown geometrically rather than by each append
+    assert sorted(set(sizes)) == [10, 20, 40, 80, 160, 320]
+
+
+def test_padding_never_returned(project_path):
+    data = np.zeros(3, LoopProjectFile.contactObservationType)
+    data["layerId"] = [1, 2, 3]
+    LoopProjectFile.Set(project_path, "contacts", data=data)
+    data["layerId"] = [4, 5, 6]
+    LoopProjectFile.Set(project_path, "contactsAppend", data=data[:2])
+    root = LoopProjectFile.OpenProjectFile(project_path)["root"]
+    try:
+        # The growth padded the table with zero records past MaxValid
+        assert root["DataCollection"]["Contacts"].dimensions["index"].size == 6
+    finally:
+        root.close()
+
+    expected = [1, 2, 3, 4, 5]
+    assert [r["layerId"] for r in LoopProjectFile.Get(project_path, "contacts")["value"]] == expected
+    assert list(LoopProjectFile.GetArray(project_path, "contacts")["value"]["layerId"]) == expected
+    resp = LoopProjectFile.GetArray(project_path, "contacts", indexRange=(0, 100))
+    assert list(resp["value"]["layerId"]) == expected
+    resp = LoopProjectFile.GetArray(project_path, "contacts", indexList=[4, 5, 6])
+    assert list(resp["value"]["layerId"]) == [5]
+    resp = LoopProjectFile.GetArray(project_path, "contacts", where={"layerId": ("<", 10)})
+    assert list(resp["value"]["layerId"]) == expected
+    blocks = LoopProjectFile.IterElement(project_path, "contacts", chunkRows=1)
+    assert [layerId for block in blocks for layerId in block["layerId"]] == expected
+    assert list(LoopProjectFile.ProjectFile(project_path)["contacts"]["layerId"]) == expected
+
+
+def test_element_writer(project_path):
+    def contacts(ids):
+        data = np.zeros(len(ids), LoopProjectFile.contactObservationType)
+        data["layerId"] = ids
+        return data
+
+    with LoopProjectFile.ElementWriter(project_path, "contacts") as writer:
+        assert not writer.write(contacts(range(5)))["errorFlag"]
+        frame = pd.DataFrame(contacts(range(5, 8)))
+        assert not writer.write(frame)["errorFlag"]
+        # A chunk that does not convert is rejected without being written
+        assert writer.write(pd.DataFrame({"layerId": [1]}))["errorFlag"]
+    array = LoopProjectFile.GetArray(project_path, "contacts")["value"]
+    assert list(array["layerId"]) == list(range(8))
+
+    with LoopProjectFile.ElementWriter(project_path, "contacts", append=True) as writer:
+        writer.write(contacts([8, 9]))
+    array = LoopProjectFile.GetArray(project_path, "contacts")["value"]
+    assert list(array["layerId"]) == list(range(10))
+
+    # Nothing is committed when the writing fails
+    with pytest.raises(RuntimeError):
+        with LoopProjectFile.ElementWriter(project_path, "contacts", append=True) as writer:
+            writer.write(contacts([10, 11]))
+            raise RuntimeError("interrupted")
+    assert len(LoopProjectFile.GetArray(project_path, "contacts")["value"]) == 10
+
+    with pytest.raises(ValueError):
+        LoopProjectFile.ElementWriter(project_path, "extents")
+
+
+def test_upsert(project_path):
+    faults = np.zeros(2, LoopProjectFile.faultEventType)
+    faults["eventId"] = [2, 4]
+    faults["name"] = [b"F2b", b"F4"]
+    resp = LoopProjectFile.Upsert(project_path, "faultLog", faults)
+    assert resp["value"] == {"updated": 1, "inserted": 1}
+    array = LoopProjectFile.GetArray(project_path, "faultLog")["value"]
+    assert list(array["eventId"]) == [1, 2, 3, 4]
+    assert list(array["name"]) == [b"F1", b"F2b", b"F3", b"F4"]
+    assert list(array["avgDisplacement"]) == [10.0, 0.0, 30.0, 0.0]
+
+    # Rows scattered over a chunk are patched without touching the others
+    contacts = np.zeros(1000, LoopProjectFile.contactObservationType)
+    contacts["layerId"] = np.arange(1000)
+    LoopProjectFile.Set(project_path, "contacts", data=contacts)
+    update = contacts[[900, 5, 7]].copy()
+    update["easting"] = 1.0
+    resp = LoopProjectFile.Upsert(project_path, "contacts", update, key="layerId")
+    assert resp["value"] == {"updated": 3, "inserted": 0}
+    array = LoopProjectFile.GetArray(project_path, "contacts")["value"]
+    assert list(np.flatnonzero(array["easting"])) == [5, 7, 900]
+    assert list(array["layerId"]) == list(range(1000))
+
+    relationships = np.zeros(2, LoopProjectFile.eventRelationshipType)
+    relationships["eventId1"] = [1, 1]
+    relationships["eventId2"] = [2, 3]
+    LoopProjectFile.Set(project_path, "eventRelationships", data=relationships)
+    relationships["bidirectional"] = 1
+    resp = LoopProjectFile.Upsert(
+        project_path, "eventRelationships", relationships[1:], key=["eventId1", "eventId2"]
+    )
+    assert resp["value"] == {"updated": 1, "inserted": 0}
+    array = LoopProjectFile.GetArray(project_path, "eventRelationships")["value"]
+    assert list(array["bidirectional"]) == [0, 1]
+
+    # Ambiguous keys are rejected before anything is written
+    assert LoopProjectFile.Upsert(project_path, "faultLog", np.concatenate([faults, faults]))["errorFlag"]
+    assert LoopProjectFile.Upsert(project_path, "faultLog", faults, key="unknown")["errorFlag"]
@@ -0,0 +1,105 @@
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+
+import LoopProjectFile
+
+
+def test_pool_reuses_and_evicts(project_path, tmp_path):
+    other = str(tmp_path / "other.loop3d")
+    shutil.copy(project_path, other)
+    pool = LoopProjectFile.HandlePool(maxHandles=1)
+
+    resp = LoopProjectFile.Get(project_path, "faultLog", pool=pool)
+    assert len(resp["value"]) == 3
+    assert project_path in pool
+    with pool.borrow(project_path) as fileResp:
+        root = fileResp["root"]
+    with pool.borrow(project_path) as fileResp:
+        assert fileResp["root"] is root
+
+    LoopProjectFile.Get(other, "version", pool=pool)
+    assert other in pool and project_path not in pool
+    assert len(pool) == 1
+    pool.closeAll()
+    assert len(pool) == 0
+
+
+def test_pool_pins_and_writes(project_path):
+    pool = LoopProjectFile.HandlePool(maxHandles=1)
+    contacts = np.zeros(2, LoopProjectFile.contactObservationType)
+    assert not LoopProjectFile.Set(project_path, "contacts", pool=pool, data=contacts)["errorFlag"]
+    with pool.borrow(project_path) as fileResp:
+        # A pinned handle is never evicted
+        pool.closeAll()
+        assert project_path in pool
+        assert len(LoopProjectFile.GetElement(fileResp["root"], "contacts")["value"]) == 2
+    assert pool.release(project_path)
+    assert len(LoopProjectFile.Get(project_path, "contacts")["value"]) == 2
+
+
+def test_pool_reopens_on_change(project_path):
+    pool = LoopProjectFile.HandlePool()
+    with pool.borrow(project_path) as fileResp:
+        root = fileResp["root"]
+        data = LoopProjectFile.GetElement(root, "faultLog")["value"]
+    # Batch writes replace the file while the pooled handle stays open
+    LoopProjectFile.SetMany(project_path, {"faultLogAppend": {"data": data}})
+    with pool.borrow(project_path) as fileResp:
+        assert fileResp["root"] is not root
+        assert len(LoopProjectFile.GetElement(fileResp["root"], "faultLog")["value"]) == 6
+    pool.closeAll()
+
+
+def test_plain_writes_with_idle_pooled_handle(project_path):
+    pool = LoopProjectFile.HandlePool()
+    data = LoopProjectFile.Get(project_path, "faultLog", pool=pool)["value"]
+    assert project_path in pool
+    # Writers outside the pool close its idle handle rather than failing
+    assert not LoopProjectFile.Set(project_path, "faultLogAppend", data=data)["errorFlag"]
+    assert project_path not in pool
+    assert len(LoopProjectFile.Get(project_path, "faultLog", pool=pool)["value"]) == 6
+    with LoopProjectFile.Session(project_path, "a") as session:
+        assert not session.Set("faultLog", data=data)["errorFlag"]
+    assert len(LoopProjectFile.Get(project_path, "faultLog", pool=pool)["value"]) == 3
+    other = LoopProjectFile.HandlePool()
+    assert not LoopProjectFile.Set(project_path, "faultLog", pool=other, data=data[:1])["errorFlag"]
+    assert len(LoopProjectFile.Get(project_path, "faultLog", pool=pool)["value"]) == 1
+    pool.closeAll()
+    other.closeAll()
+
+
+def test_pool_close_all_while_reading(project_path):
+    pool = LoopProjectFile.HandlePool()
+    stop = time.monotonic() + 1.0
+    errors = []
+
+    def read():
+        try:
+            while time.monotonic() < stop:
+                assert len(LoopProjectFile.Get(project_path, "faultLog", pool=pool)["value"]) == 3
+        except Exception as e:
+            errors.append(e)
+
+    def close():
+        while time.monotonic() < stop:
+            pool.closeAll()
+
+    # Switch threads often so closeAll lands between Get taking the library
+    # lock and the pool's lock
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    threads = [threading.Thread(target=read, daemon=True), threading.Thread(target=close, daemon=True)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+    finally:
+        sys.setswitchinterval(interval)
+    assert not any(thread.is_alive() for thread in threads)
+    assert errors == []
+    pool.closeAll()
@@ -1,3 +1,5 @@
+import pytest
+
 from LoopProjectFile import ProjectFile
 # import pandas as pd
 # import numpy as np
@@ -77,3 +79,155 @@ def test_set_stratigraphy_locations():
 
 def test_set_stratigraphy_orientations():
     pass
+
+
+def test_cached_reads_follow_writes(project_path):
+    import LoopProjectFile
+
+    file = ProjectFile(project_path)
+    assert list(file.faultLog["eventId"]) == [1, 2, 3]
+    assert file.origin[0] == file.extents["utm"][2]
+    # Writes through the object invalidate the cache
+    log = file.faultLog
+    log["avgDisplacement"] = 5.0
+    file.faultLog = log
+    assert list(file.faultLog["avgDisplacement"]) == [5.0, 5.0, 5.0]
+    # Writes from elsewhere are picked up from the file's mtime/size
+    data = LoopProjectFile.Get(project_path, "faultLog")["value"]
+    LoopProjectFile.Set(project_path, "faultLogAppend", data=data)
+    assert len(file.faultLog) == 6
+    # Nor does a reading project keep another project from writing
+    other = ProjectFile(project_path)
+    log = other.faultLog
+    other.faultLog = log.iloc[:2]
+    assert len(file.faultLog) == 2
+    assert not LoopProjectFile.Set(project_path, "faultLogAppend", data=data)["errorFlag"]
+    assert len(other.faultLog) == 5
+    file.close()
+
+
+def test_failed_write_raises(project_path):
+    import LoopProjectFile
+
+    file = ProjectFile(project_path)
+    log = file.faultLog
+    # HDF5 refuses to open the file for writing while it is open elsewhere
+    with LoopProjectFile.Session(project_path):
+        with pytest.raises(Exception):
+            file.faultLog = log.iloc[:1]
+    assert len(file.faultLog) == 3
+
+
+def test_batch_commits_atomically(project_path):
+    import LoopProjectFile
+
+    file = ProjectFile(project_path)
+    log = file.faultLog
+    with file.batch():
+        log["avgDisplacement"] = 1.0
+        file.faultLog = log
+        file.extents = dict(file.extents, spacing=[10, 10, 10], epsg="EPSG:32753")
+        # Nothing is written until the block ends
+        assert list(file.faultLog["avgDisplacement"]) == [10.0, 20.0, 30.0]
+    assert list(file.faultLog["avgDisplacement"]) == [1.0, 1.0, 1.0]
+    assert file.extents["spacing"] == [10, 10, 10]
+
+    try:
+        with file.batch():
+            file.faultLog = log.iloc[:1]
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert len(file.faultLog) == 3
+
+    resp = LoopProjectFile.SetMany(project_path, [("faultLog", {"data": []}), ("bogus", {})])
+    assert resp["errorFlag"]
+    assert len(file.faultLog) == 3
+    file.close()
+
+
+def test_in_memory_project_persist(tmp_path):
+    import LoopProjectFile
+    import pandas as pd
+
+    filename = str(tmp_path / "memory.loop3d")
+    project = ProjectFile.new_in_memory()
+    assert project.in_memory
+    project.faultLog = pd.DataFrame(
+        {"eventId": [1, 2], "name": ["F1", "F2"]}
+    ).reindex(columns=list(LoopProjectFile.faultEventType.names), fill_value=0)
+    assert list(project.faultLog["eventId"]) == [1, 2]
+
+    project.persist(filename)
+    assert not project.in_memory
+    with ProjectFile(filename) as other:
+        assert list(other.faultLog["eventId"]) == [1, 2]
+    project.faultLog = project.faultLog.iloc[:1]
+    assert list(project.faultLog["eventId"]) == [1]
+    project.close()
+
+
+def test_project_from_bytes(project_path):
+    with open(project_path, "rb") as f:
+        file = ProjectFile(f.read())
+    assert file.valid
+    assert list(file.faultLog["avgDisplacement"]) == [10.0, 20.0, 30.0]
+
+
+def test_get_array(project_path):
+    import numpy as np
+    import LoopProjectFile
+
+    file = ProjectFile(project_path)
+    array = file.get_array("faultLog")
+    assert array.dtype == LoopProjectFile.faultEventType
+    assert list(array["eventId"]) == [1, 2, 3]
+    # Callers get their own copy of the cached records
+    array["eventId"] = 0
+    assert list(file.get_array("faultLog")["eventId"]) == [1, 2, 3]
+    assert file.faultLog["name"].tolist() == ["F1", "F2", "F3"]
+    assert file.get_array("contacts") is None
+    assert not np.shares_memory(array, file.get_array("faultLog"))
+    file.close()
+
+
+def test_query(project_path):
+    file = ProjectFile(project_path)
+    df = file.query("faultLog", {"avgDisplacement": (">", 15)})
+    assert list(df["eventId"]) == [2, 3]
+    assert list(df["name"]) == ["F2", "F3"]
+    file.close()
+
+
+def test_read_columns(project_path):
+    file = ProjectFile(project_path)
+    df = file["faultLog", ["eventId", "avgDisplacement"]]
+    assert list(df.columns) == ["eventId", "avgDisplacement"]
+    assert list(df["avgDisplacement"]) == [10.0, 20.0, 30.0]
+    assert file.read("contacts", columns=["easting"]) is None
+    array = file.get_array("faultLog", columns=["name"])
+    assert list(array["name"]) == [b"F1", b"F2", b"F3"]
+    file.faultLog
+    assert list(file.get_array("faultLog", columns=["eventId"])["eventId"]) == [1, 2, 3]
+    file.close()
+
+
+def test_iter(project_path):
+    file = ProjectFile(project_path)
+    frames = list(file.iter("faultLog", chunk_rows=1))
+    assert sum(len(df) for df in frames) == 3
+    assert [name for df in frames for name in df["name"]] == ["F1", "F2", "F3"]
+    arrays = list(file.iter("faultLog", columns=["eventId"], where={"eventId": ("!=", 2)}, as_array=True))
+    assert [eventId for array in arrays for eventId in array["eventId"]] == [1, 3]
+    file.close()
+
+
+def test_upsert(project_path):
+    file = ProjectFile(project_path)
+    log = file.faultLog
+    assert file.upsert("faultLog", log[log["eventId"] == 3].assign(avgDisplacement=250.0)) == {
+        "updated": 1,
+        "inserted": 0,
+    }
+    assert list(file.faultLog["avgDisplacement"]) == [10.0, 20.0, 250.0]
+    file.close()
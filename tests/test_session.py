@@ -0,0 +1,127 @@
+import io
+import os
+import tempfile
+
+import numpy as np
+
+import LoopProjectFile
+
+
+def test_session_get_matches_get(project_path):
+    with LoopProjectFile.Session(project_path) as session:
+        extents = session.Get("extents")
+        faultLog = session.Get("faultLog")
+    assert extents == LoopProjectFile.Get(project_path, "extents")
+    assert [r["eventId"] for r in faultLog["value"]] == [1, 2, 3]
+
+
+def test_session_set(project_path):
+    obs = np.zeros(2, LoopProjectFile.contactObservationType)
+    obs["layerId"] = [4, 5]
+    with LoopProjectFile.Session(project_path, "a") as session:
+        assert not session.Set("contacts", data=obs)["errorFlag"]
+        assert not session.Set("contactsAppend", data=obs)["errorFlag"]
+        assert len(session.Get("contacts")["value"]) == 4
+    assert not session.isOpen
+    assert len(LoopProjectFile.Get(project_path, "contacts")["value"]) == 4
+
+
+def test_session_read_only(project_path):
+    with LoopProjectFile.Session(project_path) as session:
+        assert session.Set("version", version=[1, 0, 0])["errorFlag"]
+
+
+def test_get_many(project_path):
+    resps = LoopProjectFile.GetMany(
+        project_path, ["version", "extents", "faultLog", "strModel"], strModel={"index": 0}
+    )
+    assert resps["extents"] == LoopProjectFile.Get(project_path, "extents")
+    assert len(resps["faultLog"]["value"]) == 3
+    assert resps["strModel"]["errorFlag"]
+
+
+def test_get_many_missing_file(tmp_path):
+    resps = LoopProjectFile.GetMany(str(tmp_path / "missing.loop3d"), ["version"])
+    assert resps["version"]["errorFlag"]
+
+
+def test_to_csv(project_path, tmp_path):
+    LoopProjectFile.ToCsv(project_path, str(tmp_path / "csv"))
+    assert (tmp_path / "csv" / "extents.csv").exists()
+    assert (tmp_path / "csv" / "faultLog.csv").exists()
+
+
+def test_in_memory_project_persist(tmp_path):
+    filename = str(tmp_path / "memory.loop3d")
+    project = LoopProjectFile.CreateInMemory()
+    faultLog = np.zeros(2, LoopProjectFile.faultEventType)
+    faultLog["eventId"] = [7, 8]
+    assert not LoopProjectFile.Set(project, "faultLog", data=faultLog)["errorFlag"]
+    assert [r["eventId"] for r in LoopProjectFile.Get(project, "faultLog")["value"]] == [7, 8]
+    assert not os.path.exists(filename)
+
+    assert not project.persist(filename)["errorFlag"]
+    assert not project.isOpen
+    assert LoopProjectFile.CheckFileIsLoopProjectFile(filename)
+    assert [r["eventId"] for r in LoopProjectFile.Get(filename, "faultLog")["value"]] == [7, 8]
+
+
+def test_in_memory_project_stays_off_disk(tmp_path, monkeypatch):
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+    filename = str(tmp_path / "memory.loop3d")
+    faultLog = np.zeros(3, LoopProjectFile.faultEventType)
+    faultLog["eventId"] = [1, 2, 3]
+    faultLog["name"] = [b"F1", b"F2", b"F3"]
+    folds = np.zeros(4, LoopProjectFile.foldObservationType)
+    folds["eventId"] = [5, 6, 7, 8]
+    folds["foliation"] = b"S0"
+
+    discarded = LoopProjectFile.CreateInMemory()
+    LoopProjectFile.Set(discarded, "faultLog", data=faultLog)
+    discarded.close()
+    project = LoopProjectFile.CreateInMemory()
+    assert not project.Set(
+        "extents",
+        geodesic=[0, 1, -180, -179],
+        utm=[1, 1, 10000000, 9889363.77, 833966.132, 722587.169],
+        depth=[-1000, -2000],
+        spacing=[1000, 1000, 10],
+        epsg="EPSG:32753",
+    )["errorFlag"]
+    assert not project.Set("faultLog", data=faultLog)["errorFlag"]
+    assert not project.Set("foldObservations", data=folds, layout="columnar")["errorFlag"]
+    expected = {
+        element: project.Get(element) for element in ["extents", "faultLog", "foldObservations"]
+    }
+    assert os.listdir(scratch) == [] and not os.path.exists(filename)
+    assert not project.persist(filename)["errorFlag"]
+
+    for element, resp in expected.items():
+        assert LoopProjectFile.Get(filename, element) == resp
+    # The persisted file is an ordinary, writable project file
+    assert not LoopProjectFile.Set(filename, "faultLogAppend", data=faultLog[:1])["errorFlag"]
+    assert len(LoopProjectFile.Get(filename, "faultLog")["value"]) == 4
+    assert project.persist(filename)["errorFlag"]
+
+
+def test_open_from_bytes_and_file_like(project_path):
+    with open(project_path, "rb") as f:
+        data = f.read()
+    stream = io.BytesIO(data)
+    assert LoopProjectFile.CheckFileValid(data)
+    assert LoopProjectFile.CheckFileValid(stream)
+    assert stream.tell() == 0
+    faultLog = LoopProjectFile.Get(stream, "faultLog")
+    assert [r["eventId"] for r in faultLog["value"]] == [1, 2, 3]
+    assert LoopProjectFile.GetMany(data, ["extents"])["extents"] == LoopProjectFile.Get(
+        project_path, "extents"
+    )
+    assert LoopProjectFile.Set(data, "faultLog", data=faultLog["value"])["errorFlag"]
+    # Buffers are read only, writes report an error rather than raising
+    resp = LoopProjectFile.Set(io.BytesIO(data), "faultLog", data=faultLog["value"])
+    assert resp["errorFlag"]
+    resp = LoopProjectFile.Upsert(io.BytesIO(data), "faultLog", faultLog["value"])
+    assert resp["errorFlag"]
+    assert not LoopProjectFile.CheckFileValid(b"not a project file")